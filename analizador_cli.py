@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Analizador OCR Universal - Línea de Comandos
+Ejecuta el mismo análisis que la interfaz gráfica sin necesidad de Tkinter,
+para servidores sin pantalla, tareas programadas (cron) o procesamiento por lotes.
+
+Uso:
+    python analizador_cli.py documentos/ --palabras plantilla_salud.txt
+    python analizador_cli.py "archivo/*.pdf" otro.pdf --palabras claves.json --salida resultados
+    python analizador_cli.py --buscar-indice --palabras claves.txt --salida resultados
+    python analizador_cli.py --reanudar --salida resultados
+    python analizador_cli.py --vigilar entrada_escaneos/ --palabras claves.txt --salida resultados
+"""
+
+import argparse
+import contextlib
+import glob
+import os
+import signal
+import sys
+
+from backends_ocr import MOTOR_AUTOMATICO, MOTORES_OCR
+from backends_pdf import MODOS_RENDER, MOTOR_PYPDF2, MOTORES_PDF, RENDER_GRISES
+from carpeta_vigilada import HotFolderService
+from clasificador_paginas import CLASIFICADORES, CLASIFICADOR_POR_DEFECTO
+from motor_analisis import AnalysisEngine, load_keywords_file
+from motor_busqueda import MODO_EXACTO, MODOS_COINCIDENCIA
+from preprocesado_imagen import PASOS_PREPROCESADO, PREPROCESADO_COMPLETO, parse_steps
+from procesador_pdf import POLITICA_DPI_FIJA, POLITICAS_DPI
+
+
+def preprocessing_steps(value):
+    """Validar la lista de pasos de --preprocesado"""
+    try:
+        return parse_steps(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+def expand_inputs(inputs, recursive=False):
+    """Convertir carpetas, patrones glob y rutas en una lista ordenada de PDFs"""
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            pattern = os.path.join(item, '**', '*.pdf') if recursive else os.path.join(item, '*.pdf')
+            found = glob.glob(pattern, recursive=recursive)
+            found += glob.glob(pattern[:-4] + '.PDF', recursive=recursive)
+        elif glob.has_magic(item):
+            found = glob.glob(item, recursive=recursive)
+        else:
+            found = [item]
+
+        for file_path in sorted(found):
+            file_path = os.path.abspath(file_path)
+            if file_path not in files:
+                files.append(file_path)
+    return files
+
+
+def build_parser():
+    """Definir los argumentos de la línea de comandos"""
+    parser = argparse.ArgumentParser(
+        description="Analizador OCR Universal - búsqueda de palabras clave en PDFs sin interfaz gráfica"
+    )
+    parser.add_argument('entradas', nargs='*',
+                        help="Carpetas, patrones (p. ej. 'docs/*.pdf') o archivos PDF")
+    parser.add_argument('--palabras',
+                        help="Archivo de palabras clave (.txt una por línea, o .json); obligatorio salvo con --reanudar")
+    parser.add_argument('--salida', default=os.path.join(os.getcwd(), 'resultados_ocr'),
+                        help="Carpeta de resultados (por defecto: ./resultados_ocr)")
+    parser.add_argument('--proyecto', default="Proyecto_OCR", help="Nombre del proyecto")
+    parser.add_argument('--recursivo', action='store_true', help="Buscar PDFs también en subcarpetas")
+    parser.add_argument('--sensible-mayusculas', action='store_true',
+                        help="Búsqueda sensible a mayúsculas/minúsculas")
+    parser.add_argument('--fragmentos', action='store_true',
+                        help="Buscar también dentro de otras palabras (no solo palabras completas)")
+    parser.add_argument('--coincidencia', choices=MODOS_COINCIDENCIA, default=MODO_EXACTO,
+                        help="'exacto': tal como se escribió la palabra clave; 'sin_tildes': ignora tildes y "
+                             "mayúsculas (útil con texto de OCR); 'raiz': además reduce las palabras a su raíz "
+                             "en español, así 'gestión' encuentra también 'gestiones' y 'gestion'")
+    parser.add_argument('--errores', type=int, choices=range(0, 3), default=0, metavar='{0,1,2}',
+                        help="Errores de OCR tolerados por palabra clave (letras cambiadas, faltantes o de más): "
+                             "las palabras de 5 a 7 letras admiten 1 y las de 8 o más hasta este valor; "
+                             "0 (por defecto) solo busca coincidencias exactas")
+    parser.add_argument('--sin-ocr', action='store_true', help="No usar OCR en páginas escaneadas")
+    parser.add_argument('--clasificador', choices=sorted(CLASIFICADORES), default=CLASIFICADOR_POR_DEFECTO,
+                        help="Criterio para decidir texto directo u OCR por página: 'senales' (imágenes y "
+                             "calidad del texto) o 'longitud' (OCR si hay menos de 50 caracteres)")
+    parser.add_argument('--resolucion-ocr', choices=POLITICAS_DPI, default=POLITICA_DPI_FIJA,
+                        help="'fija': OCR a 300 DPI; 'adaptativa': primera pasada a 150 DPI y "
+                             "repetición a 300 DPI solo de las zonas con baja confianza")
+    parser.add_argument('--preprocesado', type=preprocessing_steps, default=[], metavar='PASOS',
+                        help=f"Preparar las imágenes antes del OCR, pasos separados por comas: "
+                             f"{', '.join(PASOS_PREPROCESADO)}, o '{PREPROCESADO_COMPLETO}' (escala de grises, "
+                             f"páginas en blanco sin OCR, recorte de bordes, enderezado y binarización adaptativa)")
+    parser.add_argument('--motor-ocr', choices=MOTORES_OCR, default=MOTOR_AUTOMATICO,
+                        help="Motor de OCR: 'tesserocr' mantiene el modelo cargado entre páginas; "
+                             "'auto' lo usa si está instalado y si no usa 'pytesseract'")
+    parser.add_argument('--motor-pdf', choices=MOTORES_PDF, default=MOTOR_PYPDF2,
+                        help="Lectura de PDFs: 'pypdf2' (PyPDF2 + poppler) o 'pdfium' (pypdfium2: cada "
+                             "documento se abre una vez para extraer texto y renderizar)")
+    parser.add_argument('--render', choices=MODOS_RENDER, default=RENDER_GRISES,
+                        help="Color de las páginas renderizadas para OCR: 'grises' (por defecto, un tercio de la "
+                             "memoria del color y el mismo resultado), 'bn' (blanco y negro) o 'color'")
+    parser.add_argument('--memoria-mb', type=int, default=None, metavar='MB',
+                        help="Memoria máxima para las páginas renderizadas en vuelo entre todos los procesos; "
+                             "si se agota, los procesos esperan antes de renderizar otra página")
+    parser.add_argument('--procesos', type=int, default=os.cpu_count() or 1,
+                        help="Procesos en paralelo (por defecto: cantidad de CPUs)")
+    parser.add_argument('--sin-cache', action='store_true', help="No reutilizar texto ya extraído")
+    parser.add_argument('--sin-indice', action='store_true', help="No indexar los documentos procesados")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Procesar solo los archivos nuevos o modificados desde el último análisis del "
+                             "proyecto con las mismas palabras clave y opciones")
+    parser.add_argument('--buscar-indice', action='store_true',
+                        help="Buscar en los documentos ya indexados de la carpeta de resultados, sin procesar PDFs")
+    parser.add_argument('--reanudar', action='store_true',
+                        help="Continuar el último análisis sin terminar (cancelado o interrumpido) del proyecto "
+                             "en la carpeta de resultados, con sus archivos y su configuración")
+    parser.add_argument('--vigilar', action='store_true',
+                        help="Vigilar las carpetas indicadas y analizar cada PDF nuevo o modificado apenas "
+                             "termina de copiarse, hasta Ctrl+C (reporte del día, manifiesto e índice "
+                             "actualizados con cada archivo)")
+    return parser
+
+
+def main(argv=None):
+    """Función principal; devuelve el código de salida"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.reanudar:
+        engine, files = AnalysisEngine.from_checkpoint(args.salida, args.proyecto)
+        if engine is None:
+            print(f"❌ No hay un análisis sin terminar del proyecto '{args.proyecto}' en: {args.salida}",
+                  file=sys.stderr)
+            return 2
+        print(f"⏯️ Reanudando el análisis de {len(files)} archivo(s)")
+        return run_engine(engine, files)
+
+    if not args.palabras:
+        parser.error("se requiere --palabras (salvo con --reanudar)")
+
+    try:
+        keywords = load_keywords_file(args.palabras)
+    except Exception as e:
+        print(f"❌ No se pudo cargar el archivo de palabras clave: {e}", file=sys.stderr)
+        return 2
+
+    if not keywords:
+        print("❌ El archivo de palabras clave está vacío.", file=sys.stderr)
+        return 2
+
+    engine = AnalysisEngine(
+        args.proyecto,
+        keywords,
+        args.salida,
+        case_sensitive=args.sensible_mayusculas,
+        whole_words=not args.fragmentos,
+        match_mode=args.coincidencia,
+        max_edits=args.errores,
+        ocr_enabled=not args.sin_ocr,
+        workers=args.procesos,
+        use_cache=not args.sin_cache,
+        use_index=not args.sin_indice,
+        page_classifier=args.clasificador,
+        dpi_policy=args.resolucion_ocr,
+        ocr_backend=args.motor_ocr,
+        pdf_backend=args.motor_pdf,
+        preprocessing=args.preprocesado,
+        render_mode=args.render,
+        memory_budget_mb=args.memoria_mb,
+        incremental=args.incremental
+    )
+
+    if args.buscar_indice:
+        if not engine.has_index():
+            print(f"❌ No hay documentos indexados en: {args.salida}", file=sys.stderr)
+            return 2
+        summary = engine.search_index()
+        print(f"📄 Reporte: {summary['report_path']}")
+        return 1 if summary['files_with_errors'] else 0
+
+    if args.vigilar:
+        folders = [folder for folder in args.entradas if os.path.isdir(folder)]
+        if not folders or len(folders) != len(args.entradas):
+            print("❌ Con --vigilar las entradas deben ser carpetas existentes.", file=sys.stderr)
+            return 2
+        return run_hot_folder(engine, folders, args.recursivo)
+
+    files = expand_inputs(args.entradas, args.recursivo)
+    if not files:
+        print("❌ No se encontraron archivos PDF para analizar.", file=sys.stderr)
+        return 2
+    return run_engine(engine, files)
+
+
+@contextlib.contextmanager
+def cancel_on_interrupt(engine):
+    """El primer Ctrl+C cancela ordenadamente el trabajo del motor y el segundo lo interrumpe"""
+    def request_cancel(signum, frame):
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        engine.cancel()
+
+    previous_handler = signal.signal(signal.SIGINT, request_cancel)
+    try:
+        yield
+    finally:
+        signal.signal(signal.SIGINT, previous_handler)
+
+
+def run_hot_folder(engine, folders, recursive=False):
+    """Vigilar las carpetas hasta Ctrl+C"""
+    try:
+        with cancel_on_interrupt(engine):
+            HotFolderService(engine, folders, recursive).run()
+    except ImportError as e:
+        print(f"❌ Error al importar librerías: {e}", file=sys.stderr)
+        print("Por favor, ejecute 'python verificar_instalacion.py'", file=sys.stderr)
+        return 2
+    return 0
+
+
+def run_engine(engine, files):
+    """Ejecutar el análisis; el primer Ctrl+C lo cancela ordenadamente y el segundo lo interrumpe"""
+    try:
+        with cancel_on_interrupt(engine):
+            summary = engine.run(files)
+    except ImportError as e:
+        print(f"❌ Error al importar librerías: {e}", file=sys.stderr)
+        print("Por favor, ejecute 'python verificar_instalacion.py'", file=sys.stderr)
+        return 2
+
+    print(f"📄 Reporte: {summary['report_path']}")
+    if summary['cancelled']:
+        print(f"⏯️ Para continuar: python analizador_cli.py --reanudar --salida \"{engine.output_dir}\" "
+              f"--proyecto \"{engine.project_name}\"")
+        # Código convencional de un proceso detenido con Ctrl+C
+        return 130
+    return 1 if summary['files_with_errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
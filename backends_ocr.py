@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motores de OCR
+Para el Analizador OCR Universal
+
+pytesseract ejecuta un proceso de tesseract por página: guarda la imagen en un
+archivo temporal, vuelve a cargar el modelo del idioma y lee el resultado desde
+disco. Con tesserocr (enlace directo a libtesseract) cada proceso mantiene un
+grupo de motores abiertos por idioma y el modelo queda cargado entre páginas.
+Si tesserocr no está instalado se usa pytesseract.
+"""
+
+import contextlib
+import os
+import queue
+import threading
+
+# Motores disponibles ('auto' elige tesserocr si está instalado)
+MOTOR_AUTOMATICO = 'auto'
+MOTOR_TESSEROCR = 'tesserocr'
+MOTOR_PYTESSERACT = 'pytesseract'
+MOTORES_OCR = (MOTOR_AUTOMATICO, MOTOR_TESSEROCR, MOTOR_PYTESSERACT)
+
+# Claves del diccionario que devuelve image_to_data (mismo formato que pytesseract.Output.DICT)
+DATA_KEYS = ('block_num', 'par_num', 'line_num', 'left', 'top', 'width', 'height', 'conf', 'text')
+
+
+def image_file(image):
+    """Archivo del que se abrió la imagen sin modificarla (None si está solo en memoria)
+
+    Las páginas renderizadas a archivos temporales se pasan a tesseract por
+    su ruta, sin decodificarlas ni volver a codificarlas en este proceso.
+    """
+    return getattr(image, 'filename', None) or None
+
+
+def tessdata_dir():
+    """Carpeta tessdata incluida en el proyecto (None si no existe)"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    tessdata_path = os.path.join(script_dir, 'tessdata')
+    return tessdata_path if os.path.isdir(tessdata_path) else None
+
+
+def configurar_ocr():
+    """Configurar pytesseract y TESSDATA_PREFIX para usar los archivos locales"""
+    import pytesseract
+
+    # En Windows se usa la instalación estándar; en otros sistemas, el tesseract del PATH
+    tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+    if os.path.exists(tesseract_cmd):
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+
+    # Usar los archivos de idioma incluidos en el proyecto si están presentes
+    tessdata_path = tessdata_dir()
+    if tessdata_path:
+        os.environ['TESSDATA_PREFIX'] = tessdata_path
+
+
+class PytesseractBackend:
+    """OCR con el ejecutable de tesseract, un proceso por imagen"""
+
+    name = MOTOR_PYTESSERACT
+    # Sufijo de las claves de caché del texto OCR (el texto reconocido depende del motor)
+    cache_suffix = ''
+
+    def __init__(self, lang=None):
+        import pytesseract
+
+        configurar_ocr()
+        self.pytesseract = pytesseract
+
+    def image_to_string(self, image, lang):
+        """Texto reconocido en una imagen"""
+        return self.pytesseract.image_to_string(image_file(image) or image, lang=lang)
+
+    def image_to_data(self, image, lang):
+        """Palabras reconocidas con posición y confianza (ver DATA_KEYS)"""
+        return self.pytesseract.image_to_data(image_file(image) or image, lang=lang,
+                                              output_type=self.pytesseract.Output.DICT)
+
+    def close(self):
+        """Nada que liberar: cada llamada usa su propio proceso"""
+
+
+class TesserocrBackend:
+    """OCR con libtesseract a través de tesserocr, con motores persistentes
+
+    Se crean hasta pool_size motores por idioma, a medida que se necesitan, y
+    se reutilizan entre páginas; cada motor carga el modelo una sola vez. Es
+    seguro usarlo desde varios hilos: cada llamada toma un motor libre.
+    """
+
+    name = MOTOR_TESSEROCR
+    cache_suffix = '_tesserocr'
+
+    def __init__(self, lang=None, pool_size=1):
+        import tesserocr
+
+        self.tesserocr = tesserocr
+        self.pool_size = max(1, pool_size)
+        self.path = tessdata_dir() or os.environ.get('TESSDATA_PREFIX')
+        self._pools = {}
+        self._created = {}
+        self._lock = threading.Lock()
+
+        # Cargar el modelo por adelantado (y fallar aquí si el idioma no está instalado)
+        if lang:
+            with self._engine(lang):
+                pass
+
+    def _new_engine(self, lang):
+        """Crear un motor de libtesseract con el modelo del idioma cargado"""
+        if self.path:
+            return self.tesserocr.PyTessBaseAPI(path=self.path.rstrip('/\\') + os.sep, lang=lang)
+        return self.tesserocr.PyTessBaseAPI(lang=lang)
+
+    @contextlib.contextmanager
+    def _engine(self, lang):
+        """Tomar un motor libre del idioma (creándolo si hace falta) y devolverlo al terminar"""
+        with self._lock:
+            pool = self._pools.setdefault(lang, queue.LifoQueue())
+            create = pool.empty() and self._created.get(lang, 0) < self.pool_size
+            if create:
+                self._created[lang] = self._created.get(lang, 0) + 1
+
+        if create:
+            try:
+                engine = self._new_engine(lang)
+            except Exception:
+                with self._lock:
+                    self._created[lang] -= 1
+                raise
+        else:
+            engine = pool.get()
+
+        try:
+            yield engine
+        finally:
+            # Liberar la imagen y los resultados; el modelo sigue cargado
+            engine.Clear()
+            pool.put(engine)
+
+    @staticmethod
+    def _set_image(engine, image):
+        """Cargar la imagen en el motor, desde su archivo si lo tiene"""
+        path = image_file(image)
+        if path:
+            engine.SetImageFile(path)
+        else:
+            engine.SetImage(image)
+
+    def image_to_string(self, image, lang):
+        """Texto reconocido en una imagen"""
+        with self._engine(lang) as engine:
+            self._set_image(engine, image)
+            return engine.GetUTF8Text()
+
+    def image_to_data(self, image, lang):
+        """Palabras reconocidas con posición y confianza (ver DATA_KEYS)"""
+        RIL = self.tesserocr.RIL
+        data = {key: [] for key in DATA_KEYS}
+        with self._engine(lang) as engine:
+            self._set_image(engine, image)
+            engine.Recognize()
+            iterator = engine.GetIterator()
+            if iterator is None:
+                return data
+
+            block = par = line = 0
+            for word in self.tesserocr.iterate_level(iterator, RIL.WORD):
+                if word.IsAtBeginningOf(RIL.BLOCK):
+                    block, par, line = block + 1, 0, 0
+                if word.IsAtBeginningOf(RIL.PARA):
+                    par, line = par + 1, 0
+                if word.IsAtBeginningOf(RIL.TEXTLINE):
+                    line += 1
+
+                box = word.BoundingBox(RIL.WORD)
+                if box is None:
+                    continue
+                left, top, right, bottom = box
+                values = (block, par, line, left, top, right - left, bottom - top,
+                          word.Confidence(RIL.WORD), word.GetUTF8Text(RIL.WORD) or '')
+                for key, value in zip(DATA_KEYS, values):
+                    data[key].append(value)
+        return data
+
+    def close(self):
+        """Cerrar los motores abiertos"""
+        with self._lock:
+            pools, self._pools, self._created = self._pools, {}, {}
+        for pool in pools.values():
+            while not pool.empty():
+                pool.get().End()
+
+
+def get_ocr_backend(name=MOTOR_AUTOMATICO, lang=None):
+    """Crear el motor de OCR indicado
+
+    Con 'auto' se intenta tesserocr y, si no está instalado o no puede cargar
+    el idioma, se usa pytesseract. ImportError se propaga si no hay ninguno.
+    """
+    name = name or MOTOR_AUTOMATICO
+    if name not in MOTORES_OCR:
+        raise ValueError(f"Motor de OCR desconocido: {name}")
+
+    if name in (MOTOR_AUTOMATICO, MOTOR_TESSEROCR):
+        try:
+            return TesserocrBackend(lang)
+        except (ImportError, RuntimeError):
+            if name == MOTOR_TESSEROCR:
+                raise
+    return PytesseractBackend(lang)
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sesiones de Documentos PDF
+Para el Analizador OCR Universal
+
+Una sesión abre un PDF una sola vez (y solo si hace falta) y atiende la
+extracción de texto, el análisis de imágenes de cada página y el renderizado
+para OCR. Hay dos motores:
+
+- 'pypdf2': texto con PyPDF2 y renderizado con pdf2image/poppler, que vuelve
+  a leer el archivo en cada tramo de páginas (comportamiento original).
+- 'pdfium': pypdfium2 para todo; el documento se interpreta una vez y las
+  páginas se renderizan desde el documento ya cargado.
+"""
+
+import re
+
+# Motores disponibles
+MOTOR_PYPDF2 = 'pypdf2'
+MOTOR_PDFIUM = 'pdfium'
+MOTORES_PDF = (MOTOR_PYPDF2, MOTOR_PDFIUM)
+
+# Modos de color del renderizado para OCR (tesseract trabaja en escala de grises igual)
+RENDER_COLOR = 'color'
+RENDER_GRISES = 'grises'
+RENDER_BN = 'bn'
+MODOS_RENDER = (RENDER_COLOR, RENDER_GRISES, RENDER_BN)
+
+# Bytes por pixel de la imagen de una página en cada modo (Pillow guarda 1 byte por pixel en blanco y negro)
+BYTES_POR_PIXEL_RENDER = {RENDER_COLOR: 3, RENDER_GRISES: 1, RENDER_BN: 1}
+
+_NUMBER = rb'[-+]?(?:\d+\.?\d*|\.\d+)'
+_CM = re.compile(rb'(' + _NUMBER + rb')\s+(' + _NUMBER + rb')\s+(' + _NUMBER + rb')\s+(' + _NUMBER + rb')\s+'
+                 + _NUMBER + rb'\s+' + _NUMBER + rb'\s+cm\b')
+_DO = re.compile(rb'/([^\s/\[\]()<>{}%]+)\s+Do\b')
+# Comienzo de una imagen en línea: "BI" seguido de su diccionario (/W, /Width, ...)
+_INLINE_IMAGE = re.compile(rb'(?:^|\s)BI\s*/')
+
+
+def _page_content_bytes(page):
+    """Contenido (decodificado) de una página de PyPDF2"""
+    contents = page.get_contents()
+    if contents is None:
+        return b''
+    if isinstance(contents, list):
+        return b'\n'.join(item.get_object().get_data() for item in contents)
+    return contents.get_data()
+
+
+def pypdf2_image_coverage(page):
+    """Fracción del área de una página de PyPDF2 cubierta por imágenes (0 a 1)
+
+    Se buscan en el contenido las imágenes dibujadas con "Do" y se toma la
+    última matriz "cm" anterior como su tamaño en la página, que es como las
+    dibujan los escáneres y las herramientas de conversión. Si la página
+    dibuja formularios (Form XObjects, que pueden contener el escaneo) o
+    imágenes en línea (BI ... ID ... EI), la cobertura no se puede medir así y
+    se devuelve None, igual que si la página no se puede analizar: sin
+    cobertura conocida, una página sin texto pasa por el OCR.
+    """
+    try:
+        content = _page_content_bytes(page)
+        if _INLINE_IMAGE.search(content):
+            return None
+
+        resources = page.get('/Resources')
+        resources = resources.get_object() if resources is not None else {}
+        xobjects = resources.get('/XObject')
+        if xobjects is None:
+            return 0.0
+        xobjects = xobjects.get_object()
+
+        images = set()
+        for name, xobject in xobjects.items():
+            subtype = xobject.get_object().get('/Subtype')
+            if subtype == '/Form':
+                return None
+            if subtype == '/Image':
+                images.add(name.lstrip('/').encode('latin-1'))
+        if not images:
+            return 0.0
+
+        box = page.mediabox
+        page_area = abs(float(box.width) * float(box.height))
+        if page_area == 0:
+            return None
+
+        covered = 0.0
+        last_matrix = None
+        position = 0
+        while True:
+            cm = _CM.search(content, position)
+            do = _DO.search(content, position)
+            if do is None:
+                break
+            if cm is not None and cm.start() < do.start():
+                last_matrix = [float(value) for value in cm.groups()]
+                position = cm.end()
+                continue
+            if do.group(1) in images and last_matrix is not None:
+                a, b, c, d = last_matrix
+                covered += abs(a * d - b * c)
+            position = do.end()
+
+        return min(covered / page_area, 1.0)
+    except Exception:
+        return None
+
+
+def to_render_mode(image, mode):
+    """Convertir una imagen renderizada en escala de grises al modo pedido (blanco y negro con umbral fijo)"""
+    if mode != RENDER_BN or image.mode == '1':
+        return image
+    from PIL import Image
+    return image.convert('1', dither=Image.Dither.NONE)
+
+
+class DocumentSession:
+    """Base de las sesiones: se usan con "with" para cerrar el documento al terminar"""
+
+    name = None
+    # Sufijo de las claves de caché (el texto extraído depende del motor)
+    cache_suffix = ''
+    # Si render() escribe las páginas en archivos (necesita output_dir)
+    renders_to_files = False
+
+    def close(self):
+        """Cerrar el documento si se llegó a abrir"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class PyPDF2Session(DocumentSession):
+    """Documento leído con PyPDF2 y renderizado con pdf2image (poppler)"""
+
+    name = MOTOR_PYPDF2
+    renders_to_files = True
+
+    @staticmethod
+    def check_available():
+        """Importar las librerías del motor (ImportError si falta alguna)"""
+        import PyPDF2
+        from pdf2image import convert_from_path
+        return PyPDF2, convert_from_path
+
+    def __init__(self, file_path):
+        self.PyPDF2, self.convert_from_path = self.check_available()
+        self.file_path = file_path
+        self._file = None
+        self._reader = None
+
+    @property
+    def reader(self):
+        """PdfReader del documento (se abre en el primer uso)"""
+        if self._reader is None:
+            self._file = open(self.file_path, 'rb')
+            self._reader = self.PyPDF2.PdfReader(self._file)
+        return self._reader
+
+    @property
+    def page_count(self):
+        """Cantidad de páginas"""
+        return len(self.reader.pages)
+
+    def extract_text(self, page_num):
+        """Texto directo de una página"""
+        return self.reader.pages[page_num - 1].extract_text()
+
+    def image_coverage(self, page_num):
+        """Fracción de la página cubierta por imágenes (None si no se puede calcular)"""
+        return pypdf2_image_coverage(self.reader.pages[page_num - 1])
+
+    def page_size(self, page_num):
+        """Ancho y alto de una página en puntos"""
+        box = self.reader.pages[page_num - 1].mediabox
+        return float(box.width), float(box.height)
+
+    def render(self, first_page, last_page, dpi, mode=RENDER_COLOR, output_dir=None):
+        """Imágenes de un tramo de páginas (poppler vuelve a leer el archivo)
+
+        En escala de grises o blanco y negro poppler ya renderiza en grises
+        (pdftoppm -gray). Con output_dir las páginas se escriben en archivos y
+        se devuelven abiertas sin leer: cada una se carga al usarla (en grises,
+        mapeada en memoria) y tesseract la puede leer directamente del archivo.
+        """
+        grayscale = mode != RENDER_COLOR
+        if output_dir is None:
+            images = self.convert_from_path(self.file_path, first_page=first_page, last_page=last_page, dpi=dpi,
+                                            grayscale=grayscale)
+            return [to_render_mode(image, mode) for image in images]
+
+        from PIL import Image
+        paths = self.convert_from_path(self.file_path, first_page=first_page, last_page=last_page, dpi=dpi,
+                                       grayscale=grayscale, output_folder=output_dir, paths_only=True)
+        return (to_render_mode(Image.open(path), mode) for path in paths)
+
+    def close(self):
+        """Cerrar el archivo si se llegó a abrir"""
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._reader = None
+
+
+class PdfiumSession(DocumentSession):
+    """Documento cargado una sola vez con pypdfium2 para texto, imágenes y renderizado"""
+
+    name = MOTOR_PDFIUM
+    cache_suffix = '_pdfium'
+
+    @staticmethod
+    def check_available():
+        """Importar las librerías del motor (ImportError si falta alguna)"""
+        import pypdfium2
+        import pypdfium2.raw
+        return pypdfium2
+
+    def __init__(self, file_path):
+        self.pdfium = self.check_available()
+        self.image_object_type = self.pdfium.raw.FPDF_PAGEOBJ_IMAGE
+        self.file_path = file_path
+        self._document = None
+
+    @property
+    def document(self):
+        """PdfDocument de pdfium (se abre en el primer uso)"""
+        if self._document is None:
+            self._document = self.pdfium.PdfDocument(self.file_path)
+        return self._document
+
+    @property
+    def page_count(self):
+        """Cantidad de páginas"""
+        return len(self.document)
+
+    def extract_text(self, page_num):
+        """Texto directo de una página"""
+        page = self.document[page_num - 1]
+        try:
+            textpage = page.get_textpage()
+            try:
+                return textpage.get_text_range().replace('\r\n', '\n')
+            finally:
+                textpage.close()
+        finally:
+            page.close()
+
+    def image_coverage(self, page_num):
+        """Fracción de la página cubierta por imágenes (None si no se puede calcular)"""
+        page = self.document[page_num - 1]
+        try:
+            width, height = page.get_size()
+            if width * height == 0:
+                return None
+            covered = 0.0
+            for image in page.get_objects(filter=[self.image_object_type]):
+                # get_bounds() en pypdfium2 >= 4; get_pos() en versiones anteriores
+                bounds = image.get_bounds if hasattr(image, 'get_bounds') else image.get_pos
+                left, bottom, right, top = bounds()
+                covered += abs(right - left) * abs(top - bottom)
+            return min(covered / (width * height), 1.0)
+        except Exception:
+            return None
+        finally:
+            page.close()
+
+    def page_size(self, page_num):
+        """Ancho y alto de una página en puntos"""
+        page = self.document[page_num - 1]
+        try:
+            return page.get_size()
+        finally:
+            page.close()
+
+    def render(self, first_page, last_page, dpi, mode=RENDER_COLOR, output_dir=None):
+        """Imágenes de un tramo de páginas, desde el documento ya cargado
+
+        Cada página se renderiza recién al pedirla, así solo hay una en
+        memoria a la vez; pdfium renderiza en memoria y no usa output_dir.
+        """
+        for page_num in range(first_page, last_page + 1):
+            page = self.document[page_num - 1]
+            try:
+                image = page.render(scale=dpi / 72, grayscale=mode != RENDER_COLOR).to_pil()
+            finally:
+                page.close()
+            yield to_render_mode(image, mode)
+
+    def close(self):
+        """Cerrar el documento si se llegó a abrir"""
+        if self._document is not None:
+            self._document.close()
+        self._document = None
+
+
+SESIONES_PDF = {
+    MOTOR_PYPDF2: PyPDF2Session,
+    MOTOR_PDFIUM: PdfiumSession,
+}
+
+
+def get_session_class(backend=MOTOR_PYPDF2):
+    """Clase de sesión del motor indicado, verificando que sus librerías estén instaladas"""
+    backend = backend or MOTOR_PYPDF2
+    if backend not in SESIONES_PDF:
+        raise ValueError(f"Motor de PDF desconocido: {backend}")
+    session_class = SESIONES_PDF[backend]
+    session_class.check_available()
+    return session_class
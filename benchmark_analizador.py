@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark del Analizador OCR Universal
+Mide el rendimiento del análisis completo (extracción, OCR, búsqueda y
+reportes) sobre un corpus sintético generado sin conexión, para comparar el
+efecto de cada cambio.
+
+El corpus es reproducible (misma semilla, mismos documentos) e incluye PDFs con
+capa de texto, PDFs solo de imágenes con texto renderizado y documentos mixtos,
+con distintas cantidades de páginas. Cada escenario (tipo de documento, páginas
+por documento y cantidad de palabras clave) se ejecuta en un proceso nuevo para
+medir su pico de memoria; los resultados se guardan en JSON.
+
+Uso:
+    python benchmark_analizador.py
+    python benchmark_analizador.py --tipos texto --paginas 10,100 --palabras 10,1000 --procesos 4
+    python benchmark_analizador.py --comparar resultados_benchmark/benchmark_20250101_120000.json
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from backends_ocr import MOTOR_AUTOMATICO, MOTORES_OCR
+from backends_pdf import MOTOR_PYPDF2, MOTORES_PDF
+from presupuesto_memoria import peak_rss_mb
+from procesador_pdf import POLITICA_DPI_FIJA, POLITICAS_DPI
+
+# Tipos de documento del corpus sintético
+TIPO_TEXTO = 'texto'
+TIPO_IMAGEN = 'imagen'
+TIPO_MIXTO = 'mixto'
+TIPOS_DOCUMENTO = (TIPO_TEXTO, TIPO_IMAGEN, TIPO_MIXTO)
+
+# Vocabulario de los documentos (las primeras palabras clave se toman de aquí)
+VOCABULARIO = """
+    administración gobierno municipal público servicio ciudad desarrollo urbano infraestructura
+    educación escuela salud hospital alumbrado transporte presupuesto ordenanza concejo vecinos
+    obra pública barrio avenida plaza calle comisión informe expediente resolución decreto
+    legislatura memoria año período gestión recursos inversión programa proyecto población
+    la el de del en y a los las por para con se que un una su sus como fue son este esta
+""".split()
+
+# Resolución de las páginas renderizadas como imagen
+DPI_IMAGEN = 150
+# Tamaño A4 en puntos
+ANCHO_PAGINA, ALTO_PAGINA = 595, 842
+
+
+def random_pages(rng, page_count, lines_per_page=40, words_per_line=11):
+    """Líneas de texto aleatorias (del vocabulario) para cada página"""
+    return [[" ".join(rng.choice(VOCABULARIO) for _ in range(words_per_line)) for _ in range(lines_per_page)]
+            for _ in range(page_count)]
+
+
+def _pdf_string(line):
+    """Texto como cadena literal de PDF (WinAnsiEncoding)"""
+    escaped = line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    return b'(' + escaped.encode('cp1252', errors='replace') + b')'
+
+
+def text_pdf_bytes(pages):
+    """PDF con capa de texto (Helvetica) escrito directamente, sin librerías"""
+    objects = [b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    pages_id = 2 + 2 * len(pages)
+    page_ids = []
+    for lines in pages:
+        content = b"BT /F1 10 Tf 50 800 Td 18 TL " + b" ".join(_pdf_string(line) + b" '" for line in lines) + b" ET"
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        objects.append(b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Resources << /Font << /F1 1 0 R >> >> "
+                       b"/Contents %d 0 R >>" % (pages_id, ANCHO_PAGINA, ALTO_PAGINA, len(objects)))
+        page_ids.append(len(objects))
+    objects.append(b"<< /Type /Pages /Kids [%s] /Count %d >>"
+                   % (b" ".join(b"%d 0 R" % page_id for page_id in page_ids), len(page_ids)))
+    objects.append(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    output = io.BytesIO()
+    output.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(output.tell())
+        output.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = output.tell()
+    output.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    output.write(b"".join(b"%010d 00000 n \n" % offset for offset in offsets))
+    output.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                 % (len(objects) + 1, len(objects), xref))
+    return output.getvalue()
+
+
+def _load_font(size):
+    """Fuente TrueType para renderizar el texto (la de Pillow si no hay otra)"""
+    from PIL import ImageFont
+
+    for name in ('DejaVuSans.ttf', 'arial.ttf', 'Arial.ttf', 'LiberationSans-Regular.ttf'):
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+def image_pdf_bytes(lines, font):
+    """PDF de una página que es solo una imagen con el texto renderizado (como un escaneo)"""
+    from PIL import Image, ImageDraw
+
+    scale = DPI_IMAGEN / 72
+    image = Image.new('L', (int(ANCHO_PAGINA * scale), int(ALTO_PAGINA * scale)), 255)
+    draw = ImageDraw.Draw(image)
+    y = 42 * scale
+    for line in lines:
+        draw.text((50 * scale, y), line, fill=0, font=font)
+        y += 18 * scale
+    output = io.BytesIO()
+    image.save(output, 'PDF', resolution=DPI_IMAGEN)
+    return output.getvalue()
+
+
+def write_document(path, kind, pages, font):
+    """Escribir un documento del tipo indicado; el mixto alterna páginas de texto e imagen"""
+    if kind == TIPO_TEXTO:
+        with open(path, 'wb') as f:
+            f.write(text_pdf_bytes(pages))
+        return
+
+    # Las páginas se generan de a una y se unen con PyPDF2, sin tener todas las imágenes en memoria
+    import PyPDF2
+
+    writer = PyPDF2.PdfWriter()
+    for page_num, lines in enumerate(pages):
+        if kind == TIPO_IMAGEN or page_num % 2 == 1:
+            data = image_pdf_bytes(lines, font)
+        else:
+            data = text_pdf_bytes([lines])
+        writer.add_page(PyPDF2.PdfReader(io.BytesIO(data)).pages[0])
+    with open(path, 'wb') as f:
+        writer.write(f)
+
+
+def generate_corpus(corpus_dir, kinds, page_counts, documents, seed, log=print):
+    """Generar (o reutilizar) los documentos de cada tipo y cantidad de páginas
+
+    Devuelve {(tipo, páginas): [rutas]}. Los documentos ya generados con la
+    misma semilla se reutilizan.
+    """
+    font = None
+    corpus = {}
+    for kind in kinds:
+        for page_count in page_counts:
+            folder = os.path.join(corpus_dir, f"{kind}_{page_count}p_s{seed}")
+            os.makedirs(folder, exist_ok=True)
+            paths = []
+            for number in range(documents):
+                path = os.path.join(folder, f"{kind}_{page_count}p_{number + 1:03d}.pdf")
+                if not os.path.exists(path):
+                    if font is None and kind != TIPO_TEXTO:
+                        font = _load_font(int(10 * DPI_IMAGEN / 72))
+                    rng = random.Random(f"{seed}-{kind}-{page_count}-{number}")
+                    write_document(path + '.tmp', kind, random_pages(rng, page_count), font)
+                    os.replace(path + '.tmp', path)
+                paths.append(path)
+            corpus[(kind, page_count)] = paths
+            log(f"📚 Corpus {kind}, {page_count} páginas: {len(paths)} documentos")
+    return corpus
+
+
+def keyword_list(count, seed):
+    """Palabras clave: la mitad del vocabulario de los documentos y el resto inventadas"""
+    rng = random.Random(f"{seed}-palabras-{count}")
+    content_words = sorted({word for word in VOCABULARIO if len(word) > 3})
+    rng.shuffle(content_words)
+    real = content_words[:max(1, count // 2)]
+    invented = [f"termino{number:05d}" for number in range(count - len(real))]
+    return (real + invented)[:count]
+
+
+def run_scenario(scenario):
+    """Ejecutar un escenario en este proceso y devolver sus mediciones"""
+    from motor_analisis import AnalysisEngine
+
+    keywords = keyword_list(scenario['keywords'], scenario['seed'])
+    output_dir = tempfile.mkdtemp(prefix='benchmark_ocr_')
+    try:
+        engine = AnalysisEngine(
+            'benchmark',
+            keywords,
+            output_dir,
+            workers=scenario['workers'],
+            use_cache=False,
+            use_index=scenario['index'],
+            dpi_policy=scenario['dpi_policy'],
+            ocr_backend=scenario['ocr_backend'],
+            pdf_backend=scenario['pdf_backend'],
+            log=lambda message: None
+        )
+        started = time.perf_counter()
+        summary = engine.run(scenario['files'])
+        wall = time.perf_counter() - started
+
+        with open(summary['profile_path'], 'r', encoding='utf-8') as f:
+            profile = json.load(f)
+        return {
+            'wall_s': round(wall, 3),
+            'pages': profile['pages'],
+            'pages_per_s': round(profile['pages'] / wall, 2) if wall > 0 else None,
+            'bytes': profile['bytes'],
+            'matches': summary['total_matches'],
+            'files_with_errors': summary['files_with_errors'],
+            'page_decisions': summary['page_decisions'],
+            'peak_rss_mb': peak_rss_mb(include_children=True),
+            'stages': profile['stages']
+        }
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+def run_scenario_subprocess(scenario):
+    """Ejecutar un escenario en un proceso nuevo (para medir su propio pico de memoria)"""
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--escenario', json.dumps(scenario)],
+        capture_output=True, text=True, encoding='utf-8'
+    )
+    if completed.returncode != 0:
+        error = (completed.stderr.strip().splitlines() or ['error desconocido'])[-1]
+        return {'error': error}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def ocr_available(ocr_backend):
+    """Indicar si se puede hacer OCR (motor instalado y tesseract disponible)"""
+    try:
+        from backends_ocr import get_ocr_backend
+
+        backend = get_ocr_backend(ocr_backend, 'spa')
+        if backend.name == 'pytesseract':
+            backend.pytesseract.get_tesseract_version()
+        backend.close()
+        return True
+    except Exception:
+        return False
+
+
+def environment_info():
+    """Datos del equipo y de las versiones usadas, para interpretar los resultados"""
+    try:
+        from importlib import metadata
+    except ImportError:
+        metadata = None
+
+    versions = {}
+    for package in ('PyPDF2', 'pdf2image', 'pytesseract', 'tesserocr', 'pypdfium2', 'Pillow', 'openpyxl'):
+        try:
+            versions[package] = metadata.version(package) if metadata else None
+        except Exception:
+            versions[package] = None
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'commit': commit,
+        'packages': versions
+    }
+
+
+def compare_results(previous, current, log=print):
+    """Mostrar páginas por segundo y memoria de cada escenario frente a una ejecución anterior"""
+    before = {scenario['name']: scenario for scenario in previous.get('scenarios', [])}
+    log("")
+    log(f"📈 Comparación con {previous.get('timestamp', 'ejecución anterior')}:")
+    for scenario in current['scenarios']:
+        old = before.get(scenario['name'])
+        if old is None or old.get('error') or scenario.get('error'):
+            log(f"   {scenario['name']}: sin datos para comparar")
+            continue
+        change = (scenario['pages_per_s'] - old['pages_per_s']) / old['pages_per_s'] * 100 if old['pages_per_s'] else 0
+        memory = ""
+        if old.get('peak_rss_mb') and scenario.get('peak_rss_mb'):
+            memory = f", memoria {old['peak_rss_mb']} → {scenario['peak_rss_mb']} MB"
+        log(f"   {scenario['name']}: {old['pages_per_s']} → {scenario['pages_per_s']} páginas/s "
+            f"({change:+.1f}%){memory}")
+
+
+def parse_list(value, cast=str):
+    """Lista separada por comas"""
+    return [cast(item.strip()) for item in value.split(',') if item.strip()]
+
+
+def build_parser():
+    """Definir los argumentos de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Benchmark del Analizador OCR Universal con un corpus sintético")
+    parser.add_argument('--salida', default=os.path.join(os.getcwd(), 'resultados_benchmark'),
+                        help="Carpeta de resultados (por defecto: ./resultados_benchmark)")
+    parser.add_argument('--corpus', help="Carpeta del corpus sintético (por defecto: <salida>/corpus)")
+    parser.add_argument('--tipos', default=','.join(TIPOS_DOCUMENTO),
+                        help="Tipos de documento: texto, imagen, mixto (separados por comas)")
+    parser.add_argument('--paginas', default='5,20', help="Páginas por documento (p. ej. 1,10,100)")
+    parser.add_argument('--documentos', type=int, default=3, help="Documentos por escenario")
+    parser.add_argument('--palabras', default='10,200', help="Cantidades de palabras clave (p. ej. 10,1000)")
+    parser.add_argument('--procesos', type=int, default=1, help="Procesos en paralelo del análisis")
+    parser.add_argument('--repeticiones', type=int, default=1,
+                        help="Ejecuciones de cada escenario; se conserva la más rápida (reduce el ruido)")
+    parser.add_argument('--semilla', type=int, default=1234, help="Semilla del corpus y de las palabras clave")
+    parser.add_argument('--resolucion-ocr', choices=POLITICAS_DPI, default=POLITICA_DPI_FIJA)
+    parser.add_argument('--motor-ocr', choices=MOTORES_OCR, default=MOTOR_AUTOMATICO)
+    parser.add_argument('--motor-pdf', choices=MOTORES_PDF, default=MOTOR_PYPDF2)
+    parser.add_argument('--con-indice', action='store_true', help="Incluir la indexación en la medición")
+    parser.add_argument('--comparar', help="JSON de una ejecución anterior para comparar los resultados")
+    parser.add_argument('--escenario', help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    """Función principal; devuelve el código de salida"""
+    args = build_parser().parse_args(argv)
+
+    # Proceso hijo: un solo escenario, resultado en JSON por la salida estándar
+    if args.escenario:
+        print(json.dumps(run_scenario(json.loads(args.escenario))))
+        return 0
+
+    kinds = parse_list(args.tipos)
+    unknown = [kind for kind in kinds if kind not in TIPOS_DOCUMENTO]
+    if unknown:
+        print(f"❌ Tipos de documento desconocidos: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+    if any(kind != TIPO_TEXTO for kind in kinds) and not ocr_available(args.motor_ocr):
+        print("⚠️ OCR no disponible: se omiten los documentos con imágenes")
+        kinds = [kind for kind in kinds if kind == TIPO_TEXTO]
+        if not kinds:
+            return 2
+
+    page_counts = parse_list(args.paginas, int)
+    keyword_counts = parse_list(args.palabras, int)
+    corpus_dir = args.corpus or os.path.join(args.salida, 'corpus')
+    corpus = generate_corpus(corpus_dir, kinds, page_counts, args.documentos, args.semilla)
+
+    results = {
+        'timestamp': datetime.now().strftime('%Y%m%d_%H%M%S'),
+        'environment': environment_info(),
+        'parameters': {
+            'documents': args.documentos,
+            'workers': args.procesos,
+            'seed': args.semilla,
+            'dpi_policy': args.resolucion_ocr,
+            'ocr_backend': args.motor_ocr,
+            'pdf_backend': args.motor_pdf,
+            'index': args.con_indice,
+            'repetitions': args.repeticiones
+        },
+        'scenarios': []
+    }
+
+    for kind in kinds:
+        for page_count in page_counts:
+            for keyword_count in keyword_counts:
+                name = f"{kind}-{page_count}p-{keyword_count}kw"
+                scenario = {
+                    'files': corpus[(kind, page_count)],
+                    'keywords': keyword_count,
+                    'seed': args.semilla,
+                    'workers': args.procesos,
+                    'index': args.con_indice,
+                    'dpi_policy': args.resolucion_ocr,
+                    'ocr_backend': args.motor_ocr,
+                    'pdf_backend': args.motor_pdf
+                }
+                print(f"⏱️ {name}...", flush=True)
+                runs = [run_scenario_subprocess(scenario) for _ in range(max(1, args.repeticiones))]
+                measured = [run for run in runs if 'error' not in run]
+                measurement = min(measured, key=lambda run: run['wall_s']) if measured else runs[0]
+                if len(measured) > 1:
+                    measurement['wall_s_runs'] = [run['wall_s'] for run in measured]
+                results['scenarios'].append(dict(
+                    {'name': name, 'kind': kind, 'pages_per_document': page_count, 'keywords': keyword_count},
+                    **measurement
+                ))
+                if 'error' in measurement:
+                    print(f"   ❌ {measurement['error']}")
+                else:
+                    print(f"   {measurement['pages']} páginas en {measurement['wall_s']} s: "
+                          f"{measurement['pages_per_s']} páginas/s, memoria máxima {measurement['peak_rss_mb']} MB")
+
+    os.makedirs(args.salida, exist_ok=True)
+    results_path = os.path.join(args.salida, f"benchmark_{results['timestamp']}.json")
+    with open(results_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=1)
+    print(f"💾 Resultados: {results_path}")
+
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            compare_results(json.load(f), results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
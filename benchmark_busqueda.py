@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de Búsqueda de Palabras Clave
+Compara el bucle original (una expresión regular por palabra clave) con el
+buscador de una sola pasada de motor_busqueda, variando la cantidad de palabras.
+
+Uso:
+    python benchmark_busqueda.py [--paginas N] [--repeticiones N]
+"""
+
+import argparse
+import random
+import re
+import time
+
+from motor_busqueda import KeywordMatcher
+
+VOCABULARIO_BASE = [
+    "administración", "gobierno", "municipal", "público", "servicio",
+    "ciudad", "urbano", "infraestructura", "desarrollo", "gestión",
+    "alumbrado", "pavimento", "hospital", "escuela", "comercio",
+    "industria", "trabajo", "ordenanza", "resolución", "presupuesto",
+]
+
+
+def generar_vocabulario(cantidad, rng):
+    """Generar palabras clave sintéticas a partir del vocabulario base"""
+    palabras = list(VOCABULARIO_BASE)
+    while len(palabras) < cantidad:
+        base = rng.choice(VOCABULARIO_BASE)
+        palabras.append(f"{base}{rng.choice('aeiourst')}{len(palabras)}")
+    return palabras[:cantidad]
+
+
+def generar_pagina(rng, palabras=450):
+    """Generar una página de texto con palabras del vocabulario base intercaladas"""
+    relleno = ["de", "la", "el", "en", "los", "para", "con", "por", "las", "del", "que", "se"]
+    tokens = [rng.choice(VOCABULARIO_BASE) if rng.random() < 0.05 else rng.choice(relleno)
+              for _ in range(palabras)]
+    lineas = [' '.join(tokens[i:i + 12]) for i in range(0, len(tokens), 12)]
+    return '\n'.join(lineas)
+
+
+def buscar_por_palabra(texto, palabras_clave, case_sensitive=False, whole_words=True):
+    """Implementación original: una expresión regular compilada por palabra clave"""
+    flags = 0 if case_sensitive else re.IGNORECASE
+    resultado = []
+    for indice, palabra in enumerate(palabras_clave):
+        if whole_words:
+            patron = r'\b' + re.escape(palabra) + r'\b'
+        else:
+            patron = re.escape(palabra)
+        for match in re.finditer(patron, texto, flags):
+            resultado.append((indice, match.start(), match.end()))
+    return resultado
+
+
+def medir(funcion, paginas, repeticiones):
+    """Devolver el mejor tiempo (en segundos) de procesar todas las páginas"""
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for pagina in paginas:
+            funcion(pagina)
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de búsqueda de palabras clave")
+    parser.add_argument('--paginas', type=int, default=50, help="Páginas sintéticas por medición")
+    parser.add_argument('--repeticiones', type=int, default=3, help="Repeticiones por medición")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    paginas = [generar_pagina(rng) for _ in range(args.paginas)]
+
+    print("=" * 70)
+    print("BENCHMARK DE BÚSQUEDA DE PALABRAS CLAVE")
+    print(f"Páginas: {args.paginas} | Caracteres por página: ~{len(paginas[0])}")
+    print("=" * 70)
+    print(f"{'Palabras':>9} | {'Regex por palabra':>18} | {'Una pasada':>12} | {'Mejora':>7}")
+    print("-" * 70)
+
+    for cantidad in (10, 50, 100, 300, 800):
+        palabras_clave = generar_vocabulario(cantidad, rng)
+        matcher = KeywordMatcher(palabras_clave)
+
+        # Verificar que ambos métodos encuentran exactamente lo mismo
+        for pagina in paginas[:5]:
+            if buscar_por_palabra(pagina, palabras_clave) != matcher.find_matches(pagina):
+                raise SystemExit(f"❌ Resultados distintos con {cantidad} palabras clave")
+
+        t_regex = medir(lambda p: buscar_por_palabra(p, palabras_clave), paginas, args.repeticiones)
+        t_matcher = medir(matcher.find_matches, paginas, args.repeticiones)
+        ms_regex = t_regex * 1000 / len(paginas)
+        ms_matcher = t_matcher * 1000 / len(paginas)
+        print(f"{cantidad:>9} | {ms_regex:>14.2f} ms | {ms_matcher:>9.2f} ms | {t_regex / t_matcher:>6.1f}x")
+
+    print("-" * 70)
+    print("Tiempos por página (mejor de las repeticiones).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Búsqueda Aproximada de Palabras Clave
+Para el Analizador OCR Universal
+
+El texto de OCR de documentos escaneados trae sustituciones de caracteres
+("rn" leído como "m", "l" como "1", tildes perdidas) que la búsqueda exacta
+no encuentra. Este módulo busca, además, las palabras de la página que están
+a una distancia de edición (Levenshtein) acotada de las palabras clave.
+
+El presupuesto de errores depende del largo de cada palabra clave (las
+palabras cortas no admiten errores) y nunca supera el máximo configurado.
+Para no comparar cada palabra de la página con cada palabra clave, las
+palabras clave se indexan por sus variantes con hasta N letras borradas
+(como SymSpell): dos palabras a distancia N o menos comparten alguna de esas
+variantes, así que solo se calcula la distancia de los pocos candidatos que
+comparten una. El resultado de cada palabra distinta se recuerda entre páginas.
+"""
+
+import re
+
+from motor_busqueda import MODO_EXACTO, MODO_RAIZ, fold_accents, fold_case, spanish_stem
+
+_TOKEN = re.compile(r'\w+')
+
+# (largo mínimo de la palabra, errores admitidos), de mayor a menor
+ERRORES_POR_LONGITUD = ((8, 2), (5, 1))
+
+# Palabras distintas de las páginas cuyo resultado se recuerda
+MAX_PALABRAS_RECORDADAS = 200000
+
+
+def edit_budget(word, max_edits):
+    """Errores admitidos para una palabra clave según su largo"""
+    for min_length, edits in ERRORES_POR_LONGITUD:
+        if len(word) >= min_length:
+            return min(edits, max_edits)
+    return 0
+
+
+def levenshtein(a, b, limit):
+    """Distancia de edición entre a y b, o limit + 1 si es mayor que limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        row_min = i
+        for j, char_b in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            current.append(cost)
+            if cost < row_min:
+                row_min = cost
+        if row_min > limit:
+            return limit + 1
+        previous = current
+    return previous[-1] if previous[-1] <= limit else limit + 1
+
+
+def deletions(word, depth):
+    """La palabra y todas sus variantes con hasta depth letras borradas"""
+    variants = {word}
+    frontier = {word}
+    for _ in range(depth):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        variants |= frontier
+    return variants
+
+
+class FuzzyMatcher:
+    """Buscador de palabras clave con errores de OCR, por palabras completas
+
+    Usa la misma normalización que KeywordMatcher (mayúsculas, tildes o raíz
+    según el modo). Solo devuelve las coincidencias con al menos un error: las
+    exactas las encuentra KeywordMatcher.
+    """
+
+    def __init__(self, keywords, case_sensitive=False, match_mode=MODO_EXACTO, max_edits=1):
+        self.keywords = list(keywords)
+        self.case_sensitive = case_sensitive
+        self.match_mode = match_mode or MODO_EXACTO
+        self.max_edits = max_edits
+
+        # Palabras clave admitidas (palabras separadas por espacios, frases incluidas),
+        # agrupadas por su primera palabra normalizada
+        self._phrases = {}
+        # Palabra normalizada -> errores admitidos
+        self._budgets = {}
+        for index, keyword in enumerate(self.keywords):
+            parts = keyword.split()
+            if not parts or not all(_TOKEN.fullmatch(part) for part in parts):
+                continue
+            words = tuple(self._normalize(part) for part in parts)
+            budgets = [edit_budget(word, max_edits) for word in words]
+            if not any(budgets):
+                continue
+            for word, budget in zip(words, budgets):
+                self._budgets[word] = max(budget, self._budgets.get(word, 0))
+            self._phrases.setdefault(words[0], []).append((index, words))
+
+        # Índice de variantes con letras borradas -> palabras clave normalizadas
+        self._variants = {}
+        for word, budget in self._budgets.items():
+            for variant in deletions(word, budget):
+                self._variants.setdefault(variant, set()).add(word)
+
+        self._depth = max(self._budgets.values(), default=0)
+        lengths = [len(word) for word in self._budgets]
+        self._min_length = min(lengths, default=0) - self._depth
+        self._max_length = max(lengths, default=0) + self._depth
+        # Palabra de la página (sin normalizar) -> {palabra clave normalizada: distancia}
+        self._memo = {}
+
+    def _normalize(self, word):
+        """Normalizar una palabra según el modo de coincidencia"""
+        if self.match_mode == MODO_RAIZ:
+            return spanish_stem(word)
+        if self.match_mode != MODO_EXACTO:
+            return fold_accents(word)
+        return word if self.case_sensitive else fold_case(word)
+
+    def _similar(self, raw_token):
+        """Palabras clave normalizadas a distancia admitida de una palabra de la página"""
+        found = self._memo.get(raw_token)
+        if found is not None:
+            return found
+
+        token = self._normalize(raw_token)
+        found = {}
+        if self._min_length <= len(token) <= self._max_length:
+            candidates = set()
+            for variant in deletions(token, self._depth):
+                candidates |= self._variants.get(variant, set())
+            for word in candidates:
+                budget = self._budgets[word]
+                distance = levenshtein(token, word, budget)
+                if distance <= budget:
+                    found[word] = distance
+
+        if len(self._memo) >= MAX_PALABRAS_RECORDADAS:
+            self._memo.clear()
+        self._memo[raw_token] = found
+        return found
+
+    def find_matches(self, text, exact=()):
+        """Devolver (índice de palabra clave, inicio, fin, distancia) con distancia > 0
+
+        Las coincidencias que se solapan con una coincidencia exacta de la
+        misma palabra clave (exact: tuplas de KeywordMatcher) se descartan.
+        Las palabras de una frase pueden estar separadas por cualquier espacio.
+        """
+        if not self._phrases:
+            return []
+
+        tokens = [(m.start(), m.end(), self._similar(m.group())) for m in _TOKEN.finditer(text)]
+        blocked = {}
+        for keyword_index, start, end in exact:
+            blocked.setdefault(keyword_index, []).append((start, end))
+
+        found = []
+        last_end = {}
+        for position, (start, _, similar) in enumerate(tokens):
+            for first_word in similar:
+                for keyword_index, words in self._phrases.get(first_word, ()):
+                    if start < last_end.get(keyword_index, 0) or position + len(words) > len(tokens):
+                        continue
+                    distance = 0
+                    end = None
+                    for offset, word in enumerate(words):
+                        token_start, token_end, token_similar = tokens[position + offset]
+                        if end is not None and not text[end:token_start].isspace():
+                            break
+                        token_distance = token_similar.get(word)
+                        if token_distance is None:
+                            break
+                        distance += token_distance
+                        end = token_end
+                    else:
+                        if distance and not any(s < end and start < e for s, e in blocked.get(keyword_index, ())):
+                            found.append((keyword_index, start, end, distance))
+                            last_end[keyword_index] = end
+
+        found.sort()
+        return found
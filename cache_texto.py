@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Caché Persistente de Texto Extraído
+Para el Analizador OCR Universal
+
+Guarda en SQLite el texto de cada página (directo u OCR) indexado por el hash
+del contenido del PDF, de modo que un nuevo análisis con otras palabras clave
+no vuelva a extraer ni a pasar OCR por documentos ya procesados. También
+guarda la clasificación de cada página (texto directo, OCR o ambos).
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+# Tamaño máximo por defecto de la caché antes de descartar entradas antiguas
+CACHE_MAX_MB = 2048
+
+
+def file_content_hash(file_path):
+    """Calcular el hash SHA-256 del contenido de un archivo"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TextCache:
+    """Caché de texto por página con expulsión LRU según tamaño total
+
+    Clave: (hash del PDF, página, método, DPI, idioma). Para el texto extraído
+    directamente se usa DPI 0 e idioma vacío. Cada proceso abre su propia
+    conexión; SQLite en modo WAL permite lecturas y escrituras concurrentes.
+    """
+
+    def __init__(self, cache_dir, max_mb=CACHE_MAX_MB):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, 'texto_paginas.sqlite3')
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._touched = []
+
+        self.conn = sqlite3.connect(self.path, timeout=60)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                file_hash TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                method TEXT NOT NULL,
+                dpi INTEGER NOT NULL,
+                lang TEXT NOT NULL,
+                text TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (file_hash, page, method, dpi, lang)
+            );
+            CREATE INDEX IF NOT EXISTS pages_last_access ON pages (last_access);
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                file_hash TEXT NOT NULL,
+                page_count INTEGER,
+                PRIMARY KEY (path, size, mtime)
+            );
+            CREATE TABLE IF NOT EXISTS decisions (
+                file_hash TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                classifier TEXT NOT NULL,
+                record TEXT NOT NULL,
+                PRIMARY KEY (file_hash, page, classifier)
+            );
+        """)
+        self.conn.commit()
+
+    def file_hash(self, file_path):
+        """Hash del contenido de un PDF, reutilizando el calculado si no cambió"""
+        stat = os.stat(file_path)
+        key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime)
+        row = self.conn.execute(
+            'SELECT file_hash FROM files WHERE path = ? AND size = ? AND mtime = ?', key
+        ).fetchone()
+        if row:
+            return row[0]
+
+        content_hash = file_content_hash(file_path)
+        self.conn.execute(
+            'INSERT OR REPLACE INTO files (path, size, mtime, file_hash) VALUES (?, ?, ?, ?)',
+            key + (content_hash,)
+        )
+        self.conn.commit()
+        return content_hash
+
+    def get_page_count(self, file_hash):
+        """Cantidad de páginas registrada para un PDF (None si no se conoce)"""
+        row = self.conn.execute(
+            'SELECT page_count FROM files WHERE file_hash = ? AND page_count IS NOT NULL', (file_hash,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_page_count(self, file_hash, page_count):
+        """Registrar la cantidad de páginas de un PDF"""
+        self.conn.execute('UPDATE files SET page_count = ? WHERE file_hash = ?', (page_count, file_hash))
+
+    def get(self, file_hash, page, method, dpi=0, lang=''):
+        """Devolver el texto guardado para una página o None si no está en caché"""
+        key = (file_hash, page, method, dpi, lang)
+        row = self.conn.execute(
+            'SELECT text FROM pages WHERE file_hash = ? AND page = ? AND method = ? AND dpi = ? AND lang = ?',
+            key
+        ).fetchone()
+        if row is None:
+            return None
+        self._touched.append(key)
+        return row[0]
+
+    def put(self, file_hash, page, method, text, dpi=0, lang=''):
+        """Guardar el texto de una página (se confirma con commit())"""
+        self.conn.execute(
+            'INSERT OR REPLACE INTO pages (file_hash, page, method, dpi, lang, text, size, last_access) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (file_hash, page, method, dpi, lang, text, len(text.encode('utf-8')), time.time())
+        )
+
+    def get_decision(self, file_hash, page, classifier):
+        """Devolver la clasificación guardada de una página (dict) o None"""
+        row = self.conn.execute(
+            'SELECT record FROM decisions WHERE file_hash = ? AND page = ? AND classifier = ?',
+            (file_hash, page, classifier)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_decision(self, file_hash, page, classifier, record):
+        """Guardar la clasificación de una página (se confirma con commit())"""
+        self.conn.execute(
+            'INSERT OR REPLACE INTO decisions (file_hash, page, classifier, record) VALUES (?, ?, ?, ?)',
+            (file_hash, page, classifier, json.dumps(record, ensure_ascii=False))
+        )
+
+    def commit(self):
+        """Confirmar escrituras pendientes y registrar los accesos recientes"""
+        if self._touched:
+            now = time.time()
+            self.conn.executemany(
+                'UPDATE pages SET last_access = ? '
+                'WHERE file_hash = ? AND page = ? AND method = ? AND dpi = ? AND lang = ?',
+                [(now,) + key for key in self._touched]
+            )
+            self._touched = []
+        self.conn.commit()
+
+    def evict(self):
+        """Descartar las entradas menos usadas hasta quedar bajo el tamaño máximo
+
+        Devuelve la cantidad de páginas descartadas.
+        """
+        self.commit()
+        total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM pages').fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+
+        removed = 0
+        rows = self.conn.execute(
+            'SELECT rowid, size FROM pages ORDER BY last_access'
+        ).fetchall()
+        to_delete = []
+        for rowid, size in rows:
+            if total <= self.max_bytes:
+                break
+            to_delete.append((rowid,))
+            total -= size
+            removed += 1
+
+        self.conn.executemany('DELETE FROM pages WHERE rowid = ?', to_delete)
+        self.conn.commit()
+        return removed
+
+    def close(self):
+        """Confirmar cambios y cerrar la conexión"""
+        self.commit()
+        self.conn.close()
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Carpeta Vigilada (ingreso continuo de documentos)
+Para el Analizador OCR Universal
+
+Vigila una o más carpetas y analiza cada PDF nuevo o modificado apenas
+termina de copiarse, con el mismo procesamiento que un análisis normal. Cada
+archivo se registra en el manifiesto del proyecto y en el índice invertido
+(se puede buscar con --buscar-indice segundos después de llegar) y se agrega
+al reporte del día, que se cierra y se reemplaza al cambiar la fecha.
+
+Los cambios se detectan con eventos del sistema de archivos (inotify, a
+través de watchdog) si está instalado, y si no revisando las carpetas cada
+pocos segundos. Un archivo se considera completo cuando su tamaño y su fecha
+no cambian durante unos segundos y termina con la marca %%EOF de los PDF.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date
+
+from manifiesto import AnalysisManifest, keywords_hash, options_hash
+from procesador_pdf import AnalysisCancelled, analyze_files, create_worker_pool, finish_file_result, new_file_result
+
+# Segundos entre revisiones de las carpetas (y de los archivos que se están copiando)
+INTERVALO_SONDEO = 2.0
+
+# Con eventos del sistema de archivos igual se revisan las carpetas cada tanto
+# (las carpetas de red no siempre avisan los cambios)
+INTERVALO_SONDEO_CON_EVENTOS = 30.0
+
+# Segundos sin cambios de tamaño ni fecha para considerar que un archivo terminó de copiarse
+ESPERA_ESTABLE = 3.0
+
+# Un PDF estable sin la marca %%EOF se analiza igual pasado este tiempo (y se reporta su error)
+ESPERA_MAXIMA_SIN_EOF = 120.0
+
+# Archivos por lote de análisis (el reporte y el manifiesto se actualizan al terminar cada archivo)
+MAX_ARCHIVOS_POR_LOTE = 50
+
+# Lotes interrumpidos por la caída de un proceso del pool tras los que un archivo se da por fallido
+MAX_CAIDAS_POR_ARCHIVO = 3
+
+
+def scan_folders(folders, recursive=False):
+    """Devolver {ruta absoluta: (tamaño, fecha de modificación)} de los PDFs de las carpetas"""
+    found = {}
+    for folder in folders:
+        for root, dirs, names in os.walk(folder):
+            if not recursive:
+                dirs[:] = []
+            for name in names:
+                if not name.lower().endswith('.pdf'):
+                    continue
+                path = os.path.abspath(os.path.join(root, name))
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    # Se borró o se movió mientras se revisaba la carpeta
+                    continue
+                found[path] = (stat.st_size, stat.st_mtime)
+    return found
+
+
+def has_pdf_trailer(file_path):
+    """Indica si el archivo termina con la marca %%EOF (el PDF terminó de escribirse)"""
+    try:
+        with open(file_path, 'rb') as file:
+            file.seek(0, os.SEEK_END)
+            file.seek(max(0, file.tell() - 2048))
+            return b'%%EOF' in file.read()
+    except OSError:
+        return False
+
+
+class FolderEvents:
+    """Aviso de cambios en las carpetas: inotify (watchdog) o revisión periódica"""
+
+    def __init__(self, folders, recursive=False):
+        self.changed = threading.Event()
+        self.observer = None
+        self.name = 'revisión periódica'
+
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            return
+
+        handler = FileSystemEventHandler()
+        handler.on_any_event = lambda event: self.changed.set()
+        observer = Observer()
+        try:
+            for folder in folders:
+                observer.schedule(handler, folder, recursive=recursive)
+            observer.start()
+        except Exception:
+            # Sin permisos o sin soporte de eventos en la carpeta: se revisa periódicamente
+            return
+        self.observer = observer
+        self.name = 'eventos del sistema de archivos'
+
+    @property
+    def idle_interval(self):
+        """Segundos de espera cuando no hay archivos copiándose"""
+        return INTERVALO_SONDEO_CON_EVENTOS if self.observer is not None else INTERVALO_SONDEO
+
+    def wait(self, timeout, stop_event):
+        """Esperar un cambio en las carpetas, hasta timeout segundos o hasta que se pida detener"""
+        deadline = time.monotonic() + timeout
+        while not stop_event.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self.changed.wait(min(remaining, 1.0)):
+                break
+        self.changed.clear()
+
+    def close(self):
+        """Detener la vigilancia de eventos"""
+        if self.observer is not None:
+            self.observer.stop()
+            self.observer.join()
+
+
+class HotFolderService:
+    """Análisis continuo de los PDFs que llegan a una o más carpetas
+
+    Usa la configuración de un AnalysisEngine (palabras clave, opciones,
+    procesos, carpeta de resultados) y se detiene con engine.cancel(). Con
+    más de un proceso, el pool (y el motor OCR de cada proceso) se crea con
+    el primer lote y se reutiliza en todos los siguientes.
+    """
+
+    def __init__(self, engine, folders, recursive=False, settle_seconds=ESPERA_ESTABLE):
+        self.engine = engine
+        self.folders = [os.path.abspath(folder) for folder in folders]
+        self.recursive = recursive
+        self.settle_seconds = settle_seconds
+        self.log_message = engine.log_message
+        # Archivos ya resueltos (analizados o vigentes en el manifiesto), con su estado
+        self.handled = {}
+        # Archivos que se están copiando: ruta -> (estado, momento en que se vio ese estado)
+        self.waiting = {}
+        self.report = None
+        self.report_day = None
+        self.files_analyzed = 0
+        # Pool de procesos compartido por todos los lotes (None: todavía no se creó)
+        self.executor = None
+        # Lotes interrumpidos por la caída de un proceso, por archivo sin terminar
+        self.crashes = {}
+
+    def ready_files(self):
+        """Archivos nuevos o modificados que terminaron de copiarse, con su estado"""
+        now = time.monotonic()
+        wall_now = time.time()
+        current = scan_folders(self.folders, self.recursive)
+        ready = []
+        for path, state in sorted(current.items()):
+            if self.handled.get(path) == state:
+                continue
+            previous = self.waiting.get(path)
+            if previous is None or previous[0] != state:
+                # Los archivos que ya estaban quietos antes de verlos no esperan
+                since = now - max(0.0, wall_now - state[1])
+                self.waiting[path] = previous = (state, since)
+            stable_for = now - previous[1]
+            if stable_for < self.settle_seconds:
+                continue
+            if not has_pdf_trailer(path) and stable_for < ESPERA_MAXIMA_SIN_EOF:
+                continue
+            del self.waiting[path]
+            ready.append((path, state))
+
+        # Olvidar los archivos que ya no están en las carpetas
+        for path in list(self.handled):
+            if path not in current:
+                del self.handled[path]
+        for path in list(self.waiting):
+            if path not in current:
+                del self.waiting[path]
+        return ready
+
+    def current_report(self):
+        """Reporte del día (al cambiar la fecha se cierra el anterior y se abre uno nuevo)"""
+        today = date.today()
+        if self.report is not None and self.report_day != today:
+            self.close_report()
+        if self.report is None:
+            self.report = self.engine.new_report()
+            self.report_day = today
+            self.log_message(f"📄 Reporte en curso: {self.report.jsonl_path}")
+        return self.report
+
+    def close_report(self):
+        """Cerrar el reporte en curso (se escribe el reporte de texto y el Excel)"""
+        if self.report is None:
+            return
+        summary = self.report.close()
+        self.report = None
+        self.log_message(f"📄 Reporte cerrado: {summary['report_path']}")
+
+    def run(self):
+        """Vigilar las carpetas hasta que se cancele; devuelve la cantidad de archivos analizados"""
+        engine = self.engine
+        options = engine.options()
+        keywords_digest = keywords_hash(engine.keywords)
+        options_digest = options_hash(options)
+        engine.cancel_event.clear()
+        os.makedirs(engine.output_dir, exist_ok=True)
+
+        events = FolderEvents(self.folders, self.recursive)
+        manifest = AnalysisManifest(engine.output_dir, engine.project_name)
+        self.log_message(f"👀 Vigilando {len(self.folders)} carpeta(s) ({events.name}):")
+        for folder in self.folders:
+            self.log_message(f"   📁 {folder}")
+        self.log_message(f"🔍 Palabras clave: {len(engine.keywords)} - ⚙️ Procesos en paralelo: {engine.workers}")
+
+        try:
+            while not engine.cancel_event.is_set():
+                fresh = []
+                for path, state in self.ready_files():
+                    if manifest.lookup(path, keywords_digest, options_digest) is not None:
+                        # Ya analizado con las mismas palabras clave y opciones
+                        self.handled[path] = state
+                    else:
+                        fresh.append((path, state))
+
+                for start in range(0, len(fresh), MAX_ARCHIVOS_POR_LOTE):
+                    self.analyze_batch(fresh[start:start + MAX_ARCHIVOS_POR_LOTE], options, manifest,
+                                       keywords_digest)
+
+                events.wait(INTERVALO_SONDEO if self.waiting else events.idle_interval, engine.cancel_event)
+        except AnalysisCancelled:
+            pass
+        finally:
+            events.close()
+            manifest.close()
+            self.close_report()
+            self.close_pool()
+
+        self.log_message(f"⏹️ Vigilancia detenida: {self.files_analyzed} archivo(s) analizados")
+        return self.files_analyzed
+
+    def worker_pool(self, options):
+        """Pool de procesos de la vigilancia (se crea la primera vez), o None con un solo proceso"""
+        if self.engine.workers <= 1:
+            return None
+        if self.executor is None:
+            self.executor = create_worker_pool(options, self.engine.workers, self.engine.cancel_event)
+        return self.executor
+
+    def close_pool(self):
+        """Detener los procesos del pool"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+    def analyze_batch(self, batch, options, manifest, keywords_digest):
+        """Analizar un lote de archivos listos y registrarlos en el reporte y el manifiesto"""
+        report = self.current_report()
+        states = dict(batch)
+        self.log_message(f"📥 {len(batch)} archivo(s) nuevo(s) o modificado(s)")
+
+        def on_result(file_results):
+            path = file_results['file_path']
+            report.add_file_result(file_results)
+            if not file_results.get('error'):
+                manifest.record(file_results, keywords_digest, options, states[path])
+            # Los archivos con error se reintentan solo si vuelven a cambiar
+            self.handled[path] = states[path]
+            self.crashes.pop(path, None)
+            self.files_analyzed += 1
+
+        try:
+            analyze_files([path for path, _ in batch], options, workers=self.engine.workers,
+                          log=self.log_message, on_result=on_result, cancel_event=self.engine.cancel_event,
+                          executor=self.worker_pool(options))
+        except BrokenProcessPool:
+            # Un proceso terminó de forma inesperada: el pool se descarta y los archivos sin terminar
+            # quedan pendientes, así que se vuelven a analizar (con un pool nuevo) en la próxima revisión
+            self.close_pool()
+            unfinished = [path for path, state in batch if self.handled.get(path) != state]
+            self.log_message(f"⚠️ Se detuvo un proceso del pool: {len(unfinished)} archivo(s) "
+                             "se vuelven a analizar")
+            for path in unfinished:
+                self.crashes[path] = self.crashes.get(path, 0) + 1
+                if self.crashes[path] >= MAX_CAIDAS_POR_ARCHIVO:
+                    # Probablemente es el archivo que hace caer al proceso: no se reintenta hasta que cambie
+                    file_results = finish_file_result(new_file_result(path), [])
+                    file_results['error'] = (f"Error procesando {file_results['file']}: el proceso se detuvo "
+                                             f"{self.crashes[path]} veces")
+                    on_result(file_results)
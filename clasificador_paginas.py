@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Clasificación de Páginas
+Para el Analizador OCR Universal
+
+Decide para cada página si alcanza con el texto extraído directamente, si hay
+que pasarla por OCR o si conviene usar ambos, a partir de señales baratas:
+cuánto de la página cubren las imágenes, qué proporción del texto son letras,
+números o caracteres ilegibles y cuántas palabras frecuentes del idioma aparecen.
+"""
+
+import re
+import unicodedata
+
+# Decisiones posibles
+DIRECTO = 'direct'
+OCR = 'ocr'
+AMBOS = 'both'
+
+# Palabras muy frecuentes (español e inglés): en un texto legible son una
+# parte importante de las palabras; en una capa de texto corrupta casi no aparecen
+PALABRAS_FRECUENTES = frozenset("""
+    a al algo como con cual cuando de del desde donde e el ella en entre era es esa ese esta este
+    fue ha han hay la las le les lo los mas muy ni no o para pero por que se ser si sin sobre
+    son su sus también tiene todo un una uno y ya
+    and are as at be by for from has have in is it not of on or that the this to was were which with
+""".split())
+
+_WORD = re.compile(r'[^\W\d_]+')
+
+
+def text_signals(text):
+    """Señales de calidad del texto extraído de una página"""
+    chars = [c for c in text if not c.isspace()]
+    total = len(chars)
+    alnum = sum(1 for c in chars if c.isalnum())
+    garbage = sum(1 for c in chars
+                  if c == '\ufffd' or unicodedata.category(c) in ('Cc', 'Cf', 'Co', 'Cn', 'Cs'))
+    words = [w.lower() for w in _WORD.findall(text)]
+    hits = sum(1 for w in words if w in PALABRAS_FRECUENTES)
+    return {
+        'chars': total,
+        'words': len(words),
+        'alnum_ratio': alnum / total if total else 0.0,
+        'garbage_ratio': garbage / total if total else 0.0,
+        'dictionary_rate': hits / len(words) if words else 0.0
+    }
+
+
+class LengthClassifier:
+    """Criterio original: OCR cuando el texto directo tiene menos de 50 caracteres"""
+
+    name = 'longitud'
+    MIN_CHARS = 50
+
+    def classify(self, text, image_coverage=None, ocr_enabled=True):
+        """Devolver la decisión para una página"""
+        chars = len(text.strip())
+        if ocr_enabled and chars < self.MIN_CHARS:
+            return {'decision': OCR, 'reason': 'documento escaneado', 'chars': chars}
+        return {'decision': DIRECTO, 'reason': 'texto suficiente', 'chars': chars}
+
+
+class SignalClassifier:
+    """Clasificador por señales: cobertura de imágenes y calidad del texto
+
+    - Sin texto y sin imágenes (página en blanco o solo dibujos): no se hace OCR.
+    - Sin texto sobre una imagen: OCR.
+    - Poco texto (portadas, páginas cortas): directo, salvo que una imagen
+      cubra buena parte de la página; entonces se usan ambos.
+    - Texto abundante pero ilegible (capa OCR defectuosa, fuentes sin mapa de
+      caracteres): OCR.
+    - Texto abundante y legible: directo, aunque la página sea una imagen.
+    """
+
+    name = 'senales'
+    MIN_CHARS = 50
+    MIN_WORDS = 20
+    MIN_ALNUM_RATIO = 0.5
+    MAX_GARBAGE_RATIO = 0.05
+    MIN_DICTIONARY_RATE = 0.08
+    MIN_IMAGE_COVERAGE = 0.05
+    SCANNED_COVERAGE = 0.3
+
+    def classify(self, text, image_coverage=None, ocr_enabled=True):
+        """Devolver la decisión para una página con las señales usadas
+
+        image_coverage es una función sin argumentos que devuelve la fracción
+        de la página cubierta por imágenes; solo se llama cuando el texto no
+        alcanza para decidir (así no se abre el PDF sin necesidad).
+        """
+        signals = text_signals(text)
+        record = dict(signals, image_coverage=None)
+        if not ocr_enabled:
+            return dict(record, decision=DIRECTO, reason='OCR deshabilitado')
+
+        if signals['chars'] < self.MIN_CHARS and image_coverage is not None:
+            record['image_coverage'] = coverage = image_coverage()
+        else:
+            coverage = None
+
+        if signals['chars'] == 0:
+            if coverage is not None and coverage < self.MIN_IMAGE_COVERAGE:
+                return dict(record, decision=DIRECTO, reason='página sin texto ni imágenes')
+            return dict(record, decision=OCR, reason='documento escaneado')
+
+        if signals['chars'] < self.MIN_CHARS:
+            if coverage is None or coverage >= self.SCANNED_COVERAGE:
+                return dict(record, decision=AMBOS, reason='poco texto sobre una imagen')
+            return dict(record, decision=DIRECTO, reason='página corta con texto')
+
+        if (signals['alnum_ratio'] < self.MIN_ALNUM_RATIO
+                or signals['garbage_ratio'] > self.MAX_GARBAGE_RATIO
+                or (signals['words'] >= self.MIN_WORDS
+                    and signals['dictionary_rate'] < self.MIN_DICTIONARY_RATE)):
+            return dict(record, decision=OCR, reason='capa de texto ilegible')
+
+        return dict(record, decision=DIRECTO, reason='texto suficiente')
+
+
+# Clasificadores disponibles, por nombre (el nombre viaja en las opciones a otros procesos)
+CLASIFICADORES = {
+    LengthClassifier.name: LengthClassifier,
+    SignalClassifier.name: SignalClassifier,
+}
+
+CLASIFICADOR_POR_DEFECTO = SignalClassifier.name
+
+
+def get_classifier(name=None):
+    """Crear el clasificador de páginas indicado por nombre"""
+    name = name or CLASIFICADOR_POR_DEFECTO
+    if name not in CLASIFICADORES:
+        raise ValueError(f"Clasificador de páginas desconocido: {name}")
+    return CLASIFICADORES[name]()
@@ -2,11 +2,24 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import threading
 import os
+import queue
 import subprocess
-import re
+import time
+import traceback
 from datetime import datetime
 import json
 
+from clasificador_paginas import CLASIFICADORES, CLASIFICADOR_POR_DEFECTO
+from motor_analisis import AnalysisEngine, load_keywords_file
+from motor_busqueda import MODO_EXACTO, MODOS_COINCIDENCIA
+from preprocesado_imagen import PASOS_PREPROCESADO
+from procesador_pdf import POLITICA_DPI_FIJA, POLITICAS_DPI
+
+# Cada cuánto el hilo de la interfaz procesa los mensajes del análisis (ms)
+INTERVALO_EVENTOS_MS = 100
+# Líneas que se conservan en el log de la pestaña de procesamiento
+MAX_LINEAS_LOG = 5000
+
 class UniversalOCRAnalyzer:
     def __init__(self, root):
         self.root = root
@@ -18,6 +31,11 @@ class UniversalOCRAnalyzer:
         self.selected_files = []
         self.output_folder = tk.StringVar()
         self.is_processing = False
+        self.current_engine = None
+        
+        # Mensajes de los hilos de trabajo para el hilo de la interfaz (Tkinter no es seguro entre hilos)
+        self.ui_events = queue.Queue()
+        self.progress_started = None
         
         # Verificar dependencias al iniciar
         self.verificar_dependencias_inicial()
@@ -35,6 +53,9 @@ class UniversalOCRAnalyzer:
         
         # Cargar palabras clave por defecto
         self.load_default_keywords()
+        
+        # Procesar periódicamente los mensajes de los hilos de trabajo
+        self.root.after(INTERVALO_EVENTOS_MS, self.process_ui_events)
 
     def setup_style(self):
         """Configurar el estilo de la interfaz"""
@@ -94,10 +115,24 @@ class UniversalOCRAnalyzer:
         self.progress_bar = ttk.Progressbar(buttons_frame, mode='indeterminate')
         self.progress_bar.grid(row=0, column=1, sticky="ew", padx=(10, 10))
         
+        # Cancelar el análisis en curso sin perder los archivos terminados
+        self.cancel_btn = ttk.Button(buttons_frame, text="⏹️ Cancelar", 
+                                    command=self.cancel_analysis, width=12, state='disabled')
+        self.cancel_btn.grid(row=0, column=2, padx=(0, 10))
+        
+        # Reanudar el último análisis cancelado o interrumpido del proyecto
+        self.resume_btn = ttk.Button(buttons_frame, text="⏯️ Reanudar", 
+                                    command=self.start_resume, width=12)
+        self.resume_btn.grid(row=0, column=3, padx=(0, 10))
+        
+        # Páginas procesadas y tiempo restante estimado
+        self.progress_label = ttk.Label(buttons_frame, text="")
+        self.progress_label.grid(row=1, column=1, sticky="w", padx=(10, 10))
+        
         # Botón de ayuda
         help_btn = ttk.Button(buttons_frame, text="❓ Ayuda", 
                              command=self.show_help, width=10)
-        help_btn.grid(row=0, column=2)
+        help_btn.grid(row=0, column=4)
 
     def create_project_tab(self):
         """Crear pestaña de configuración del proyecto"""
@@ -221,7 +256,11 @@ class UniversalOCRAnalyzer:
         
         save_keywords_btn = ttk.Button(keywords_buttons_frame, text="💾 Guardar en archivo", 
                                       command=self.save_keywords_file, width=18)
-        save_keywords_btn.pack(side=tk.LEFT)
+        save_keywords_btn.pack(side=tk.LEFT, padx=(0, 10))
+        
+        search_index_btn = ttk.Button(keywords_buttons_frame, text="🔎 Buscar de nuevo", 
+                                     command=self.start_index_search, width=16)
+        search_index_btn.pack(side=tk.LEFT)
         
         # Lista de palabras clave
         keywords_list_frame = ttk.Frame(keywords_frame)
@@ -269,7 +308,63 @@ class UniversalOCRAnalyzer:
         self.whole_words = tk.BooleanVar(value=True)
         words_check = ttk.Checkbutton(config_frame, text="Solo palabras completas", 
                                      variable=self.whole_words)
-        words_check.grid(row=2, column=0, columnspan=2, sticky="w")
+        words_check.grid(row=2, column=0, columnspan=2, sticky="w", pady=(0, 5))
+        
+        self.cache_enabled = tk.BooleanVar(value=True)
+        cache_check = ttk.Checkbutton(config_frame, text="Reutilizar texto ya extraído (caché en carpeta de resultados)", 
+                                     variable=self.cache_enabled)
+        cache_check.grid(row=3, column=0, columnspan=2, sticky="w", pady=(0, 5))
+        
+        self.index_enabled = tk.BooleanVar(value=True)
+        index_check = ttk.Checkbutton(config_frame, text="Indexar documentos para repetir búsquedas sin reprocesar", 
+                                     variable=self.index_enabled)
+        index_check.grid(row=4, column=0, columnspan=2, sticky="w", pady=(0, 5))
+        
+        # Procesos en paralelo (Tesseract usa CPU intensivamente)
+        ttk.Label(config_frame, text="Procesos en paralelo:").grid(row=5, column=0, sticky="w")
+        self.worker_count = tk.IntVar(value=os.cpu_count() or 1)
+        workers_spin = ttk.Spinbox(config_frame, from_=1, to=max(os.cpu_count() or 1, 64),
+                                   textvariable=self.worker_count, width=5)
+        workers_spin.grid(row=5, column=1, sticky="w", padx=(10, 0))
+        
+        # Criterio para decidir entre texto directo y OCR en cada página
+        ttk.Label(config_frame, text="Clasificación de páginas:").grid(row=6, column=0, sticky="w", pady=(5, 0))
+        self.page_classifier = tk.StringVar(value=CLASIFICADOR_POR_DEFECTO)
+        classifier_combo = ttk.Combobox(config_frame, textvariable=self.page_classifier,
+                                        values=sorted(CLASIFICADORES), state="readonly", width=12)
+        classifier_combo.grid(row=6, column=1, sticky="w", padx=(10, 0), pady=(5, 0))
+        
+        # Resolución del OCR: fija a 300 DPI o adaptativa (150 DPI y 300 DPI solo donde haga falta)
+        ttk.Label(config_frame, text="Resolución OCR:").grid(row=7, column=0, sticky="w", pady=(5, 0))
+        self.dpi_policy = tk.StringVar(value=POLITICA_DPI_FIJA)
+        dpi_combo = ttk.Combobox(config_frame, textvariable=self.dpi_policy,
+                                 values=POLITICAS_DPI, state="readonly", width=12)
+        dpi_combo.grid(row=7, column=1, sticky="w", padx=(10, 0), pady=(5, 0))
+
+        self.incremental = tk.BooleanVar(value=False)
+        incremental_check = ttk.Checkbutton(config_frame, text="Analizar solo archivos nuevos o modificados (manifiesto del proyecto)",
+                                            variable=self.incremental)
+        incremental_check.grid(row=8, column=0, columnspan=2, sticky="w", pady=(5, 0))
+
+        # Coincidencia exacta, sin tildes ni mayúsculas, o por raíz (singular/plural, masculino/femenino)
+        ttk.Label(config_frame, text="Coincidencia:").grid(row=9, column=0, sticky="w", pady=(5, 0))
+        self.match_mode = tk.StringVar(value=MODO_EXACTO)
+        match_combo = ttk.Combobox(config_frame, textvariable=self.match_mode,
+                                   values=MODOS_COINCIDENCIA, state="readonly", width=12)
+        match_combo.grid(row=9, column=1, sticky="w", padx=(10, 0), pady=(5, 0))
+
+        # Búsqueda aproximada: errores de OCR tolerados por palabra clave (0 = solo exactas)
+        ttk.Label(config_frame, text="Errores de OCR tolerados:").grid(row=10, column=0, sticky="w", pady=(5, 0))
+        self.max_edits = tk.IntVar(value=0)
+        edits_spin = ttk.Spinbox(config_frame, from_=0, to=2, textvariable=self.max_edits,
+                                 state="readonly", width=5)
+        edits_spin.grid(row=10, column=1, sticky="w", padx=(10, 0), pady=(5, 0))
+
+        # Preprocesado de las imágenes: grises, páginas en blanco sin OCR, recorte, enderezado y binarización
+        self.preprocessing_enabled = tk.BooleanVar(value=False)
+        preprocessing_check = ttk.Checkbutton(config_frame, text="Preparar las imágenes antes del OCR (recorte, enderezado, blanco y negro)",
+                                              variable=self.preprocessing_enabled)
+        preprocessing_check.grid(row=11, column=0, columnspan=2, sticky="w", pady=(5, 0))
         
         # Log de procesamiento
         log_frame = ttk.LabelFrame(processing_frame, text="Log de Procesamiento", padding="10")
@@ -333,24 +428,7 @@ class UniversalOCRAnalyzer:
         
         if file_path:
             try:
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    if file_path.endswith('.json'):
-                        # Soporte para JSON (opcional)
-                        data = json.load(file)
-                        if isinstance(data, list):
-                            keywords = data
-                        elif isinstance(data, dict) and 'keywords' in data:
-                            keywords = data['keywords']
-                        else:
-                            raise ValueError("Formato JSON no válido")
-                    else:
-                        # Archivo de texto, una palabra por línea (formato principal)
-                        # Ignora líneas vacías y comentarios que empiecen con #
-                        keywords = []
-                        for line in file.readlines():
-                            line = line.strip()
-                            if line and not line.startswith('#'):
-                                keywords.append(line)
+                keywords = load_keywords_file(file_path)
                 
                 # Agregar palabras únicas
                 added_count = 0
@@ -450,11 +528,87 @@ class UniversalOCRAnalyzer:
             self.output_folder.set(folder)
 
     def log_message(self, message):
-        """Agregar mensaje al log"""
+        """Agregar mensaje al log (se puede llamar desde cualquier hilo)"""
         timestamp = datetime.now().strftime("%H:%M:%S")
-        self.log_text.insert(tk.END, f"[{timestamp}] {message}\n")
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        self.ui_events.put(('log', f"[{timestamp}] {message}\n"))
+
+    def update_progress(self, pages_done, pages_total):
+        """Informar el avance del análisis (se puede llamar desde cualquier hilo)"""
+        self.ui_events.put(('progress', (pages_done, pages_total)))
+
+    def call_in_ui(self, function):
+        """Ejecutar una función en el hilo de la interfaz"""
+        self.ui_events.put(('call', function))
+
+    def process_ui_events(self):
+        """Aplicar en lote los mensajes pendientes de los hilos de trabajo
+
+        Se vuelve a programar siempre, aunque falle alguna actualización: si
+        no, la interfaz quedaría congelada mientras el análisis sigue.
+        """
+        try:
+            self.apply_ui_events()
+        except Exception as e:
+            self.report_ui_error(e)
+        finally:
+            self.root.after(INTERVALO_EVENTOS_MS, self.process_ui_events)
+
+    def report_ui_error(self, error):
+        """Registrar en la consola y en el log un error al actualizar la interfaz"""
+        traceback.print_exc()
+        self.log_message(f"❌ Error actualizando la interfaz: {str(error)}")
+
+    def apply_ui_events(self):
+        """Vaciar la cola de mensajes y actualizar el log, la barra de progreso y demás widgets"""
+        lines = []
+        progress = None
+        calls = []
+        try:
+            while True:
+                kind, value = self.ui_events.get_nowait()
+                if kind == 'log':
+                    lines.append(value)
+                elif kind == 'progress':
+                    progress = value
+                else:
+                    calls.append(value)
+        except queue.Empty:
+            pass
+
+        if lines:
+            # Los mensajes pueden tener varias líneas: se cuentan las líneas de texto, no los mensajes
+            text = ''.join(lines)
+            self.log_text.insert(tk.END, '\n'.join(text.split('\n')[-MAX_LINEAS_LOG - 1:]))
+            line_count = int(self.log_text.index('end-1c').split('.')[0])
+            if line_count > MAX_LINEAS_LOG:
+                self.log_text.delete('1.0', f"{line_count - MAX_LINEAS_LOG}.0")
+            self.log_text.see(tk.END)
+        if progress is not None:
+            self.show_progress(*progress)
+
+        for function in calls:
+            # Una actualización que falla no impide aplicar las demás
+            try:
+                function()
+            except Exception as e:
+                self.report_ui_error(e)
+
+    def show_progress(self, pages_done, pages_total):
+        """Mostrar páginas procesadas y tiempo restante estimado en la barra de progreso"""
+        if pages_total <= 0 or not self.is_processing:
+            return
+        if str(self.progress_bar.cget('mode')) != 'determinate':
+            self.progress_bar.stop()
+            self.progress_bar.config(mode='determinate')
+            self.progress_started = time.monotonic()
+        self.progress_bar.config(maximum=pages_total, value=pages_done)
+
+        text = f"{pages_done}/{pages_total} páginas ({pages_done * 100 // pages_total}%)"
+        elapsed = time.monotonic() - self.progress_started
+        if 0 < pages_done < pages_total and elapsed > 0:
+            remaining = int(elapsed * (pages_total - pages_done) / pages_done)
+            text += f" · restante aprox. {remaining // 3600}:{remaining % 3600 // 60:02d}:{remaining % 60:02d}"
+        self.progress_label.config(text=text)
 
     def start_analysis(self):
         """Iniciar el análisis OCR"""
@@ -480,6 +634,7 @@ class UniversalOCRAnalyzer:
         self.is_processing = True
         self.analyze_btn.config(state='disabled', text="🔄 Procesando...")
         self.progress_bar.start()
+        self.progress_label.config(text="")
         
         # Cambiar a pestaña de procesamiento
         self.notebook.select(3)
@@ -487,360 +642,149 @@ class UniversalOCRAnalyzer:
         # Limpiar log
         self.log_text.delete(1.0, tk.END)
         
-        # Iniciar hilo de procesamiento
-        thread = threading.Thread(target=self.run_analysis)
+        # Iniciar hilo de procesamiento (la configuración se lee aquí, en el hilo de la interfaz)
+        self.current_engine = self.create_engine()
+        self.cancel_btn.config(state='normal')
+        thread = threading.Thread(target=self.run_analysis, args=(self.current_engine, list(self.selected_files)))
         thread.daemon = True
         thread.start()
 
-    def run_analysis(self):
+    def start_resume(self):
+        """Reanudar el último análisis sin terminar del proyecto"""
+        if self.is_processing:
+            messagebox.showinfo("Procesando", "Ya hay un análisis en progreso.")
+            return
+        
+        engine, files = AnalysisEngine.from_checkpoint(self.output_folder.get(), self.project_name.get(),
+                                                       log=self.log_message, progress=self.update_progress)
+        if engine is None:
+            messagebox.showinfo("Nada para reanudar", 
+                                "No hay un análisis cancelado o interrumpido de este proyecto "
+                                "en la carpeta de resultados.")
+            return
+        
+        if not messagebox.askyesno("Reanudar análisis", 
+                                   f"¿Reanudar el análisis de {len(files)} archivo(s) "
+                                   f"con {len(engine.keywords)} palabra(s) clave?\n\n"
+                                   "Los archivos ya terminados no se vuelven a procesar."):
+            return
+        
+        self.is_processing = True
+        self.analyze_btn.config(state='disabled', text="🔄 Procesando...")
+        self.progress_bar.start()
+        self.progress_label.config(text="")
+        self.notebook.select(3)
+        self.log_text.delete(1.0, tk.END)
+        
+        self.current_engine = engine
+        self.cancel_btn.config(state='normal')
+        thread = threading.Thread(target=self.run_analysis, args=(engine, files))
+        thread.daemon = True
+        thread.start()
+
+    def cancel_analysis(self):
+        """Detener el análisis en curso; los archivos terminados quedan en el reporte"""
+        if self.current_engine is None:
+            return
+        self.cancel_btn.config(state='disabled')
+        self.current_engine.cancel()
+
+    def create_engine(self):
+        """Crear el motor de análisis con la configuración actual de la interfaz"""
+        return AnalysisEngine(
+            self.project_name.get(),
+            self.search_keywords,
+            self.output_folder.get(),
+            case_sensitive=self.case_sensitive.get(),
+            whole_words=self.whole_words.get(),
+            match_mode=self.match_mode.get(),
+            max_edits=self.max_edits.get(),
+            ocr_enabled=self.ocr_enabled.get(),
+            workers=self.worker_count.get(),
+            use_cache=self.cache_enabled.get(),
+            use_index=self.index_enabled.get(),
+            page_classifier=self.page_classifier.get(),
+            dpi_policy=self.dpi_policy.get(),
+            preprocessing=PASOS_PREPROCESADO if self.preprocessing_enabled.get() else (),
+            incremental=self.incremental.get(),
+            log=self.log_message,
+            progress=self.update_progress
+        )
+
+    def run_analysis(self, engine, files):
         """Ejecutar el análisis en hilo separado"""
         try:
-            self.log_message("🚀 Iniciando análisis OCR universal...")
-            self.log_message(f"📋 Proyecto: {self.project_name.get()}")
-            self.log_message(f"📁 Archivos a procesar: {len(self.selected_files)}")
-            self.log_message(f"🔍 Palabras clave: {len(self.search_keywords)}")
-            self.log_message("")
-            
-            # Crear carpeta de salida
-            output_dir = self.output_folder.get()
-            os.makedirs(output_dir, exist_ok=True)
-            
-            # Importar librerías necesarias
             try:
-                import PyPDF2
-                import pytesseract
-                from pdf2image import convert_from_path
-                from PIL import Image
-                
-                # Configurar pytesseract y TESSDATA_PREFIX
-                pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-                
-                # Configurar TESSDATA_PREFIX para usar archivos locales
-                script_dir = os.path.dirname(os.path.abspath(__file__))
-                tessdata_path = os.path.join(script_dir, 'tessdata')
-                os.environ['TESSDATA_PREFIX'] = tessdata_path
-                
-                # Hacer disponibles para las funciones
-                self.PyPDF2 = PyPDF2
-                self.pytesseract = pytesseract
-                self.convert_from_path = convert_from_path
-                
+                summary = engine.run(files)
             except ImportError as e:
                 self.log_message(f"❌ Error al importar librerías: {str(e)}")
                 self.log_message("Por favor, ejecute 'python verificar_instalacion.py'")
                 return
             
-            results = []
-            
-            for i, file_path in enumerate(self.selected_files, 1):
-                filename = os.path.basename(file_path)
-                self.log_message(f"🔄 Procesando {i}/{len(self.selected_files)}: {filename}")
-                
-                file_results = {
-                    'file': filename,
-                    'file_path': file_path,
-                    'matches': [],
-                    'total_matches': 0,
-                    'pages_processed': 0,
-                    'error': None
-                }
-                
-                try:
-                    # Procesar PDF
-                    file_matches = self.process_pdf_file(file_path)
-                    file_results['matches'] = file_matches
-                    file_results['total_matches'] = len(file_matches)
-                    file_results['pages_processed'] = max([m['page'] for m in file_matches]) if file_matches else 0
-                    
-                    self.log_message(f"✅ {filename}: {file_results['total_matches']} coincidencias en {file_results['pages_processed']} páginas")
-                    
-                except Exception as e:
-                    error_msg = f"Error procesando {filename}: {str(e)}"
-                    self.log_message(f"❌ {error_msg}")
-                    file_results['error'] = error_msg
-                
-                results.append(file_results)
-            
-            # Generar reporte detallado
-            report_path = self.generate_detailed_report(results, output_dir)
-            
-            self.log_message("")
-            self.log_message("🎉 ¡Análisis completado exitosamente!")
-            self.log_message(f"📊 Resultados guardados en: {output_dir}")
-            self.log_message(f"📁 Ruta completa: {os.path.abspath(output_dir)}")
+            if summary['cancelled']:
+                message = (f"El análisis se canceló. El reporte incluye {summary['files']} archivo(s) "
+                           f"terminado(s):\n{summary['report_path']}\n\n"
+                           "Use '⏯️ Reanudar' para continuar desde la última página procesada.")
+                self.call_in_ui(lambda: messagebox.showinfo("Análisis cancelado", message))
+                return
             
             # Mostrar mensaje de éxito con opción de abrir resultados
-            self.root.after(0, lambda: self.show_completion_dialog(os.path.abspath(output_dir), report_path))
+            output_dir = os.path.abspath(engine.output_dir)
+            report_path = summary['report_path']
+            self.call_in_ui(lambda: self.show_completion_dialog(output_dir, report_path))
             
         except Exception as e:
             error_msg = f"❌ Error durante el análisis: {str(e)}"
             self.log_message(error_msg)
-            self.root.after(0, lambda: messagebox.showerror("Error", error_msg))
+            self.call_in_ui(lambda: messagebox.showerror("Error", error_msg))
         
         finally:
             # Restaurar interfaz
-            self.root.after(0, self.analysis_finished)
+            self.call_in_ui(self.analysis_finished)
 
-    def process_pdf_file(self, file_path):
-        """Procesar un archivo PDF y buscar palabras clave"""
-        matches = []
-        
-        try:
-            # Intentar leer texto directo del PDF primero
-            with open(file_path, 'rb') as file:
-                pdf_reader = self.PyPDF2.PdfReader(file)
-                
-                for page_num, page in enumerate(pdf_reader.pages, 1):
-                    try:
-                        # Extraer texto directo
-                        text = page.extract_text()
-                        
-                        # Si no hay texto o es muy poco, usar OCR
-                        if len(text.strip()) < 50:
-                            self.log_message(f"   📝 Página {page_num}: Usando OCR (documento escaneado)")
-                            text = self.extract_text_with_ocr(file_path, page_num)
-                        else:
-                            self.log_message(f"   📝 Página {page_num}: Texto extraído directamente")
-                        
-                        # Buscar palabras clave en el texto
-                        page_matches = self.find_keywords_in_text(text, page_num)
-                        matches.extend(page_matches)
-                        
-                    except Exception as e:
-                        self.log_message(f"   ⚠️ Error en página {page_num}: {str(e)}")
-                        
-        except Exception as e:
-            self.log_message(f"   ❌ Error leyendo PDF: {str(e)}")
-            raise
+    def start_index_search(self):
+        """Repetir la búsqueda sobre los documentos ya indexados"""
+        if not self.search_keywords:
+            messagebox.showwarning("Sin palabras clave", "Por favor configure al menos una palabra clave.")
+            return
         
-        return matches
-
-    def extract_text_with_ocr(self, file_path, page_num):
-        """Extraer texto usando OCR para una página específica"""
-        try:
-            # Convertir página específica a imagen
-            images = self.convert_from_path(file_path, first_page=page_num, last_page=page_num, dpi=300)
-            
-            if images:
-                # Usar OCR en español
-                text = self.pytesseract.image_to_string(images[0], lang='spa')
-                return text
-            else:
-                return ""
-                
-        except Exception as e:
-            self.log_message(f"   ⚠️ Error en OCR página {page_num}: {str(e)}")
-            return ""
-
-    def find_keywords_in_text(self, text, page_num):
-        """Buscar palabras clave en el texto y devolver contexto"""
-        matches = []
+        if self.is_processing:
+            messagebox.showinfo("Procesando", "Ya hay un análisis en progreso.")
+            return
         
-        if not text.strip():
-            return matches
+        engine = self.create_engine()
+        if not engine.has_index():
+            messagebox.showwarning("Sin índice", 
+                                   "Aún no hay documentos indexados en la carpeta de resultados.\n"
+                                   "Ejecute primero un análisis con la indexación habilitada.")
+            return
         
-        # Configuración de búsqueda
-        flags = 0 if self.case_sensitive.get() else re.IGNORECASE
+        self.is_processing = True
+        self.analyze_btn.config(state='disabled', text="🔄 Procesando...")
+        self.progress_bar.start()
+        self.progress_label.config(text="")
+        self.notebook.select(3)
+        self.log_text.delete(1.0, tk.END)
         
-        for keyword in self.search_keywords:
-            # Crear patrón de búsqueda
-            if self.whole_words.get():
-                pattern = r'\b' + re.escape(keyword) + r'\b'
-            else:
-                pattern = re.escape(keyword)
-            
-            # Buscar todas las ocurrencias
-            for match in re.finditer(pattern, text, flags):
-                # Extraer contexto (50 caracteres antes y después)
-                start_pos = max(0, match.start() - 50)
-                end_pos = min(len(text), match.end() + 50)
-                context = text[start_pos:end_pos].strip()
-                
-                # Limpiar contexto (remover saltos de línea excesivos)
-                context = re.sub(r'\s+', ' ', context)
-                
-                # Resaltar la palabra encontrada en el contexto
-                highlighted_context = context.replace(
-                    match.group(), 
-                    f"**{match.group()}**"
-                )
-                
-                matches.append({
-                    'page': page_num,
-                    'keyword': keyword,
-                    'matched_text': match.group(),
-                    'context': context,
-                    'highlighted_context': highlighted_context,
-                    'position': match.start()
-                })
-        
-        return matches
+        thread = threading.Thread(target=self.run_index_search, args=(engine,))
+        thread.daemon = True
+        thread.start()
 
-    def generate_detailed_report(self, results, output_dir):
-        """Generar reporte detallado de resultados"""
-        self.log_message("📊 Generando reporte detallado...")
-        
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        project_name = self.project_name.get().replace(' ', '_')
-        
-        # Generar reporte en texto
-        report_path = os.path.join(output_dir, f"reporte_{project_name}_{timestamp}.txt")
-        
-        with open(report_path, 'w', encoding='utf-8') as f:
-            f.write(f"REPORTE DETALLADO DE ANÁLISIS OCR - {self.project_name.get().upper()}\n")
-            f.write("=" * 80 + "\n")
-            f.write(f"Fecha: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n")
-            f.write(f"Total de archivos procesados: {len(results)}\n")
-            f.write(f"Palabras clave buscadas: {', '.join(self.search_keywords)}\n")
-            f.write(f"Configuración:\n")
-            f.write(f"  - Sensible a mayúsculas: {'Sí' if self.case_sensitive.get() else 'No'}\n")
-            f.write(f"  - Solo palabras completas: {'Sí' if self.whole_words.get() else 'No'}\n")
-            f.write(f"  - OCR habilitado: {'Sí' if self.ocr_enabled.get() else 'No'}\n")
-            f.write("\n")
-            
-            # Estadísticas generales
-            total_matches = sum(r['total_matches'] for r in results)
-            files_with_matches = len([r for r in results if r['total_matches'] > 0])
-            files_with_errors = len([r for r in results if r.get('error')])
-            
-            f.write("RESUMEN EJECUTIVO:\n")
-            f.write("-" * 40 + "\n")
-            f.write(f"• Total de coincidencias encontradas: {total_matches}\n")
-            f.write(f"• Archivos con coincidencias: {files_with_matches} de {len(results)}\n")
-            f.write(f"• Archivos con errores: {files_with_errors}\n")
-            f.write(f"• Promedio de coincidencias por archivo: {total_matches/len(results):.1f}\n")
-            f.write("\n")
-            
-            # Ranking de palabras clave más encontradas
-            keyword_count = {}
-            for result in results:
-                for match in result.get('matches', []):
-                    keyword = match['keyword']
-                    keyword_count[keyword] = keyword_count.get(keyword, 0) + 1
-            
-            if keyword_count:
-                f.write("PALABRAS CLAVE MÁS FRECUENTES:\n")
-                f.write("-" * 40 + "\n")
-                sorted_keywords = sorted(keyword_count.items(), key=lambda x: x[1], reverse=True)
-                for i, (keyword, count) in enumerate(sorted_keywords[:10], 1):
-                    f.write(f"{i:2d}. {keyword}: {count} ocurrencias\n")
-                f.write("\n")
-            
-            # Detalle por archivo
-            f.write("DETALLE POR ARCHIVO:\n")
-            f.write("=" * 80 + "\n")
-            
-            for result in results:
-                f.write(f"\n📄 ARCHIVO: {result['file']}\n")
-                f.write(f"   Ruta: {result['file_path']}\n")
-                
-                if result.get('error'):
-                    f.write(f"   ❌ ERROR: {result['error']}\n")
-                    continue
-                
-                f.write(f"   ✅ Total de coincidencias: {result['total_matches']}\n")
-                f.write(f"   📄 Páginas procesadas: {result['pages_processed']}\n")
-                
-                if result['matches']:
-                    f.write(f"\n   COINCIDENCIAS DETALLADAS:\n")
-                    f.write(f"   {'-' * 50}\n")
-                    
-                    # Agrupar por página
-                    matches_by_page = {}
-                    for match in result['matches']:
-                        page = match['page']
-                        if page not in matches_by_page:
-                            matches_by_page[page] = []
-                        matches_by_page[page].append(match)
-                    
-                    # Mostrar por página
-                    for page in sorted(matches_by_page.keys()):
-                        f.write(f"\n   📄 PÁGINA {page}:\n")
-                        
-                        for j, match in enumerate(matches_by_page[page], 1):
-                            f.write(f"      {j}. Palabra: \"{match['matched_text']}\"\n")
-                            f.write(f"         Clave buscada: {match['keyword']}\n")
-                            f.write(f"         Contexto: ...{match['context']}...\n")
-                            f.write(f"         {'-' * 40}\n")
-                else:
-                    f.write(f"   ℹ️  No se encontraron coincidencias en este archivo.\n")
-                
-                f.write(f"\n{'='*80}\n")
-        
-        # Generar reporte Excel si openpyxl está disponible
+    def run_index_search(self, engine):
+        """Buscar en el índice invertido en hilo separado"""
         try:
-            excel_path = self.generate_excel_report(results, output_dir, timestamp, project_name)
-            self.log_message(f"📊 Reporte Excel generado: {os.path.basename(excel_path)}")
-        except ImportError:
-            self.log_message("ℹ️  Reporte Excel no generado (openpyxl no disponible)")
+            summary = engine.search_index()
+            output_dir = os.path.abspath(engine.output_dir)
+            report_path = summary['report_path']
+            self.call_in_ui(lambda: self.show_completion_dialog(output_dir, report_path))
+            
         except Exception as e:
-            self.log_message(f"⚠️  Error generando Excel: {str(e)}")
+            error_msg = f"❌ Error durante la búsqueda: {str(e)}"
+            self.log_message(error_msg)
+            self.call_in_ui(lambda: messagebox.showerror("Error", error_msg))
         
-        self.log_message(f"📄 Reporte detallado guardado: {os.path.basename(report_path)}")
-        return report_path
-
-    def generate_excel_report(self, results, output_dir, timestamp, project_name):
-        """Generar reporte en Excel"""
-        import openpyxl
-        from openpyxl.styles import Font, PatternFill, Border, Side
-        
-        excel_path = os.path.join(output_dir, f"reporte_{project_name}_{timestamp}.xlsx")
-        wb = openpyxl.Workbook()
-        
-        # Hoja 1: Resumen
-        ws_resumen = wb.active
-        ws_resumen.title = "Resumen"
-        
-        # Encabezados del resumen
-        headers_resumen = ['Archivo', 'Total Coincidencias', 'Páginas Procesadas', 'Estado']
-        for col, header in enumerate(headers_resumen, 1):
-            cell = ws_resumen.cell(row=1, column=col, value=header)
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-        
-        # Datos del resumen
-        for row, result in enumerate(results, 2):
-            ws_resumen.cell(row=row, column=1, value=result['file'])
-            ws_resumen.cell(row=row, column=2, value=result['total_matches'])
-            ws_resumen.cell(row=row, column=3, value=result['pages_processed'])
-            ws_resumen.cell(row=row, column=4, value='Error' if result.get('error') else 'Procesado')
-        
-        # Hoja 2: Detalle de coincidencias
-        ws_detalle = wb.create_sheet("Detalle de Coincidencias")
-        
-        headers_detalle = ['Archivo', 'Página', 'Palabra Clave', 'Texto Encontrado', 'Contexto']
-        for col, header in enumerate(headers_detalle, 1):
-            cell = ws_detalle.cell(row=1, column=col, value=header)
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-        
-        # Datos del detalle
-        row = 2
-        for result in results:
-            for match in result.get('matches', []):
-                ws_detalle.cell(row=row, column=1, value=result['file'])
-                ws_detalle.cell(row=row, column=2, value=match['page'])
-                ws_detalle.cell(row=row, column=3, value=match['keyword'])
-                ws_detalle.cell(row=row, column=4, value=match['matched_text'])
-                ws_detalle.cell(row=row, column=5, value=match['context'])
-                row += 1
-        
-        # Ajustar ancho de columnas
-        for ws in [ws_resumen, ws_detalle]:
-            for column in ws.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except Exception:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
-        
-        wb.save(excel_path)
-        return excel_path
+        finally:
+            self.call_in_ui(self.analysis_finished)
 
     def show_completion_dialog(self, output_dir, report_path):
         """Mostrar diálogo de finalización con opciones"""
@@ -909,8 +853,11 @@ Los resultados se guardaron en:
     def analysis_finished(self):
         """Finalizar análisis y restaurar interfaz"""
         self.is_processing = False
+        self.current_engine = None
+        self.cancel_btn.config(state='disabled')
         self.analyze_btn.config(state='normal', text="🚀 Iniciar Análisis OCR")
         self.progress_bar.stop()
+        self.progress_bar.config(mode='indeterminate', value=0)
 
     def show_help(self):
         """Mostrar ayuda"""
@@ -1014,9 +961,9 @@ Este programa analiza documentos PDF buscando palabras clave específicas.
                     def instalar_async():
                         try:
                             instalador.instalar_packages_python(verificacion['python_faltantes'])
-                            self.root.after(0, self._mostrar_instalacion_exitosa)
+                            self.call_in_ui(self._mostrar_instalacion_exitosa)
                         except Exception:
-                            self.root.after(0, self._mostrar_error_instalacion)
+                            self.call_in_ui(self._mostrar_error_instalacion)
                     
                     threading.Thread(target=instalar_async, daemon=True).start()
                 else:
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice Invertido de Documentos Procesados
+Para el Analizador OCR Universal
+
+Guarda en SQLite, para cada término (sin tildes y en minúsculas), las páginas
+y posiciones donde aparece. Una nueva búsqueda de palabras clave sobre
+documentos ya procesados se responde desde el índice, sin volver a recorrer
+el texto de cada página, y produce las mismas coincidencias que
+find_keywords_in_text para que los reportes sigan funcionando.
+"""
+
+import os
+import re
+import sqlite3
+import unicodedata
+from array import array
+
+from busqueda_aproximada import FuzzyMatcher
+from motor_busqueda import MODO_EXACTO, MODO_RAIZ, KeywordMatcher, PageContext, fold_accents, fold_case
+from procesador_pdf import finish_file_result, new_file_result
+
+_TOKEN = re.compile(r'\w+')
+_WORD_CHAR = re.compile(r'\w')
+
+
+def fold_token(token):
+    """Normalizar un término para el índice: sin tildes y en minúsculas"""
+    decomposed = unicodedata.normalize('NFD', token)
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return unicodedata.normalize('NFC', stripped).casefold()
+
+
+def tokenize(text):
+    """Devolver (término normalizado, inicio, fin) para cada palabra del texto"""
+    return [(fold_token(m.group()), m.start(), m.end()) for m in _TOKEN.finditer(text)]
+
+
+class TextIndex:
+    """Índice invertido persistente: término -> (documento, página, posiciones)
+
+    Las posiciones de cada término en una página se guardan como un arreglo de
+    enteros (ordinal del término, inicio, fin) con desplazamientos sobre el
+    texto original, de modo que el contexto se obtiene con un simple corte.
+    """
+
+    def __init__(self, index_dir):
+        os.makedirs(index_dir, exist_ok=True)
+        self.path = os.path.join(index_dir, 'indice.sqlite3')
+
+        self.conn = sqlite3.connect(self.path, timeout=60)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                doc_id INTEGER PRIMARY KEY,
+                file_hash TEXT UNIQUE NOT NULL,
+                path TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                doc_id INTEGER NOT NULL,
+                page INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                PRIMARY KEY (doc_id, page)
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                token TEXT NOT NULL,
+                doc_id INTEGER NOT NULL,
+                page INTEGER NOT NULL,
+                positions BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS postings_token ON postings (token);
+            CREATE INDEX IF NOT EXISTS postings_page ON postings (doc_id, page);
+        """)
+        self.conn.commit()
+
+    def document_id(self, file_hash, path):
+        """Obtener (o registrar) el identificador de un documento por su hash"""
+        # INSERT OR IGNORE evita conflictos si otro proceso registra el mismo documento
+        self.conn.execute('INSERT OR IGNORE INTO documents (file_hash, path) VALUES (?, ?)', (file_hash, path))
+        doc_id, stored_path = self.conn.execute(
+            'SELECT doc_id, path FROM documents WHERE file_hash = ?', (file_hash,)
+        ).fetchone()
+        if stored_path != path:
+            self.conn.execute('UPDATE documents SET path = ? WHERE doc_id = ?', (path, doc_id))
+        return doc_id
+
+    def add_page(self, file_hash, path, page_num, text):
+        """Indexar el texto de una página
+
+        Si la página ya estaba indexada con otro texto (se volvió a procesar
+        con otras opciones de extracción u OCR), se reemplazan su texto y sus
+        términos; si el texto es el mismo no se hace nada.
+        """
+        doc_id = self.document_id(file_hash, path)
+        row = self.conn.execute('SELECT text FROM pages WHERE doc_id = ? AND page = ?', (doc_id, page_num)).fetchone()
+        if row is not None:
+            if row[0] == text:
+                return
+            self.conn.execute('DELETE FROM postings WHERE doc_id = ? AND page = ?', (doc_id, page_num))
+        self.conn.execute(
+            'INSERT OR REPLACE INTO pages (doc_id, page, text) VALUES (?, ?, ?)', (doc_id, page_num, text)
+        )
+
+        postings = {}
+        for ordinal, (token, start, end) in enumerate(tokenize(text)):
+            postings.setdefault(token, array('I')).extend((ordinal, start, end))
+
+        self.conn.executemany(
+            'INSERT INTO postings (token, doc_id, page, positions) VALUES (?, ?, ?, ?)',
+            [(token, doc_id, page_num, positions.tobytes()) for token, positions in postings.items()]
+        )
+
+    def commit(self):
+        """Confirmar las páginas indexadas"""
+        self.conn.commit()
+
+    def close(self):
+        """Confirmar cambios y cerrar la conexión"""
+        self.conn.commit()
+        self.conn.close()
+
+    def document_count(self):
+        """Cantidad de documentos indexados"""
+        return self.conn.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+
+    def _page_text(self, doc_id, page_num, cache):
+        """Texto original de una página (con memoria local durante una búsqueda)"""
+        key = (doc_id, page_num)
+        if key not in cache:
+            row = self.conn.execute('SELECT text FROM pages WHERE doc_id = ? AND page = ?', key).fetchone()
+            cache[key] = row[0] if row else ""
+        return cache[key]
+
+    def _postings(self, token):
+        """Posiciones de un término agrupadas por (documento, página)"""
+        result = {}
+        for doc_id, page_num, blob in self.conn.execute(
+                'SELECT doc_id, page, positions FROM postings WHERE token = ?', (token,)):
+            positions = array('I')
+            positions.frombytes(blob)
+            result[(doc_id, page_num)] = positions
+        return result
+
+    @staticmethod
+    def _indexable(keyword, whole_words, match_mode=MODO_EXACTO):
+        """Indica si una palabra clave puede resolverse solo con el índice
+
+        El índice trabaja con palabras completas; las búsquedas de fragmentos,
+        por raíz o las palabras clave que empiezan o terminan con signos se
+        resuelven recorriendo el texto guardado de las páginas.
+        """
+        return (whole_words and match_mode != MODO_RAIZ and keyword
+                and _WORD_CHAR.match(keyword[0]) is not None
+                and _WORD_CHAR.match(keyword[-1]) is not None)
+
+    def _keyword_candidates(self, keyword):
+        """Devolver {(documento, página): [(inicio, fin), ...]} para una palabra clave"""
+        tokens = [token for token, _, _ in tokenize(keyword)]
+        postings = [self._postings(token) for token in tokens]
+        if not postings or not all(postings):
+            return {}
+
+        candidates = {}
+        for key, first_positions in postings[0].items():
+            if not all(key in p for p in postings[1:]):
+                continue
+
+            # Posiciones de los términos siguientes por ordinal, para frases
+            following = []
+            for p in postings[1:]:
+                positions = p[key]
+                following.append({positions[i]: positions[i + 2] for i in range(0, len(positions), 3)})
+
+            spans = []
+            for i in range(0, len(first_positions), 3):
+                ordinal, start, end = first_positions[i:i + 3]
+                for offset, ends_by_ordinal in enumerate(following, 1):
+                    end = ends_by_ordinal.get(ordinal + offset)
+                    if end is None:
+                        break
+                else:
+                    spans.append((start, end))
+            if spans:
+                candidates[key] = spans
+        return candidates
+
+    def search(self, keywords, case_sensitive=False, whole_words=True, file_hashes=None, match_mode=MODO_EXACTO,
+               max_edits=0):
+        """Buscar palabras clave en los documentos indexados
+
+        Devuelve una lista de resultados por documento con la misma estructura
+        que analyze_files ('file', 'file_path', 'matches', ...), ordenada por
+        ruta para que el reporte sea reproducible.
+        """
+        return list(self.iter_search(keywords, case_sensitive, whole_words, file_hashes, match_mode, max_edits))
+
+    def iter_search(self, keywords, case_sensitive=False, whole_words=True, file_hashes=None,
+                    match_mode=MODO_EXACTO, max_edits=0):
+        """Igual que search(), pero entrega un documento a la vez
+
+        Solo las posiciones de las coincidencias se reúnen de antemano; los
+        diccionarios con el contexto se arman al entregar cada documento. La
+        búsqueda aproximada (max_edits) recorre el texto guardado de las páginas.
+        """
+        keywords = list(keywords)
+        if match_mode != MODO_EXACTO:
+            fold = fold_accents
+        else:
+            fold = (lambda s: s) if case_sensitive else fold_case
+
+        documents = self.conn.execute('SELECT doc_id, file_hash, path FROM documents ORDER BY path, doc_id').fetchall()
+        if file_hashes is not None:
+            wanted = set(file_hashes)
+            documents = [d for d in documents if d[1] in wanted]
+        doc_ids = {doc_id for doc_id, _, _ in documents}
+
+        texts = {}
+        # (documento, página) -> [(índice de palabra clave, inicio, fin)]
+        page_hits = {}
+
+        indexed = [i for i, k in enumerate(keywords) if self._indexable(k, whole_words, match_mode)]
+        scanned = sorted(set(range(len(keywords))) - set(indexed))
+
+        for keyword_index in indexed:
+            keyword = keywords[keyword_index]
+            folded_keyword = fold(keyword)
+            for (doc_id, page_num), spans in self._keyword_candidates(keyword).items():
+                if doc_id not in doc_ids:
+                    continue
+                text = self._page_text(doc_id, page_num, texts)
+                last_end = 0
+                for start, end in spans:
+                    # Verificar con las mismas reglas que KeywordMatcher
+                    if start < last_end or fold(text[start:end]) != folded_keyword:
+                        continue
+                    last_end = end
+                    page_hits.setdefault((doc_id, page_num), []).append((keyword_index, start, end))
+
+        if scanned:
+            matcher = KeywordMatcher([keywords[i] for i in scanned], case_sensitive, whole_words, match_mode)
+            for doc_id, page_num, text in self.conn.execute('SELECT doc_id, page, text FROM pages'):
+                if doc_id not in doc_ids:
+                    continue
+                for local_index, start, end in matcher.find_matches(text):
+                    page_hits.setdefault((doc_id, page_num), []).append((scanned[local_index], start, end))
+
+        # (documento, página) -> [(índice de palabra clave, inicio, fin, distancia)]
+        page_hits = {key: [hit + (0,) for hit in hits] for key, hits in page_hits.items()}
+        if max_edits:
+            fuzzy_matcher = FuzzyMatcher(keywords, case_sensitive, match_mode, max_edits)
+            for doc_id, page_num, text in self.conn.execute('SELECT doc_id, page, text FROM pages'):
+                if doc_id not in doc_ids:
+                    continue
+                hits = page_hits.get((doc_id, page_num), [])
+                fuzzy_hits = fuzzy_matcher.find_matches(text, [hit[:3] for hit in hits])
+                if fuzzy_hits:
+                    page_hits[(doc_id, page_num)] = hits + fuzzy_hits
+
+        hits_by_document = {}
+        for (doc_id, page_num), hits in page_hits.items():
+            hits_by_document.setdefault(doc_id, []).append((page_num, hits))
+
+        texts.clear()
+        for doc_id, _, path in documents:
+            file_matches = []
+            for page_num, hits in sorted(hits_by_document.pop(doc_id, [])):
+                page_context = PageContext(self._page_text(doc_id, page_num, texts))
+                for keyword_index, start, end, distance in sorted(hits):
+                    file_matches.append(page_context.match(page_num, keywords[keyword_index], start, end,
+                                                           distance))
+            texts.clear()
+
+            yield finish_file_result(new_file_result(path), file_matches)
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Manifiesto de Análisis Incremental
+Para el Analizador OCR Universal
+
+Registra en la carpeta de resultados, para cada archivo analizado en un
+proyecto, su ruta, tamaño, fecha de modificación, hash del contenido, hash de
+las palabras clave y de las opciones de búsqueda, junto con sus resultados.
+Un nuevo análisis incremental solo procesa los archivos nuevos o modificados
+(o los analizados con otras palabras clave u opciones) y reutiliza el resto.
+
+Cada archivo se registra apenas termina, así que el manifiesto es también el
+punto de control de un análisis en curso: junto con la descripción de la
+ejecución (RunCheckpoint) permite reanudarlo tras un corte o una cancelación.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import time
+
+from cache_texto import file_content_hash
+
+# Estados de una ejecución
+EJECUCION_EN_CURSO = 'en_curso'
+EJECUCION_CANCELADA = 'cancelada'
+EJECUCION_COMPLETA = 'completa'
+
+# Opciones que cambian los resultados de un archivo
+OPCIONES_RESULTADO = ('case_sensitive', 'whole_words', 'match_mode', 'max_edits', 'ocr_enabled', 'ocr_lang',
+                      'ocr_backend', 'dpi', 'dpi_policy', 'low_dpi', 'min_confidence', 'render_mode',
+                      'preprocessing', 'page_classifier', 'pdf_backend')
+
+
+def keywords_hash(keywords):
+    """Hash de la lista de palabras clave (el orden cambia el orden de las coincidencias)"""
+    return hashlib.sha256(json.dumps(list(keywords), ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def options_hash(options):
+    """Hash de las opciones de procesamiento que afectan los resultados"""
+    relevant = {key: options.get(key) for key in OPCIONES_RESULTADO}
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class AnalysisManifest:
+    """Resultados por archivo de un proyecto, para reanalizar solo lo que cambió"""
+
+    def __init__(self, output_dir, project_name):
+        os.makedirs(output_dir, exist_ok=True)
+        safe_name = project_name.replace(' ', '_')
+        self.path = os.path.join(output_dir, f"manifiesto_{safe_name}.sqlite3")
+
+        self.conn = sqlite3.connect(self.path, timeout=60)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                file_hash TEXT NOT NULL,
+                keywords_hash TEXT NOT NULL,
+                options_hash TEXT NOT NULL,
+                options TEXT NOT NULL,
+                result TEXT NOT NULL,
+                analyzed_at REAL NOT NULL
+            );
+        """)
+        self.conn.commit()
+
+    def lookup(self, file_path, keywords_digest, options_digest):
+        """Devolver los resultados guardados de un archivo si siguen vigentes, o None
+
+        Si cambió el tamaño o la fecha pero no el contenido (archivo copiado o
+        tocado), los resultados se reutilizan y se actualiza el registro.
+        """
+        path = os.path.abspath(file_path)
+        row = self.conn.execute(
+            'SELECT size, mtime, file_hash, keywords_hash, options_hash, result FROM files WHERE path = ?', (path,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        size, mtime, stored_hash, stored_keywords, stored_options, result = row
+        if stored_keywords != keywords_digest or stored_options != options_digest:
+            return None
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if (stat.st_size, stat.st_mtime) != (size, mtime):
+            if file_content_hash(path) != stored_hash:
+                return None
+            self.conn.execute('UPDATE files SET size = ?, mtime = ? WHERE path = ?',
+                              (stat.st_size, stat.st_mtime, path))
+            self.conn.commit()
+
+        return result
+
+    @staticmethod
+    def file_state(file_path):
+        """(tamaño, fecha de modificación) de un archivo antes de procesarlo"""
+        stat = os.stat(file_path)
+        return stat.st_size, stat.st_mtime
+
+    def record(self, file_results, keywords_digest, options, state):
+        """Guardar los resultados de un archivo procesado correctamente
+
+        state es el file_state() tomado antes de procesarlo: si el archivo
+        cambió mientras se procesaba, no se registra (se volverá a procesar).
+        """
+        path = os.path.abspath(file_results['file_path'])
+        try:
+            if self.file_state(path) != tuple(state):
+                return
+            file_hash = file_content_hash(path)
+        except OSError:
+            return
+        size, mtime = state
+        self.conn.execute(
+            'INSERT OR REPLACE INTO files '
+            '(path, size, mtime, file_hash, keywords_hash, options_hash, options, result, analyzed_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (path, size, mtime, file_hash, keywords_digest, options_hash(options),
+             json.dumps({key: options.get(key) for key in OPCIONES_RESULTADO}, sort_keys=True),
+             json.dumps(file_results, ensure_ascii=False), time.time())
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def load_result(stored, file_path):
+        """Reconstruir el resultado guardado con la ruta actual del archivo"""
+        file_results = json.loads(stored)
+        file_results['file'] = os.path.basename(file_path)
+        file_results['file_path'] = file_path
+        # No se procesó en esta ejecución (sus tiempos no cuentan en el perfil)
+        file_results['from_manifest'] = True
+        return file_results
+
+    def close(self):
+        """Cerrar la conexión"""
+        self.conn.close()
+
+
+class RunCheckpoint:
+    """Descripción de la última ejecución de un proyecto: archivos, configuración y estado
+
+    Se escribe al empezar (en curso) y al terminar (completa o cancelada). Si
+    el programa se cierra a mitad de camino queda "en curso" y el análisis se
+    puede reanudar con los mismos archivos y la misma configuración.
+
+    Sin caché de texto, las páginas ya extraídas de la ejecución se guardan
+    igual en pages_dir (una caché propia de la ejecución) para reanudarla
+    página por página; se borran al empezar una ejecución nueva y al
+    terminar una completa.
+    """
+
+    def __init__(self, output_dir, project_name):
+        safe_name = project_name.replace(' ', '_')
+        self.path = os.path.join(output_dir, f"ejecucion_{safe_name}.json")
+        self.pages_dir = os.path.join(output_dir, f".reanudar_{safe_name}")
+
+    def load(self):
+        """Datos de la última ejecución, o None si no hay"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def resumable(self):
+        """Datos de la última ejecución si quedó sin terminar, o None"""
+        data = self.load()
+        if data is None or data.get('status') == EJECUCION_COMPLETA:
+            return None
+        return data
+
+    def start(self, files, settings):
+        """Registrar el comienzo de una ejecución"""
+        self._write({
+            'status': EJECUCION_EN_CURSO,
+            'files': list(files),
+            'settings': settings,
+            'started_at': time.time(),
+            'finished_at': None,
+            'completed_files': 0
+        })
+
+    def finish(self, status, completed_files):
+        """Registrar el final (completa o cancelada) de la ejecución en curso"""
+        data = self.load()
+        if data is None:
+            return
+        data.update(status=status, finished_at=time.time(), completed_files=completed_files)
+        self._write(data)
+
+    def clear_pages(self):
+        """Borrar las páginas guardadas para reanudar la ejecución"""
+        shutil.rmtree(self.pages_dir, ignore_errors=True)
+
+    def _write(self, data):
+        """Escribir el archivo de forma atómica (nunca queda a medio escribir)"""
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(data, file, ensure_ascii=False, indent=1)
+        os.replace(temp_path, self.path)
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motor de Análisis OCR
+Para el Analizador OCR Universal
+
+Orquesta un análisis completo (procesamiento de PDFs, búsqueda de palabras
+clave y reportes) sin depender de Tkinter. Lo usan la interfaz gráfica y la
+línea de comandos (analizador_cli.py).
+"""
+
+import json
+import multiprocessing
+import os
+
+from backends_ocr import MOTOR_AUTOMATICO
+from backends_pdf import MOTOR_PYPDF2, RENDER_GRISES
+from clasificador_paginas import CLASIFICADOR_POR_DEFECTO
+from manifiesto import (EJECUCION_CANCELADA, EJECUCION_COMPLETA, AnalysisManifest, RunCheckpoint,
+                        keywords_hash, options_hash)
+from motor_busqueda import MODO_EXACTO
+from procesador_pdf import POLITICA_DPI_FIJA, AnalysisCancelled, analyze_files
+from reportes import StreamingReport
+
+
+def load_keywords_file(file_path):
+    """Leer palabras clave desde un archivo .txt (una por línea) o .json"""
+    with open(file_path, 'r', encoding='utf-8') as file:
+        if file_path.endswith('.json'):
+            # Soporte para JSON (opcional)
+            data = json.load(file)
+            if isinstance(data, list):
+                return data
+            elif isinstance(data, dict) and 'keywords' in data:
+                return data['keywords']
+            else:
+                raise ValueError("Formato JSON no válido")
+
+        # Archivo de texto, una palabra por línea (formato principal)
+        # Ignora líneas vacías y comentarios que empiecen con #
+        keywords = []
+        for line in file.readlines():
+            line = line.strip()
+            if line and not line.startswith('#'):
+                keywords.append(line)
+        return keywords
+
+
+class AnalysisEngine:
+    """Análisis de documentos PDF con reportes, independiente de la interfaz"""
+
+    def __init__(self, project_name, keywords, output_dir, case_sensitive=False, whole_words=True,
+                 match_mode=MODO_EXACTO, max_edits=0, ocr_enabled=True, workers=1, use_cache=True, use_index=True,
+                 page_classifier=None, dpi_policy=POLITICA_DPI_FIJA, ocr_backend=MOTOR_AUTOMATICO,
+                 pdf_backend=MOTOR_PYPDF2, preprocessing=(), render_mode=RENDER_GRISES, memory_budget_mb=None,
+                 incremental=False, log=None, progress=None):
+        self.project_name = project_name
+        self.keywords = list(keywords)
+        self.output_dir = output_dir
+        self.case_sensitive = case_sensitive
+        self.whole_words = whole_words
+        self.match_mode = match_mode
+        # Errores de OCR tolerados por palabra clave (0: solo coincidencias exactas)
+        self.max_edits = max_edits
+        self.ocr_enabled = ocr_enabled
+        self.workers = max(1, workers)
+        self.use_cache = use_cache
+        self.use_index = use_index
+        self.page_classifier = page_classifier or CLASIFICADOR_POR_DEFECTO
+        self.dpi_policy = dpi_policy
+        self.ocr_backend = ocr_backend
+        self.pdf_backend = pdf_backend
+        # Pasos de preprocesado de las imágenes antes del OCR (ver preprocesado_imagen)
+        self.preprocessing = list(preprocessing or [])
+        # Modo de color del renderizado para OCR y memoria máxima para las páginas en vuelo (MB, None: sin límite)
+        self.render_mode = render_mode
+        self.memory_budget_mb = memory_budget_mb
+        self.incremental = incremental
+        self.log_message = log if log is not None else print
+        # progress(páginas terminadas, páginas totales), opcional
+        self.progress = progress
+        # Se comparte con los procesos del pool para detenerlos entre tramos de páginas
+        self.cancel_event = multiprocessing.Event()
+        # Reanuda una ejecución sin terminar (ver from_checkpoint)
+        self.resuming = False
+
+    @classmethod
+    def from_checkpoint(cls, output_dir, project_name, log=None, progress=None):
+        """Motor y archivos de la última ejecución sin terminar del proyecto
+
+        Devuelve (None, []) si no hay nada para reanudar. El motor es
+        incremental: los archivos ya terminados se toman del manifiesto y las
+        páginas ya extraídas de los demás, de la caché de texto (o, si está
+        desactivada, de las páginas guardadas con el punto de control).
+        """
+        data = RunCheckpoint(output_dir, project_name).resumable()
+        if data is None:
+            return None, []
+        settings = dict(data['settings'], output_dir=output_dir, incremental=True)
+        engine = cls(log=log, progress=progress, **settings)
+        engine.resuming = True
+        return engine, data['files']
+
+    def settings(self):
+        """Configuración del motor (para guardarla en el punto de control y reanudar)"""
+        return {
+            'project_name': self.project_name,
+            'keywords': list(self.keywords),
+            'output_dir': self.output_dir,
+            'case_sensitive': self.case_sensitive,
+            'whole_words': self.whole_words,
+            'match_mode': self.match_mode,
+            'max_edits': self.max_edits,
+            'ocr_enabled': self.ocr_enabled,
+            'workers': self.workers,
+            'use_cache': self.use_cache,
+            'use_index': self.use_index,
+            'page_classifier': self.page_classifier,
+            'dpi_policy': self.dpi_policy,
+            'ocr_backend': self.ocr_backend,
+            'pdf_backend': self.pdf_backend,
+            'preprocessing': list(self.preprocessing),
+            'render_mode': self.render_mode,
+            'memory_budget_mb': self.memory_budget_mb,
+            'incremental': self.incremental
+        }
+
+    def cancel(self):
+        """Pedir que el análisis en curso se detenga (se puede llamar desde otro hilo)"""
+        self.cancel_event.set()
+        self.log_message("⏹️ Cancelación solicitada: se terminan los tramos de páginas en curso...")
+
+    @property
+    def index_dir(self):
+        """Carpeta del índice invertido dentro de la carpeta de resultados"""
+        return os.path.join(self.output_dir, '.indice_ocr')
+
+    def options(self):
+        """Opciones de procesamiento (valores simples para enviarlos a otros procesos)"""
+        return {
+            'keywords': list(self.keywords),
+            'case_sensitive': self.case_sensitive,
+            'whole_words': self.whole_words,
+            'match_mode': self.match_mode,
+            'max_edits': self.max_edits,
+            'ocr_enabled': self.ocr_enabled,
+            'page_classifier': self.page_classifier,
+            'dpi_policy': self.dpi_policy,
+            'ocr_backend': self.ocr_backend,
+            'pdf_backend': self.pdf_backend,
+            'preprocessing': list(self.preprocessing),
+            'render_mode': self.render_mode,
+            'memory_budget_mb': self.memory_budget_mb,
+            'cache_dir': os.path.join(self.output_dir, '.cache_ocr') if self.use_cache else None,
+            'index_dir': self.index_dir if self.use_index else None
+        }
+
+    def new_report(self):
+        """Crear el reporte incremental de este análisis"""
+        return StreamingReport(
+            self.output_dir,
+            self.project_name,
+            self.keywords,
+            case_sensitive=self.case_sensitive,
+            whole_words=self.whole_words,
+            match_mode=self.match_mode,
+            max_edits=self.max_edits,
+            ocr_enabled=self.ocr_enabled,
+            log=self.log_message
+        )
+
+    def run(self, files):
+        """Procesar los archivos y generar los reportes; devuelve el resumen del reporte
+
+        Cada archivo se escribe en el reporte al terminar, sin acumular sus
+        coincidencias en memoria, y se registra en el manifiesto del proyecto
+        como punto de control. Si se cancela, el reporte queda con los archivos
+        terminados y el resumen lleva 'cancelled' en True.
+        """
+        self.log_message("🚀 Iniciando análisis OCR universal...")
+        self.log_message(f"📋 Proyecto: {self.project_name}")
+        self.log_message(f"📁 Archivos a procesar: {len(files)}")
+        self.log_message(f"🔍 Palabras clave: {len(self.keywords)}")
+        self.log_message(f"⚙️ Procesos en paralelo: {self.workers}")
+        self.log_message("")
+
+        # Crear carpeta de salida
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        checkpoint = RunCheckpoint(self.output_dir, self.project_name)
+        if not self.resuming:
+            checkpoint.clear_pages()
+        checkpoint.start(files, self.settings())
+        self.cancel_event.clear()
+
+        report = self.new_report()
+        cancelled = False
+        try:
+            self.process_files(files, report, checkpoint)
+        except AnalysisCancelled as e:
+            cancelled = True
+            self.log_message(f"⏹️ {e}")
+        except BaseException:
+            report.abort()
+            raise
+
+        # Completar reporte detallado
+        summary = report.close()
+        summary['cancelled'] = cancelled
+        checkpoint.finish(EJECUCION_CANCELADA if cancelled else EJECUCION_COMPLETA, summary['files'])
+        if not cancelled:
+            checkpoint.clear_pages()
+
+        if cancelled:
+            self.log_message("")
+            self.log_message("⏹️ Análisis cancelado: el reporte incluye solo los archivos terminados")
+            self.log_message("⏯️ Use 'Reanudar' para continuar desde la última página procesada")
+            return summary
+
+        self.log_message("")
+        self.log_message("🎉 ¡Análisis completado exitosamente!")
+        self.log_message(f"📊 Resultados guardados en: {self.output_dir}")
+        self.log_message(f"📁 Ruta completa: {os.path.abspath(self.output_dir)}")
+        return summary
+
+    def process_files(self, files, report, checkpoint=None):
+        """Procesar los archivos y registrar cada uno en el manifiesto al terminar
+
+        En modo incremental solo se procesan los archivos nuevos o modificados
+        según el manifiesto; los resultados guardados y los nuevos se escriben
+        en el reporte en el orden de la lista de archivos. Con checkpoint y sin
+        caché de texto, las páginas extraídas se guardan en la carpeta del
+        punto de control para poder reanudar desde la última página.
+        """
+        options = self.options()
+        if checkpoint is not None and not self.use_cache:
+            options['cache_dir'] = checkpoint.pages_dir
+            if self.resuming and os.path.isdir(checkpoint.pages_dir):
+                self.log_message("⏯️ Reanudando con las páginas ya extraídas en la ejecución anterior")
+        keywords_digest = keywords_hash(self.keywords)
+        options_digest = options_hash(options)
+
+        manifest = AnalysisManifest(self.output_dir, self.project_name)
+        try:
+            if self.incremental:
+                stored = [manifest.lookup(file_path, keywords_digest, options_digest) for file_path in files]
+                pending = [i for i, result in enumerate(stored) if result is None]
+                self.log_message(f"📒 Manifiesto: {len(files) - len(pending)} archivos sin cambios, "
+                                 f"{len(pending)} a procesar")
+            else:
+                stored = [None] * len(files)
+                pending = list(range(len(files)))
+
+            # Estado de cada archivo antes de procesarlo (se guarda con sus resultados)
+            states = {}
+            for i in pending:
+                try:
+                    states[i] = manifest.file_state(files[i])
+                except OSError:
+                    states[i] = None
+
+            position = {'stored': 0, 'fresh': 0}
+
+            def emit_stored(until):
+                """Escribir los resultados guardados de los archivos anteriores a until"""
+                while position['stored'] < until:
+                    i = position['stored']
+                    if stored[i] is not None:
+                        report.add_file_result(AnalysisManifest.load_result(stored[i], files[i]))
+                    position['stored'] = i + 1
+
+            def on_result(file_results):
+                i = pending[position['fresh']]
+                position['fresh'] += 1
+                emit_stored(i)
+                report.add_file_result(file_results)
+                position['stored'] = i + 1
+                if not file_results.get('error') and states[i] is not None:
+                    manifest.record(file_results, keywords_digest, options, states[i])
+
+            if pending:
+                analyze_files([files[i] for i in pending], options, workers=self.workers,
+                              log=self.log_message, on_result=on_result, cancel_event=self.cancel_event,
+                              on_progress=self.progress)
+            emit_stored(len(files))
+        finally:
+            manifest.close()
+
+    def has_index(self):
+        """Indica si la carpeta de resultados ya tiene documentos indexados"""
+        return os.path.exists(os.path.join(self.index_dir, 'indice.sqlite3'))
+
+    def search_index(self):
+        """Repetir la búsqueda sobre los documentos indexados; devuelve el resumen del reporte"""
+        from indice_invertido import TextIndex
+
+        text_index = TextIndex(self.index_dir)
+        report = self.new_report()
+        try:
+            self.log_message("🔎 Buscando en documentos indexados...")
+            self.log_message(f"📁 Documentos en el índice: {text_index.document_count()}")
+            self.log_message(f"🔍 Palabras clave: {len(self.keywords)}")
+
+            for file_results in text_index.iter_search(
+                    self.keywords,
+                    case_sensitive=self.case_sensitive,
+                    whole_words=self.whole_words,
+                    match_mode=self.match_mode,
+                    max_edits=self.max_edits):
+                report.add_file_result(file_results)
+        except BaseException:
+            report.abort()
+            raise
+        finally:
+            text_index.close()
+
+        self.log_message(f"✅ {report.total_matches} coincidencias en {report.files_with_matches} documentos")
+        return report.close()
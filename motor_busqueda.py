@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motor de Búsqueda de Palabras Clave
+Para el Analizador OCR Universal
+
+Busca todas las palabras clave de un proyecto en una sola pasada por página
+usando un autómata Aho-Corasick construido una única vez por análisis.
+
+Además de la coincidencia exacta hay dos modos normalizados, pensados para
+texto de OCR que pierde o cambia las tildes: sin tildes (ignora tildes y
+mayúsculas) y por raíz (además reduce cada palabra a su raíz en español, de
+modo que "gestión" también encuentra "gestiones" y "gestion"). Las posiciones
+de las coincidencias siempre se refieren al texto original de la página.
+"""
+
+import re
+import unicodedata
+
+# Misma definición de carácter de palabra que usa \b en el módulo re
+_WORD_CHAR = re.compile(r'\w')
+_TOKEN = re.compile(r'\w+')
+
+# Modos de coincidencia de las palabras clave
+MODO_EXACTO = 'exacto'
+MODO_SIN_TILDES = 'sin_tildes'
+MODO_RAIZ = 'raiz'
+MODOS_COINCIDENCIA = (MODO_EXACTO, MODO_SIN_TILDES, MODO_RAIZ)
+
+NOMBRES_MODOS = {
+    MODO_EXACTO: 'exacta',
+    MODO_SIN_TILDES: 'sin tildes ni mayúsculas',
+    MODO_RAIZ: 'por raíz (sin tildes ni mayúsculas, singular y plural, masculino y femenino)'
+}
+
+# Las palabras más cortas no se reducen a su raíz
+RAIZ_LONGITUD_MINIMA = 5
+
+
+def fold_case(text):
+    """Pasar texto a minúsculas conservando la longitud (y por lo tanto las posiciones)"""
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    # Algunos caracteres (p. ej. 'İ') cambian de longitud al pasar a minúsculas:
+    # se usa su primer carácter, igual que re.IGNORECASE
+    return ''.join(c.lower()[0] if c.lower() else c for c in text)
+
+
+class _AccentFoldTable(dict):
+    """Tabla para str.translate que quita tildes y pasa a minúsculas, carácter por carácter
+
+    Cada carácter se calcula la primera vez que aparece. Un carácter siempre
+    se convierte en uno solo, así que las posiciones no cambian.
+    """
+
+    def __missing__(self, code):
+        char = chr(code)
+        base = ''.join(c for c in unicodedata.normalize('NFD', char) if not unicodedata.combining(c))
+        folded = fold_case(base if len(base) == 1 else char)
+        self[code] = folded
+        return folded
+
+
+_ACCENT_FOLD = _AccentFoldTable()
+
+
+def fold_accents(text):
+    """Quitar tildes y pasar a minúsculas conservando la longitud del texto"""
+    if text.isascii():
+        return text.lower()
+    return text.translate(_ACCENT_FOLD)
+
+
+def spanish_stem(word):
+    """Raíz liviana de una palabra en español (sin tildes y en minúsculas)
+
+    Solo quita las terminaciones de género y número, como el stemmer liviano
+    de Savoy: "contratos", "contrata" y "contrato" dan "contrat";
+    "administraciones" y "administración" dan "administracion"; "luces" da
+    "luz". No quita sufijos derivativos, para no unir palabras de distinto
+    significado.
+    """
+    word = fold_accents(word)
+    if len(word) < RAIZ_LONGITUD_MINIMA:
+        return word
+    if word[-1] in 'aeo':
+        return word[:-1]
+    if word[-1] == 's':
+        if word.endswith('eses'):
+            return word[:-2]
+        if word.endswith('ces'):
+            return word[:-3] + 'z'
+        if word[-2] in 'aeo':
+            return word[:-2]
+    return word
+
+
+def stem_text(text):
+    """Reducir cada palabra del texto a su raíz, separadas por un espacio
+
+    Devuelve (texto de raíces, inicios, fines): para cada carácter del texto
+    de raíces, el inicio y el fin en el texto original de la palabra a la que
+    pertenece (o del espacio que la sigue).
+    """
+    pieces = []
+    starts = []
+    ends = []
+    for token in _TOKEN.finditer(text):
+        start, end = token.span()
+        if pieces:
+            starts.append(start)
+            ends.append(start)
+        stem = spanish_stem(token.group())
+        pieces.append(stem)
+        starts.extend([start] * len(stem))
+        ends.extend([end] * len(stem))
+    return ' '.join(pieces), starts, ends
+
+
+# Caracteres de contexto antes y después de cada coincidencia
+CONTEXTO_CARACTERES = 50
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+class PageContext:
+    """Texto de una página preparado para extraer el contexto de sus coincidencias
+
+    Los espacios se normalizan una sola vez por página (cada secuencia de
+    espacios y saltos de línea pasa a ser un espacio) y se guarda, para cada
+    posición del texto original, su posición en el texto normalizado. Así el
+    contexto y el resaltado de cada coincidencia son recortes directos.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        pieces = []
+        offsets = []
+        position = 0
+        normalized_length = 0
+        for run in _WHITESPACE.finditer(text):
+            start, end = run.span()
+            offsets.extend(range(normalized_length, normalized_length + start - position))
+            normalized_length += start - position
+            pieces.append(text[position:start])
+            # Todos los espacios de la secuencia corresponden al mismo espacio normalizado
+            offsets.extend([normalized_length] * (end - start))
+            normalized_length += 1
+            pieces.append(' ')
+            position = end
+        offsets.extend(range(normalized_length, normalized_length + len(text) - position))
+        pieces.append(text[position:])
+        self.normalized = ''.join(pieces)
+        self.offsets = offsets
+
+    def match(self, page_num, keyword, start, end, distance=0):
+        """Construir el diccionario de una coincidencia (start < end) con su contexto
+
+        distance es la distancia de edición a la palabra clave (0 si es exacta).
+        """
+        text = self.text
+        normalized = self.normalized
+        offsets = self.offsets
+        matched_text = text[start:end]
+
+        # Contexto: 50 caracteres antes y después en el texto original, con los espacios normalizados
+        context_start = offsets[max(0, start - CONTEXTO_CARACTERES)]
+        context_end = offsets[min(len(text), end + CONTEXTO_CARACTERES) - 1] + 1
+        if normalized[context_start] == ' ':
+            context_start += 1
+        if context_end > context_start and normalized[context_end - 1] == ' ':
+            context_end -= 1
+        context = normalized[context_start:context_end]
+
+        # Resaltar solo el tramo de la coincidencia
+        match_start = min(max(offsets[start], context_start), context_end) - context_start
+        match_end = min(max(offsets[end - 1] + 1, context_start), context_end) - context_start
+        highlighted_context = (context[:match_start] + '**' + context[match_start:match_end] + '**'
+                               + context[match_end:])
+
+        return {
+            'page': page_num,
+            'keyword': keyword,
+            'matched_text': matched_text,
+            'context': context,
+            'highlighted_context': highlighted_context,
+            'position': start,
+            'distance': distance
+        }
+
+
+class KeywordMatcher:
+    """Buscador de múltiples palabras clave en una sola pasada (Aho-Corasick)"""
+
+    def __init__(self, keywords, case_sensitive=False, whole_words=True, match_mode=MODO_EXACTO):
+        self.keywords = list(keywords)
+        self.case_sensitive = case_sensitive
+        self.whole_words = whole_words
+        # Los modos normalizados ignoran siempre las mayúsculas
+        self.match_mode = match_mode or MODO_EXACTO
+
+        # Estado 0 = raíz. goto[s] mapea carácter -> estado siguiente
+        self._goto = [{}]
+        self._fail = [0]
+        # Para cada estado: lista de (longitud, índices de palabras clave) que terminan ahí
+        self._output = [[]]
+
+        for index, keyword in enumerate(self.keywords):
+            pattern = self._normalize_keyword(keyword)
+            if not pattern:
+                continue
+            self._add_pattern(pattern, index)
+
+        self._build_failure_links()
+
+    def _fold(self, text):
+        """Normalizar texto según el modo y la sensibilidad a mayúsculas configurados"""
+        if self.match_mode != MODO_EXACTO:
+            return fold_accents(text)
+        return text if self.case_sensitive else fold_case(text)
+
+    def _normalize_keyword(self, keyword):
+        """Patrón que se busca para una palabra clave"""
+        if self.match_mode == MODO_RAIZ:
+            return stem_text(keyword)[0]
+        return self._fold(keyword)
+
+    def _add_pattern(self, pattern, keyword_index):
+        """Agregar un patrón al trie"""
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = next_state
+            state = next_state
+
+        # Palabras clave idénticas tras normalizar comparten el mismo estado final
+        for length, indices in self._output[state]:
+            if length == len(pattern):
+                indices.append(keyword_index)
+                return
+        self._output[state].append((len(pattern), [keyword_index]))
+
+    def _build_failure_links(self):
+        """Calcular los enlaces de fallo por recorrido en anchura"""
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def _is_boundary(self, text, pos):
+        """Equivalente a \\b del módulo re en la posición indicada"""
+        before = pos > 0 and _WORD_CHAR.match(text, pos - 1) is not None
+        after = pos < len(text) and _WORD_CHAR.match(text, pos) is not None
+        return before != after
+
+    def find_matches(self, text):
+        """Devolver (índice de palabra clave, inicio, fin) para cada coincidencia
+
+        Reproduce la semántica de re.finditer por palabra clave: las coincidencias
+        de una misma palabra no se solapan, pero sí pueden solaparse las de
+        palabras distintas. El resultado queda ordenado por palabra clave y posición.
+        En el modo por raíz la búsqueda se hace sobre las raíces de la página y
+        cada coincidencia abarca las palabras completas del texto original.
+        """
+        if self.match_mode == MODO_RAIZ:
+            stems, starts, ends = stem_text(text)
+            return [(keyword_index, starts[start], ends[end - 1])
+                    for keyword_index, start, end in self._scan(stems, stems)]
+        return self._scan(self._fold(text), text)
+
+    def _scan(self, folded, text):
+        """Recorrer el texto normalizado con el autómata (text: el mismo texto sin normalizar)"""
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+
+        candidates = []
+        state = 0
+        for pos, char in enumerate(folded):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                end = pos + 1
+                for length, indices in output[state]:
+                    for keyword_index in indices:
+                        candidates.append((keyword_index, end - length, end))
+
+        candidates.sort()
+
+        found = []
+        last_end = {}
+        for keyword_index, start, end in candidates:
+            if start < last_end.get(keyword_index, 0):
+                continue
+            if self.whole_words and not (self._is_boundary(text, start) and self._is_boundary(text, end)):
+                continue
+            last_end[keyword_index] = end
+            found.append((keyword_index, start, end))
+
+        return found
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Perfil de Ejecución
+Para el Analizador OCR Universal
+
+Acumula el tiempo de cada etapa del análisis (extracción de texto directo,
+clasificación, renderizado, preprocesado, OCR, búsqueda de palabras clave,
+índice, reportes) por página, por archivo y para toda la ejecución, y lo
+guarda en un JSON junto al reporte, con el pico de memoria de los procesos.
+El detalle por página queda en el CSV de páginas.
+"""
+
+import contextlib
+import json
+import os
+import time
+
+# Etapas medidas en cada página (campo '<etapa>_ms' de la clasificación de páginas)
+ETAPAS_PAGINA = ('extract', 'classify', 'render', 'preprocess', 'ocr', 'match', 'index')
+
+# Etapas medidas al escribir los reportes
+ETAPAS_REPORTE = ('report', 'excel')
+
+NOMBRES_ETAPAS = {
+    'extract': 'extracción',
+    'classify': 'clasificación',
+    'render': 'renderizado',
+    'preprocess': 'preprocesado',
+    'ocr': 'OCR',
+    'match': 'búsqueda',
+    'index': 'índice',
+    'report': 'reporte',
+    'excel': 'Excel'
+}
+
+
+class RunProfile:
+    """Tiempos por etapa de una ejecución, con el resumen de cada archivo"""
+
+    def __init__(self, path, project_name):
+        self.path = path
+        self.project_name = project_name
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.files = []
+        # Pico de memoria de los procesos que analizaron los archivos (MB)
+        self.peak_rss_mb = None
+
+    def add(self, stage, ms):
+        """Registrar una duración (en milisegundos) de una etapa"""
+        stats = self.stages.setdefault(stage, {'total_ms': 0.0, 'count': 0, 'max_ms': 0.0})
+        stats['total_ms'] += ms
+        stats['count'] += 1
+        if ms > stats['max_ms']:
+            stats['max_ms'] = ms
+
+    @contextlib.contextmanager
+    def measure(self, stage):
+        """Medir el bloque como una duración de la etapa"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, (time.perf_counter() - started) * 1000)
+
+    def add_file(self, result):
+        """Registrar los tiempos por página y el resumen de un archivo terminado
+
+        Los archivos tomados del manifiesto (análisis incremental) figuran en
+        el perfil pero sus tiempos, de una ejecución anterior, no se suman.
+        """
+        reused = bool(result.get('from_manifest'))
+        stage_ms = {}
+        decisions = {}
+        for record in result.get('page_records', []):
+            decisions[record['decision']] = decisions.get(record['decision'], 0) + 1
+            if reused:
+                continue
+            for stage in ETAPAS_PAGINA:
+                ms = record.get(f'{stage}_ms') or 0.0
+                if ms > 0:
+                    self.add(stage, ms)
+                    stage_ms[stage] = stage_ms.get(stage, 0.0) + ms
+
+        peak = None if reused else result.get('peak_rss_mb')
+        if peak is not None:
+            self.peak_rss_mb = max(peak, self.peak_rss_mb or 0.0)
+
+        try:
+            file_bytes = os.path.getsize(result['file_path'])
+        except OSError:
+            file_bytes = None
+
+        self.files.append({
+            'file': result['file'],
+            'file_path': result['file_path'],
+            'bytes': file_bytes,
+            'pages': len(result.get('page_records', [])),
+            'elapsed_ms': 0.0 if reused else round(result.get('elapsed_ms', 0.0), 3),
+            'from_manifest': reused,
+            'decisions': decisions,
+            'stage_ms': {stage: round(ms, 3) for stage, ms in stage_ms.items()},
+            'matches': result['total_matches'],
+            'peak_rss_mb': peak,
+            'error': result.get('error')
+        })
+
+    def summary_line(self):
+        """Resumen de una línea para el log: tiempo total de cada etapa"""
+        parts = [f"{NOMBRES_ETAPAS[stage]} {self.stages[stage]['total_ms'] / 1000:.1f} s"
+                 for stage in ETAPAS_PAGINA + ETAPAS_REPORTE if stage in self.stages]
+        if self.peak_rss_mb is not None:
+            parts.append(f"memoria máxima por proceso {self.peak_rss_mb:.0f} MB")
+        return ", ".join(parts)
+
+    def write(self, **extra):
+        """Guardar el perfil en JSON; devuelve su ruta"""
+        stages = {}
+        for stage in ETAPAS_PAGINA + ETAPAS_REPORTE:
+            if stage not in self.stages:
+                continue
+            stats = self.stages[stage]
+            stages[stage] = {
+                'total_ms': round(stats['total_ms'], 3),
+                'count': stats['count'],
+                'mean_ms': round(stats['total_ms'] / stats['count'], 3),
+                'max_ms': round(stats['max_ms'], 3)
+            }
+
+        profile = dict({
+            'project': self.project_name,
+            'wall_ms': round((time.perf_counter() - self.started) * 1000, 3),
+            'files': len(self.files),
+            'pages': sum(entry['pages'] for entry in self.files),
+            'bytes': sum(entry['bytes'] or 0 for entry in self.files),
+            'peak_rss_mb': self.peak_rss_mb,
+            'stages': stages,
+            'file_details': self.files
+        }, **extra)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(profile, f, ensure_ascii=False, indent=1)
+        return self.path
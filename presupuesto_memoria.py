@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Presupuesto de Memoria para el Renderizado
+Para el Analizador OCR Universal
+
+Una página renderizada a 300 DPI en color ocupa unos 26 MB, y con varios
+procesos en paralelo cada uno puede tener más de una en memoria a la vez. El
+presupuesto reparte un máximo de memoria entre todos los procesos del
+análisis: antes de renderizar y procesar una página cada proceso reserva su
+tamaño estimado y, si el presupuesto está agotado, espera a que otro libere
+el suyo. Así la cantidad de páginas en vuelo se ajusta sola al tamaño de las
+páginas y a la memoria disponible, sin bajar la cantidad de procesos.
+"""
+
+import contextlib
+import multiprocessing
+import sys
+
+# Tamaño de página usado si no se puede leer el de la página (carta, en puntos)
+PAGINA_POR_DEFECTO = (612.0, 792.0)
+
+# Segundos entre revisiones de la cancelación mientras se espera memoria
+ESPERA_PRESUPUESTO = 0.5
+
+
+def peak_rss_mb(include_children=False):
+    """Pico de memoria del proceso (y opcionalmente de sus procesos hijos) en MB, o None si no se puede medir"""
+    try:
+        import resource
+    except ImportError:
+        resource = None
+
+    if resource is not None:
+        # ru_maxrss está en KB en Linux y en bytes en macOS
+        unit = 1 if sys.platform == 'darwin' else 1024
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit
+        if include_children:
+            peak = max(peak, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit)
+        return round(peak / (1024 * 1024), 1)
+
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        peak = getattr(info, 'peak_wset', None) or info.rss
+        return round(peak / (1024 * 1024), 1)
+    except ImportError:
+        return None
+
+
+def page_memory_bytes(page_size, dpi, bytes_per_pixel):
+    """Memoria estimada de una página de page_size (ancho, alto en puntos) renderizada a dpi"""
+    width, height = page_size or PAGINA_POR_DEFECTO
+    pixels = (abs(width) / 72 * dpi) * (abs(height) / 72 * dpi)
+    return int(pixels * bytes_per_pixel)
+
+
+class MemoryBudget:
+    """Memoria máxima para las páginas en vuelo, compartida entre los procesos del pool
+
+    Se crea en el proceso principal y se pasa a los procesos del pool al
+    crearlos (como el evento de cancelación). Una página más grande que todo
+    el presupuesto igual se procesa, pero sola.
+    """
+
+    def __init__(self, limit_mb):
+        self.limit = int(limit_mb * 1024 * 1024)
+        self._used = multiprocessing.Value('q', 0, lock=False)
+        self._condition = multiprocessing.Condition()
+
+    @contextlib.contextmanager
+    def reserve(self, size, cancel_event=None):
+        """Reservar size bytes mientras dura el bloque, esperando si el presupuesto está agotado
+
+        Si se activa cancel_event mientras espera, sale sin reservar y el
+        bloque se ejecuta igual (quien llama comprueba la cancelación).
+        """
+        size = min(int(size), self.limit)
+        reserved = 0
+        with self._condition:
+            while self._used.value + size > self.limit:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                self._condition.wait(ESPERA_PRESUPUESTO)
+            else:
+                self._used.value += size
+                reserved = size
+        try:
+            yield
+        finally:
+            if reserved:
+                with self._condition:
+                    self._used.value -= reserved
+                    self._condition.notify_all()
+
+    @property
+    def used_mb(self):
+        """Memoria reservada en este momento, en MB"""
+        return self._used.value / (1024 * 1024)
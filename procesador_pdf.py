@@ -0,0 +1,1059 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Procesador de Documentos PDF
+Para el Analizador OCR Universal
+
+Extrae el texto de cada página (directo u OCR), busca las palabras clave y
+reparte el trabajo entre varios procesos cuando se analizan muchos documentos.
+"""
+
+import contextlib
+import heapq
+import os
+import shutil
+import signal
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from backends_ocr import MOTOR_AUTOMATICO, get_ocr_backend
+from backends_pdf import BYTES_POR_PIXEL_RENDER, MOTOR_PYPDF2, RENDER_BN, RENDER_GRISES, get_session_class
+from busqueda_aproximada import FuzzyMatcher
+from cache_texto import CACHE_MAX_MB, TextCache, file_content_hash
+from clasificador_paginas import AMBOS, DIRECTO, get_classifier
+from motor_busqueda import MODO_EXACTO, KeywordMatcher, PageContext
+from presupuesto_memoria import MemoryBudget, page_memory_bytes, peak_rss_mb
+
+# Cantidad de páginas que clasifica cada tarea del pool de procesos
+PAGINAS_POR_TAREA = 10
+
+# Las páginas que necesitan OCR se reparten aparte, de a esta cantidad por tarea
+PAGINAS_OCR_POR_TAREA = 1
+
+# Tareas enviadas a la vez al pool por cada proceso (el resto espera en la cola propia)
+TAREAS_POR_PROCESO = 2
+
+# Archivos que la clasificación puede adelantarse al próximo archivo a entregar
+ARCHIVOS_ADELANTADOS = 200
+
+# Máximo de páginas renderizadas por llamada a poppler (se escriben en archivos temporales)
+PAGINAS_POR_RENDER = 4
+
+# Memoria estimada por pixel durante el OCR de una página, además de su imagen
+# (copias internas de tesseract) y la adicional del preprocesado (máscaras y copias intermedias)
+BYTES_OCR_POR_PIXEL = 2
+BYTES_PREPROCESADO_POR_PIXEL = 7
+
+# Parámetros de OCR por defecto
+DPI_OCR = 300
+IDIOMA_OCR = 'spa'
+
+# Política de resolución del OCR: 'fija' renderiza siempre a DPI_OCR;
+# 'adaptativa' hace una primera pasada a DPI_OCR_BAJA y repite a DPI_OCR solo
+# las zonas (o páginas) cuya confianza media queda debajo de CONFIANZA_MINIMA
+POLITICA_DPI_FIJA = 'fija'
+POLITICA_DPI_ADAPTATIVA = 'adaptativa'
+POLITICAS_DPI = (POLITICA_DPI_FIJA, POLITICA_DPI_ADAPTATIVA)
+DPI_OCR_BAJA = 150
+CONFIANZA_MINIMA = 70
+
+# Si las zonas dudosas tienen más de esta fracción de las palabras, se repite la página completa
+FRACCION_REPETIR_PAGINA = 0.5
+
+
+def group_page_runs(pages, max_size):
+    """Agrupar números de página ordenados en tramos contiguos de tamaño máximo max_size"""
+    runs = []
+    for page_num in pages:
+        if runs and page_num == runs[-1][1] + 1 and page_num - runs[-1][0] < max_size:
+            runs[-1][1] = page_num
+        else:
+            runs.append([page_num, page_num])
+    return [tuple(run) for run in runs]
+
+
+def ocr_words(data):
+    """Palabras reconocidas en la salida de image_to_data (Output.DICT)"""
+    words = []
+    for i, text in enumerate(data['text']):
+        conf = float(data['conf'][i])
+        if conf < 0 or not str(text).strip():
+            continue
+        words.append({
+            'block': data['block_num'][i],
+            'par': data['par_num'][i],
+            'line': data['line_num'][i],
+            'left': data['left'][i],
+            'top': data['top'][i],
+            'width': data['width'][i],
+            'height': data['height'][i],
+            'conf': conf,
+            'text': str(text)
+        })
+    return words
+
+
+def words_to_text(words):
+    """Reconstruir el texto a partir de las palabras: una línea por renglón,
+    con una línea en blanco entre párrafos"""
+    lines = []
+    previous = None
+    for word in words:
+        key = (word['block'], word['par'], word['line'])
+        if key != previous:
+            if previous is not None and key[:2] != previous[:2]:
+                lines.append([])
+            lines.append([])
+            previous = key
+        lines[-1].append(word['text'])
+    return '\n'.join(' '.join(line) for line in lines)
+
+
+def mean_confidence(words):
+    """Confianza media de las palabras, ponderada por su longitud (None si no hay palabras)"""
+    total = sum(len(word['text']) for word in words)
+    if total == 0:
+        return None
+    return sum(word['conf'] * len(word['text']) for word in words) / total
+
+
+def add_duration(details, page_num, key, started):
+    """Sumar a details[page_num][key] los milisegundos transcurridos desde started"""
+    page_details = details.setdefault(page_num, {})
+    elapsed = (time.perf_counter() - started) * 1000
+    page_details[key] = round(page_details.get(key, 0.0) + elapsed, 3)
+
+
+def group_blocks(words):
+    """Agrupar las palabras por bloque de texto, en el orden de lectura"""
+    blocks = {}
+    for word in words:
+        blocks.setdefault(word['block'], []).append(word)
+    return blocks
+
+
+class AnalysisCancelled(Exception):
+    """El análisis se detuvo a pedido del usuario (el trabajo terminado no se pierde)"""
+
+
+class PDFProcessor:
+    """Extracción de texto y búsqueda de palabras clave sin dependencias de la GUI
+
+    Las opciones son un diccionario simple (keywords, case_sensitive,
+    whole_words, ocr_enabled y opcionalmente match_mode, max_edits, dpi,
+    dpi_policy, render_mode, preprocessing, ocr_lang, ocr_backend,
+    pdf_backend, page_classifier, cache_dir...) para poder enviarlo a otros
+    procesos.
+    """
+
+    def __init__(self, options, log=None, cancel_event=None, memory_budget=None):
+        self.options = options
+        self.log_message = log if log is not None else (lambda message: None)
+        # Evento (threading o multiprocessing) para detener el análisis entre tramos de páginas
+        self.cancel_event = cancel_event
+        # Presupuesto de memoria compartido para las páginas renderizadas (opcional, ver MemoryBudget)
+        self.memory_budget = memory_budget
+        # Función opcional que recibe la cantidad de páginas terminadas (para mostrar el avance)
+        self.on_pages_done = None
+
+        # Motor de PDF: cada documento se abre una vez en una sesión
+        # (ImportError se propaga al llamador si faltan sus librerías)
+        self.session_class = get_session_class(options.get('pdf_backend', MOTOR_PYPDF2))
+
+        # Motor de OCR: tesserocr con el modelo cargado entre páginas, o pytesseract
+        self.ocr_backend = get_ocr_backend(options.get('ocr_backend', MOTOR_AUTOMATICO),
+                                           options.get('ocr_lang', IDIOMA_OCR))
+
+        # Construir el buscador de palabras clave una sola vez por análisis
+        self.keyword_matcher = KeywordMatcher(
+            options['keywords'],
+            case_sensitive=options['case_sensitive'],
+            whole_words=options['whole_words'],
+            match_mode=options.get('match_mode', MODO_EXACTO)
+        )
+        # Búsqueda aproximada (tolerante a errores de OCR), opcional
+        self.fuzzy_matcher = None
+        if options.get('max_edits'):
+            self.fuzzy_matcher = FuzzyMatcher(
+                options['keywords'],
+                case_sensitive=options['case_sensitive'],
+                match_mode=options.get('match_mode', MODO_EXACTO),
+                max_edits=options['max_edits']
+            )
+
+        # Preprocesado de las imágenes antes del OCR (opcional, ver preprocesado_imagen)
+        self.preprocessing = list(options.get('preprocessing') or [])
+        self.preprocess_image = None
+        if self.preprocessing:
+            from preprocesado_imagen import preprocess_image
+            self.preprocess_image = preprocess_image
+
+        # Clasificador que decide texto directo, OCR o ambos para cada página
+        self.page_classifier = get_classifier(options.get('page_classifier'))
+        self.last_page_records = []
+        self.deferred_pages = {}
+
+        # Caché de texto por página (opcional)
+        self.text_cache = None
+        if options.get('cache_dir'):
+            self.text_cache = TextCache(options['cache_dir'], options.get('cache_max_mb', CACHE_MAX_MB))
+
+        # Índice invertido para repetir búsquedas sin reprocesar (opcional)
+        self.text_index = None
+        if options.get('index_dir'):
+            from indice_invertido import TextIndex
+            self.text_index = TextIndex(options['index_dir'])
+
+    def open_document(self, file_path):
+        """Sesión del documento con el motor de PDF configurado (se abre al usarla)"""
+        return self.session_class(file_path)
+
+    def count_pages(self, file_path):
+        """Contar las páginas de un PDF"""
+        file_hash = self.text_cache.file_hash(file_path) if self.text_cache else None
+        if file_hash:
+            page_count = self.text_cache.get_page_count(file_hash)
+            if page_count is not None:
+                return page_count
+
+        with self.open_document(file_path) as document:
+            page_count = document.page_count
+
+        if file_hash:
+            self.text_cache.set_page_count(file_hash, page_count)
+            self.text_cache.commit()
+        return page_count
+
+    def process_pdf_file(self, file_path, first_page=None, last_page=None, defer_ocr=False):
+        """Procesar un archivo PDF (o un rango de páginas) y buscar palabras clave
+
+        El documento se abre una sola vez (y solo si alguna página no está en
+        la caché) para extraer texto, clasificar y renderizar las páginas.
+        La decisión del clasificador para cada página y la duración de cada
+        etapa (extract_ms, classify_ms, render_ms, preprocess_ms, ocr_ms,
+        match_ms, index_ms) quedan en self.last_page_records al terminar.
+
+        Con defer_ocr las páginas que necesitan OCR (y no lo tienen en la
+        caché) no se procesan: sus coincidencias y su clasificación no se
+        incluyen y quedan en self.deferred_pages ({página: extract_ms}) para
+        procesarlas después, cada una en su propia llamada.
+        """
+        matches = []
+        page_texts = {}
+        page_records = {}
+        direct_texts = {}
+        failed_pages = set()
+        dpi = self.options.get('dpi', DPI_OCR)
+        lang = self.options.get('ocr_lang', IDIOMA_OCR)
+        ocr_enabled = self.options.get('ocr_enabled', True)
+        classifier = self.page_classifier
+        cache = self.text_cache
+        self.last_page_records = []
+        self.deferred_pages = {}
+
+        self.check_cancelled()
+        with self.open_document(file_path) as document:
+            # Las claves de caché dependen del motor de PDF
+            direct_method = 'direct' + document.cache_suffix
+            ocr_method = self.ocr_cache_method() + document.cache_suffix
+            decision_key = classifier.name + document.cache_suffix
+            ocr_pages = []
+
+            try:
+                file_hash = cache.file_hash(file_path) if cache else None
+                page_count = cache.get_page_count(file_hash) if cache else None
+
+                if page_count is None:
+                    page_count = document.page_count
+                    if cache:
+                        cache.set_page_count(file_hash, page_count)
+
+                first = first_page or 1
+                last = last_page or page_count
+
+                for page_num in range(first, last + 1):
+                    try:
+                        extract_ms = 0.0
+                        text = cache.get(file_hash, page_num, direct_method) if cache else None
+                        if text is None:
+                            # Extraer texto directo
+                            started = time.perf_counter()
+                            text = document.extract_text(page_num)
+                            extract_ms = (time.perf_counter() - started) * 1000
+                            if cache:
+                                cache.put(file_hash, page_num, direct_method, text)
+
+                        # Decidir si alcanza el texto directo o hace falta OCR
+                        record = None
+                        if cache and ocr_enabled:
+                            record = cache.get_decision(file_hash, page_num, decision_key)
+                        if record is None:
+                            started = time.perf_counter()
+                            record = classifier.classify(
+                                text, lambda: document.image_coverage(page_num), ocr_enabled
+                            )
+                            record['classify_ms'] = round((time.perf_counter() - started) * 1000, 3)
+                            if cache and ocr_enabled:
+                                cache.put_decision(file_hash, page_num, decision_key, record)
+                        record = dict(record, page=page_num, classifier=classifier.name,
+                                      extract_ms=round(extract_ms, 3), render_ms=0.0, ocr_ms=0.0)
+                        page_records[page_num] = record
+
+                        if record['decision'] == DIRECTO:
+                            self.log_message(f"   📝 Página {page_num}: Texto extraído directamente")
+                            page_texts[page_num] = text
+                            continue
+
+                        if record['decision'] == AMBOS:
+                            direct_texts[page_num] = text
+                        ocr_text = cache.get(file_hash, page_num, ocr_method, dpi, lang) if cache else None
+                        if ocr_text is None:
+                            action = "OCR en cola" if defer_ocr else "Usando OCR"
+                            self.log_message(f"   📝 Página {page_num}: {action} ({record['reason']})")
+                            ocr_pages.append(page_num)
+                        else:
+                            self.log_message(f"   📝 Página {page_num}: Texto OCR recuperado de la caché")
+                            page_texts[page_num] = ocr_text
+
+                    except Exception as e:
+                        self.log_message(f"   ⚠️ Error en página {page_num}: {str(e)}")
+
+            except Exception as e:
+                self.log_message(f"   ❌ Error leyendo PDF: {str(e)}")
+                raise
+
+            finally:
+                if cache:
+                    cache.commit()
+
+            if defer_ocr:
+                for page_num in ocr_pages:
+                    self.deferred_pages[page_num] = page_records.pop(page_num)['extract_ms']
+                    direct_texts.pop(page_num, None)
+                ocr_pages = []
+
+            self.pages_done(last - first + 1 - len(ocr_pages) - len(self.deferred_pages))
+
+            # Renderizar las páginas escaneadas por tramos contiguos, desde la misma sesión
+            for batch_first, batch_last in group_page_runs(ocr_pages, self.options.get('render_batch_size', PAGINAS_POR_RENDER)):
+                # Las páginas de los tramos anteriores ya están guardadas en la caché
+                self.check_cancelled()
+                ocr_details = {}
+                ocr_texts = self.extract_text_with_ocr_batch(document, batch_first, batch_last, ocr_details)
+                for page_num in range(batch_first, batch_last + 1):
+                    page_records[page_num].update(ocr_details.get(page_num, {}))
+                    # Las páginas con error quedan vacías y no se guardan en la caché
+                    page_texts[page_num] = ocr_texts.get(page_num, "")
+                    if page_num not in ocr_texts:
+                        failed_pages.add(page_num)
+                    elif cache:
+                        cache.put(file_hash, page_num, ocr_method, ocr_texts[page_num], dpi, lang)
+                if cache:
+                    cache.commit()
+                self.pages_done(batch_last - batch_first + 1)
+
+        # Las páginas con ambos textos combinan el directo y el OCR
+        for page_num, text in direct_texts.items():
+            if page_num in page_texts:
+                page_texts[page_num] = text + "\n" + page_texts[page_num] if page_texts[page_num] else text
+
+        # Alimentar el índice invertido con el texto de las páginas correctas
+        if self.text_index:
+            if file_hash is None:
+                file_hash = file_content_hash(file_path)
+            for page_num in sorted(page_texts):
+                if page_num not in failed_pages:
+                    started = time.perf_counter()
+                    self.text_index.add_page(file_hash, file_path, page_num, page_texts[page_num])
+                    page_records[page_num]['index_ms'] = round((time.perf_counter() - started) * 1000, 3)
+            self.text_index.commit()
+
+        # Buscar palabras clave en el texto, en orden de página
+        for page_num in sorted(page_texts):
+            try:
+                started = time.perf_counter()
+                page_matches = self.find_keywords_in_text(page_texts[page_num], page_num)
+                matches.extend(page_matches)
+                if page_num in page_records:
+                    page_records[page_num]['match_ms'] = round((time.perf_counter() - started) * 1000, 3)
+                    page_records[page_num]['text_bytes'] = len(page_texts[page_num].encode('utf-8'))
+            except Exception as e:
+                self.log_message(f"   ⚠️ Error en página {page_num}: {str(e)}")
+
+        self.last_page_records = [page_records[page_num] for page_num in sorted(page_records)]
+        return matches
+
+    def pages_done(self, count):
+        """Avisar a on_pages_done que terminaron count páginas"""
+        if self.on_pages_done is not None and count > 0:
+            self.on_pages_done(count)
+
+    def check_cancelled(self):
+        """Lanzar AnalysisCancelled si se pidió detener el análisis"""
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise AnalysisCancelled("Análisis cancelado")
+
+    def extract_text_with_ocr(self, file_path, page_num):
+        """Extraer texto usando OCR para una página específica"""
+        with self.open_document(file_path) as document:
+            return self.extract_text_with_ocr_batch(document, page_num, page_num).get(page_num, "")
+
+    def ocr_cache_method(self):
+        """Método con el que se guarda el texto OCR en la caché según motor, política de DPI y preprocesado
+
+        El renderizado en color o en grises da prácticamente el mismo texto
+        (tesseract pasa la imagen a grises igual); en blanco y negro se guarda
+        aparte. Cada motor OCR agrega su sufijo: pytesseract y tesserocr
+        pueden reconocer texto distinto en la misma página.
+        """
+        method = 'ocr'
+        if self.options.get('dpi_policy', POLITICA_DPI_FIJA) == POLITICA_DPI_ADAPTATIVA:
+            low_dpi = self.options.get('low_dpi', DPI_OCR_BAJA)
+            min_confidence = self.options.get('min_confidence', CONFIANZA_MINIMA)
+            method = f"ocr_adaptativo_{low_dpi}_{min_confidence}"
+        if self.options.get('render_mode', RENDER_GRISES) == RENDER_BN:
+            method += '_bn'
+        if self.preprocessing:
+            method += '_' + '+'.join(self.preprocessing)
+        return method + self.ocr_backend.cache_suffix
+
+    def prepare_ocr_image(self, image, page_num, dpi, details, reference=None):
+        """Aplicar el preprocesado configurado a la imagen de una página antes del OCR
+
+        Devuelve (imagen, resultado del preprocesado); la imagen es None si la
+        página está en blanco y no hace falta OCR. Los pasos aplicados y su
+        duración quedan en details (preprocess, preprocess_ms). reference es el
+        resultado de la misma página a otra resolución (ver preprocess_image).
+        """
+        if self.preprocess_image is None or image is None:
+            return image, None
+        result = self.preprocess_image(image, self.preprocessing, dpi, reference)
+        page_details = details.setdefault(page_num, {})
+        page_details['preprocess'] = ', '.join(result['applied'])
+        page_details['preprocess_ms'] = round(page_details.get('preprocess_ms', 0.0) + result['ms'], 3)
+        if result['blank']:
+            self.log_message(f"   📝 Página {page_num}: En blanco, sin OCR")
+        return result['image'], result
+
+    def extract_text_with_ocr_batch(self, document, first_page, last_page, details=None):
+        """Extraer texto usando OCR para un tramo contiguo de páginas
+
+        Todas las páginas del tramo se renderizan juntas desde la sesión del
+        documento; el tamaño del tramo limita cuántas imágenes quedan en memoria
+        a la vez.
+        Las páginas que fallan no aparecen en el diccionario devuelto. Si se
+        indica details, se completa con la resolución usada y la confianza de
+        cada página (política adaptativa).
+        """
+        if self.options.get('dpi_policy', POLITICA_DPI_FIJA) == POLITICA_DPI_ADAPTATIVA:
+            return self.extract_text_with_adaptive_ocr(document, first_page, last_page, details)
+
+        texts = {}
+        details = details if details is not None else {}
+        dpi = self.options.get('dpi', DPI_OCR)
+        lang = self.options.get('ocr_lang', IDIOMA_OCR)
+        for page_num, image in self.render_pages(document, first_page, last_page, dpi, details):
+            try:
+                image, _ = self.prepare_ocr_image(image, page_num, dpi, details)
+                if image is None:
+                    texts[page_num] = ""
+                    continue
+                # Usar OCR en español
+                started = time.perf_counter()
+                texts[page_num] = self.ocr_backend.image_to_string(image, lang)
+                add_duration(details, page_num, 'ocr_ms', started)
+                details[page_num]['ocr_dpi'] = str(dpi)
+            except Exception as e:
+                self.log_message(f"   ⚠️ Error en OCR página {page_num}: {str(e)}")
+
+        return texts
+
+    def render_pages(self, document, first_page, last_page, dpi, details=None):
+        """Renderizar un tramo de páginas y entregar (página, imagen) de a una
+
+        Las páginas se renderizan en el modo de color configurado (render_mode:
+        escala de grises por defecto, 'bn' para blanco y negro) y solo hay una
+        en memoria a la vez: poppler escribe el tramo en archivos temporales
+        que se abren al entregarlos y pdfium renderiza cada página al pedirla.
+        Con un presupuesto de memoria, cada página reserva su tamaño estimado
+        hasta que se pide la siguiente.
+        Si la conversión falla se registra el error de las páginas que faltan
+        y no se entregan. Si se indica details, se suma a cada página su parte
+        del tiempo de renderizado (render_ms) y se anota el tamaño de la imagen.
+        """
+        mode = self.options.get('render_mode', RENDER_GRISES)
+        render_dir = None
+        if document.renders_to_files:
+            render_dir = tempfile.mkdtemp(prefix='ocr_paginas_', dir=self.options.get('render_dir'))
+        page_num = first_page
+        try:
+            # Poppler convierte el tramo completo de una vez (en otro proceso, página por página)
+            with self.reserve_memory(document, first_page, dpi):
+                started = time.perf_counter()
+                images = iter(document.render(first_page, last_page, dpi, mode, render_dir))
+                batch_ms = (time.perf_counter() - started) * 1000 / (last_page - first_page + 1)
+
+            for page_num in range(first_page, last_page + 1):
+                with self.reserve_memory(document, page_num, dpi):
+                    started = time.perf_counter()
+                    image = next(images, None)
+                    render_ms = batch_ms + (time.perf_counter() - started) * 1000
+                    if details is not None:
+                        page_details = details.setdefault(page_num, {})
+                        page_details['render_ms'] = round(page_details.get('render_ms', 0.0) + render_ms, 3)
+                        if image is not None:
+                            page_details['image_size'] = f"{image.width}x{image.height}"
+                    try:
+                        yield page_num, image
+                    finally:
+                        if image is not None:
+                            image.close()
+        except Exception as e:
+            for failed_page in range(page_num, last_page + 1):
+                self.log_message(f"   ⚠️ Error en OCR página {failed_page}: {str(e)}")
+        finally:
+            if render_dir is not None:
+                shutil.rmtree(render_dir, ignore_errors=True)
+
+    def reserve_memory(self, document, page_num, dpi):
+        """Reservar en el presupuesto de memoria la de una página renderizada (si hay presupuesto)"""
+        if self.memory_budget is None:
+            return contextlib.nullcontext()
+        try:
+            page_size = document.page_size(page_num)
+        except Exception:
+            page_size = None
+        bytes_per_pixel = BYTES_POR_PIXEL_RENDER[self.options.get('render_mode', RENDER_GRISES)] + BYTES_OCR_POR_PIXEL
+        if self.preprocessing:
+            bytes_per_pixel += BYTES_PREPROCESADO_POR_PIXEL
+        return self.memory_budget.reserve(page_memory_bytes(page_size, dpi, bytes_per_pixel), self.cancel_event)
+
+    def extract_text_with_adaptive_ocr(self, document, first_page, last_page, details=None):
+        """OCR en dos pasadas: resolución baja para todo y alta solo donde hace falta
+
+        La primera pasada usa image_to_data para obtener la confianza de cada
+        palabra. Los bloques de texto con confianza media baja se vuelven a
+        reconocer recortados de un render a la resolución alta; si son la
+        mayoría de la página (o no se reconoció nada) se repite la página entera.
+        """
+        texts = {}
+        details = details if details is not None else {}
+        lang = self.options.get('ocr_lang', IDIOMA_OCR)
+        high_dpi = self.options.get('dpi', DPI_OCR)
+        low_dpi = self.options.get('low_dpi', DPI_OCR_BAJA)
+        min_confidence = self.options.get('min_confidence', CONFIANZA_MINIMA)
+
+        # Primera pasada a baja resolución
+        pending = {}
+        for page_num, image in self.render_pages(document, first_page, last_page, low_dpi, details):
+            try:
+                image, preprocessed = self.prepare_ocr_image(image, page_num, low_dpi, details)
+                if image is None:
+                    texts[page_num] = ""
+                    continue
+                started = time.perf_counter()
+                words = ocr_words(self.ocr_backend.image_to_data(image, lang))
+                add_duration(details, page_num, 'ocr_ms', started)
+                blocks = group_blocks(words)
+                confidence = mean_confidence(words)
+                low_blocks = [block for block, block_words in blocks.items()
+                              if mean_confidence(block_words) < min_confidence]
+
+                texts[page_num] = words_to_text(words)
+                details[page_num].update(ocr_dpi=str(low_dpi),
+                                         ocr_confidence=round(confidence, 1) if confidence is not None else None)
+                if confidence is None or low_blocks:
+                    low_words = sum(len(blocks[block]) for block in low_blocks)
+                    full_page = confidence is None or low_words > FRACCION_REPETIR_PAGINA * len(words)
+                    pending[page_num] = (blocks, [] if full_page else low_blocks, preprocessed)
+            except Exception as e:
+                self.log_message(f"   ⚠️ Error en OCR página {page_num}: {str(e)}")
+
+        # Segunda pasada a alta resolución, solo para las páginas con zonas dudosas
+        scale = high_dpi / low_dpi
+        padding = high_dpi // 10
+        for batch_first, batch_last in group_page_runs(sorted(pending), self.options.get('render_batch_size', PAGINAS_POR_RENDER)):
+            for page_num, image in self.render_pages(document, batch_first, batch_last, high_dpi, details):
+                if page_num not in pending or image is None:
+                    continue
+                blocks, low_blocks, preprocessed = pending[page_num]
+                # El mismo recorte y ángulo que en la primera pasada, para que las zonas coincidan
+                image, _ = self.prepare_ocr_image(image, page_num, high_dpi, details, preprocessed)
+                started = time.perf_counter()
+                try:
+                    if not low_blocks:
+                        texts[page_num] = self.ocr_backend.image_to_string(image, lang)
+                        details[page_num]['ocr_dpi'] = f"{low_dpi}→{high_dpi}"
+                        continue
+
+                    block_texts = {block: words_to_text(block_words) for block, block_words in blocks.items()}
+                    for block in low_blocks:
+                        block_words = blocks[block]
+                        left = min(word['left'] for word in block_words) * scale - padding
+                        top = min(word['top'] for word in block_words) * scale - padding
+                        right = max(word['left'] + word['width'] for word in block_words) * scale + padding
+                        bottom = max(word['top'] + word['height'] for word in block_words) * scale + padding
+                        region = image.crop((max(int(left), 0), max(int(top), 0),
+                                             min(int(right), image.width), min(int(bottom), image.height)))
+                        region_words = ocr_words(self.ocr_backend.image_to_data(region, lang))
+                        block_texts[block] = words_to_text(region_words)
+
+                    texts[page_num] = '\n\n'.join(block_texts[block] for block in blocks)
+                    details[page_num]['ocr_dpi'] = f"{low_dpi}→{high_dpi} ({len(low_blocks)} zonas)"
+                except Exception as e:
+                    # Se conserva el texto de la primera pasada
+                    self.log_message(f"   ⚠️ Error en OCR de alta resolución, página {page_num}: {str(e)}")
+                finally:
+                    add_duration(details, page_num, 'ocr_ms', started)
+
+        return texts
+
+    def find_keywords_in_text(self, text, page_num):
+        """Buscar palabras clave en el texto y devolver contexto"""
+        matches = []
+
+        if not text.strip():
+            return matches
+
+        # Buscar todas las palabras clave en una sola pasada
+        exact = self.keyword_matcher.find_matches(text)
+        found = [(keyword_index, start, end, 0) for keyword_index, start, end in exact]
+        if self.fuzzy_matcher is not None:
+            found = sorted(found + self.fuzzy_matcher.find_matches(text, exact))
+        if not found:
+            return matches
+
+        # El texto de la página se normaliza una vez para todas sus coincidencias
+        page_context = PageContext(text)
+        for keyword_index, start, end, distance in found:
+            keyword = self.keyword_matcher.keywords[keyword_index]
+            matches.append(page_context.match(page_num, keyword, start, end, distance))
+
+        return matches
+
+
+def new_file_result(file_path):
+    """Crear el diccionario de resultados de un archivo"""
+    return {
+        'file': os.path.basename(file_path),
+        'file_path': file_path,
+        'matches': [],
+        'total_matches': 0,
+        'pages_processed': 0,
+        'page_records': [],
+        'elapsed_ms': 0.0,
+        'peak_rss_mb': None,
+        'error': None
+    }
+
+
+def finish_file_result(file_results, file_matches):
+    """Completar los totales de un archivo a partir de sus coincidencias"""
+    file_results['matches'] = file_matches
+    file_results['total_matches'] = len(file_matches)
+    file_results['pages_processed'] = max([m['page'] for m in file_matches]) if file_matches else 0
+    return file_results
+
+
+def evict_text_cache(processor, log):
+    """Aplicar el límite de tamaño de la caché de texto al terminar un análisis"""
+    if processor.text_cache is None:
+        return
+    removed = processor.text_cache.evict()
+    if removed:
+        log(f"🗄️ Caché de texto: {removed} páginas antiguas descartadas")
+
+
+# --- Ejecución en paralelo -------------------------------------------------
+
+# Procesador propio de cada proceso del pool (se crea una vez por proceso)
+_worker_processor = None
+_worker_log = []
+
+
+def _init_worker(options, cancel_event=None, memory_budget=None):
+    """Inicializar el procesador de un proceso del pool"""
+    global _worker_processor
+    # Ctrl+C llega a todo el grupo de procesos: la cancelación la decide el proceso principal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_processor = PDFProcessor(options, log=_worker_log.append, cancel_event=cancel_event,
+                                     memory_budget=memory_budget)
+
+
+def create_worker_pool(options, workers, cancel_event=None, memory_budget=None):
+    """Pool de procesos con un PDFProcessor (y su motor OCR) ya creado en cada proceso
+
+    Las opciones, cancel_event y el presupuesto de memoria quedan fijos al
+    crear el pool; sin memory_budget se crea uno con options['memory_budget_mb']
+    (si hay). Se puede pasar a analyze_files para reutilizarlo entre llamadas.
+    """
+    if memory_budget is None and options.get('memory_budget_mb'):
+        memory_budget = MemoryBudget(options['memory_budget_mb'])
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                               initargs=(options, cancel_event, memory_budget))
+
+
+def _process_task(file_path, first_page, last_page, defer_ocr=False):
+    """Procesar un rango de páginas en un proceso del pool
+
+    Devuelve (coincidencias, clasificación de páginas, mensajes de log, error,
+    duración en ms, páginas que quedaron para OCR, (pid, pico de memoria del
+    proceso en MB)). Los errores de página ya quedan aislados dentro de
+    process_pdf_file; aquí solo llegan los del archivo.
+    """
+    del _worker_log[:]
+    started = time.perf_counter()
+    try:
+        matches = _worker_processor.process_pdf_file(file_path, first_page, last_page, defer_ocr)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        return (matches, _worker_processor.last_page_records, list(_worker_log), None, elapsed_ms,
+                _worker_processor.deferred_pages, (os.getpid(), peak_rss_mb()))
+    except AnalysisCancelled:
+        raise
+    except Exception as e:
+        return ([], [], list(_worker_log), str(e), (time.perf_counter() - started) * 1000, {},
+                (os.getpid(), peak_rss_mb()))
+
+
+def build_tasks(processor, files, pages_per_task=PAGINAS_POR_TAREA):
+    """Dividir cada archivo en rangos de páginas para repartir entre procesos
+
+    Devuelve las tareas (índice de archivo, ruta, primera página, última
+    página) y la cantidad de páginas de cada archivo.
+    """
+    tasks = []
+    page_counts = []
+    for file_index, file_path in enumerate(files):
+        try:
+            page_count = processor.count_pages(file_path)
+        except Exception:
+            # El error se reportará al procesar el archivo completo
+            page_count = 0
+        page_counts.append(page_count)
+
+        if page_count == 0:
+            tasks.append((file_index, file_path, None, None))
+            continue
+
+        for first in range(1, page_count + 1, pages_per_task):
+            last = min(first + pages_per_task - 1, page_count)
+            tasks.append((file_index, file_path, first, last))
+    return tasks, page_counts
+
+
+def ocr_page_cost(file_path, page_count):
+    """Costo estimado del OCR de una página: bytes por página del archivo
+
+    Los escaneos de mayor resolución ocupan más bytes por página y tardan más
+    en renderizarse y reconocerse.
+    """
+    try:
+        return os.path.getsize(file_path) / max(page_count, 1)
+    except OSError:
+        return 0.0
+
+
+class TaskScheduler:
+    """Cola de tareas del pool: primero la clasificación, después el OCR página por página
+
+    Las tareas de clasificación recorren los archivos por tramos de páginas
+    (en orden de archivo) extrayendo el texto directo y dejando en cola las
+    páginas que necesitan OCR. Las páginas de OCR se entregan de la más
+    costosa a la menos costosa (primero el trabajo más largo), así todos los
+    procesos siguen ocupados hasta el final aunque un archivo tenga cientos
+    de páginas escaneadas.
+
+    Las tareas de clasificación de archivos muy adelantados respecto del
+    próximo archivo a entregar esperan mientras haya OCR pendiente, para no
+    acumular en memoria los resultados de archivos que no se pueden entregar.
+    """
+
+    def __init__(self, tasks):
+        self.tasks = []
+        self._classify = deque()
+        self._ocr = []
+        for file_index, file_path, first, last in tasks:
+            self._classify.append(self.add(file_index, file_path, first, last, defer_ocr=True))
+
+    def add(self, file_index, file_path, first, last, defer_ocr=False):
+        """Registrar una tarea; devuelve su índice"""
+        self.tasks.append((file_index, file_path, first, last, defer_ocr))
+        return len(self.tasks) - 1
+
+    def add_ocr(self, file_index, file_path, pages, cost, pages_per_task=PAGINAS_OCR_POR_TAREA):
+        """Poner en cola las páginas de OCR de un archivo; devuelve los índices de las tareas"""
+        task_indexes = []
+        for first, last in group_page_runs(sorted(pages), pages_per_task):
+            task_index = self.add(file_index, file_path, first, last)
+            # A igual costo, en orden de archivo y de página (los archivos se entregan antes)
+            heapq.heappush(self._ocr, (-cost * (last - first + 1), file_index, first, task_index))
+            task_indexes.append(task_index)
+        return task_indexes
+
+    def next_task(self, next_file):
+        """Índice de la próxima tarea a enviar al pool, o None si no hay"""
+        if self._classify and (self.tasks[self._classify[0]][0] < next_file + ARCHIVOS_ADELANTADOS
+                               or not self._ocr):
+            return self._classify.popleft()
+        if self._ocr:
+            return heapq.heappop(self._ocr)[-1]
+        return None
+
+    def discard(self):
+        """Vaciar la cola (al cancelar)"""
+        self._classify.clear()
+        self._ocr = []
+
+
+def analyze_files(files, options, workers=1, log=None, on_result=None, cancel_event=None, on_progress=None,
+                  executor=None):
+    """Procesar todos los archivos y devolver sus resultados en el orden recibido
+
+    Con workers > 1 las páginas se reparten en un ProcessPoolExecutor (ver
+    TaskScheduler: primero se clasifican por tramos y después las páginas de
+    OCR se procesan una por una, las más costosas primero); el resultado es
+    idéntico al procesamiento secuencial.
+
+    Si se indica on_result, cada resultado se entrega a esa función apenas
+    terminan el archivo y todos los anteriores (siempre en el orden recibido)
+    y no se acumula: la función devuelve una lista vacía.
+
+    cancel_event (con workers > 1, un multiprocessing.Event) detiene el
+    análisis entre tramos de páginas: se entregan los archivos ya completos y
+    se lanza AnalysisCancelled. Si un proceso del pool termina de forma
+    inesperada se lanza BrokenProcessPool, también después de entregar los
+    archivos completos.
+
+    on_progress(páginas terminadas, páginas totales) se llama al contar las
+    páginas y cada vez que termina un tramo de páginas (o un archivo).
+
+    Con workers > 1 y executor (de create_worker_pool, con las mismas
+    opciones y cancel_event) se usa ese pool en lugar de crear uno nuevo, y
+    queda abierto al terminar: los procesos no se vuelven a iniciar en cada
+    llamada.
+    """
+    log = log if log is not None else (lambda message: None)
+    memory_budget = None
+    # Un pool ya creado (executor) trae su propio presupuesto
+    if options.get('memory_budget_mb') and (executor is None or workers <= 1):
+        memory_budget = MemoryBudget(options['memory_budget_mb'])
+        log(f"🧠 Presupuesto de memoria para páginas en vuelo: {options['memory_budget_mb']} MB")
+    processor = PDFProcessor(options, log=log, cancel_event=cancel_event, memory_budget=memory_budget)
+    results = []
+    emit = on_result if on_result is not None else results.append
+    if options.get('ocr_enabled', True):
+        log(f"🔤 Motor OCR: {processor.ocr_backend.name}")
+
+    if workers <= 1:
+        page_counts = []
+        progress = {'done': 0}
+        if on_progress is not None:
+            for file_path in files:
+                try:
+                    page_counts.append(processor.count_pages(file_path))
+                except Exception:
+                    page_counts.append(0)
+            pages_total = sum(page_counts)
+            on_progress(0, pages_total)
+
+            def pages_done(count):
+                progress['done'] += count
+                on_progress(min(progress['done'], pages_total), pages_total)
+            processor.on_pages_done = pages_done
+
+        for i, file_path in enumerate(files, 1):
+            file_results = new_file_result(file_path)
+            filename = file_results['file']
+            log(f"🔄 Procesando {i}/{len(files)}: {filename}")
+
+            started = time.perf_counter()
+            try:
+                # Procesar PDF
+                file_matches = processor.process_pdf_file(file_path)
+                finish_file_result(file_results, file_matches)
+                file_results['page_records'] = processor.last_page_records
+                log(f"✅ {filename}: {file_results['total_matches']} coincidencias en {file_results['pages_processed']} páginas")
+            except AnalysisCancelled:
+                evict_text_cache(processor, log)
+                raise AnalysisCancelled(f"Análisis cancelado: {i - 1} de {len(files)} archivos completos") from None
+            except Exception as e:
+                error_msg = f"Error procesando {filename}: {str(e)}"
+                log(f"❌ {error_msg}")
+                file_results['error'] = error_msg
+            file_results['elapsed_ms'] = (time.perf_counter() - started) * 1000
+            file_results['peak_rss_mb'] = peak_rss_mb()
+
+            if on_progress is not None:
+                # Las páginas de un archivo con error también cuentan como terminadas
+                progress['done'] = sum(page_counts[:i])
+                on_progress(progress['done'], pages_total)
+            emit(file_results)
+        evict_text_cache(processor, log)
+        log(f"🧠 Memoria máxima: {peak_rss_mb()} MB")
+        return results
+
+    tasks, page_counts = build_tasks(processor, files, options.get('pages_per_task', PAGINAS_POR_TAREA))
+    scheduler = TaskScheduler(tasks)
+    log(f"⚙️ {len(tasks)} tareas repartidas en {workers} procesos")
+    pages_total = sum(page_counts)
+    pages_done = 0
+    if on_progress is not None:
+        on_progress(0, pages_total)
+
+    # Coincidencias y clasificación por tarea, hasta que su archivo pueda entregarse en orden
+    task_matches = {}
+    task_records = {}
+    file_elapsed = {}
+    file_errors = {}
+    file_totals = {}
+    # Tiempo de extracción en la clasificación de las páginas que pasaron a OCR
+    deferred_extract_ms = {}
+    pending = {}
+    file_tasks = {}
+    for task_index, (file_index, _, _, _, _) in enumerate(scheduler.tasks):
+        pending[file_index] = pending.get(file_index, 0) + 1
+        file_tasks.setdefault(file_index, []).append(task_index)
+    next_file = 0
+    cancelled = False
+    max_in_flight = workers * TAREAS_POR_PROCESO
+
+    # Pico de memoria de cada proceso del pool (pid -> MB) y de los procesos que atendieron cada archivo
+    worker_peaks = {}
+    file_peaks = {}
+
+    if executor is None:
+        pool = create_worker_pool(options, workers, cancel_event, memory_budget)
+    else:
+        pool = contextlib.nullcontext(executor)
+    with pool as executor:
+        futures = {}
+
+        def submit_tasks():
+            while not cancelled and len(futures) < max_in_flight:
+                task_index = scheduler.next_task(next_file)
+                if task_index is None:
+                    return
+                _, file_path, first, last, defer_ocr = scheduler.tasks[task_index]
+                futures[executor.submit(_process_task, file_path, first, last, defer_ocr)] = task_index
+
+        submit_tasks()
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            if not cancelled and cancel_event is not None and cancel_event.is_set():
+                # Descartar las tareas que no empezaron; las que están en curso se detienen solas
+                cancelled = True
+                log("⏹️ Cancelando: esperando las tareas en curso...")
+                scheduler.discard()
+                for pending_future in futures:
+                    pending_future.cancel()
+
+            for future in done:
+                task_index = futures.pop(future)
+                if future.cancelled():
+                    continue
+
+                file_index, _, first, last, defer_ocr = scheduler.tasks[task_index]
+                filename = os.path.basename(files[file_index])
+                try:
+                    matches, records, messages, error, elapsed_ms, deferred, (pid, peak) = future.result()
+                except AnalysisCancelled:
+                    # El archivo queda incompleto y no se entrega
+                    continue
+                except BrokenProcessPool:
+                    # Se cayó un proceso: el pool ya no sirve y los archivos sin entregar no son errores suyos
+                    raise
+                except Exception as e:
+                    matches, records, messages, error, elapsed_ms, deferred = [], [], [], str(e), 0.0, {}
+                    pid, peak = None, None
+                if peak is not None:
+                    worker_peaks[pid] = max(peak, worker_peaks.get(pid, 0.0))
+                    file_peaks[file_index] = max(peak, file_peaks.get(file_index, 0.0))
+
+                if first is None:
+                    log(f"🔄 {filename}")
+                elif defer_ocr:
+                    log(f"🔄 {filename}: páginas {first}-{last}")
+                elif first == last:
+                    log(f"🔄 {filename}: OCR página {first}")
+                else:
+                    log(f"🔄 {filename}: OCR páginas {first}-{last}")
+                for message in messages:
+                    log(message)
+
+                if deferred and not cancelled:
+                    # Las páginas escaneadas vuelven a la cola, una tarea de OCR por página
+                    deferred_extract_ms.setdefault(file_index, {}).update(deferred)
+                    cost = ocr_page_cost(files[file_index], page_counts[file_index])
+                    new_tasks = scheduler.add_ocr(file_index, files[file_index], deferred, cost,
+                                                  options.get('ocr_pages_per_task', PAGINAS_OCR_POR_TAREA))
+                    file_tasks[file_index].extend(new_tasks)
+                    pending[file_index] += len(new_tasks)
+
+                if first is not None:
+                    pages_done += last - first + 1 - len(deferred)
+                    if on_progress is not None:
+                        on_progress(min(pages_done, pages_total), pages_total)
+                task_matches[task_index] = matches
+                task_records[task_index] = records
+                # Tiempo de proceso del archivo: suma de sus tareas
+                file_elapsed[file_index] = file_elapsed.get(file_index, 0.0) + elapsed_ms
+                file_totals[file_index] = file_totals.get(file_index, 0) + len(matches)
+                if error and file_index not in file_errors:
+                    file_errors[file_index] = f"Error procesando {filename}: {error}"
+                    log(f"❌ {file_errors[file_index]}")
+
+                pending[file_index] -= 1
+                if pending[file_index] == 0 and file_index not in file_errors:
+                    log(f"✅ {filename}: {file_totals[file_index]} coincidencias")
+
+                # Entregar los archivos completos que ya no esperan a uno anterior
+                while next_file < len(files) and pending[next_file] == 0:
+                    file_results = _assemble_file_result(files[next_file], file_tasks[next_file],
+                                                         task_matches, task_records, file_errors.get(next_file),
+                                                         deferred_extract_ms.pop(next_file, {}))
+                    file_results['elapsed_ms'] = file_elapsed.pop(next_file, 0.0)
+                    file_results['peak_rss_mb'] = file_peaks.pop(next_file, None)
+                    emit(file_results)
+                    next_file += 1
+
+            submit_tasks()
+
+    evict_text_cache(processor, log)
+    if worker_peaks:
+        peaks = ', '.join(f"{peak:.0f}" for _, peak in sorted(worker_peaks.items()))
+        log(f"🧠 Memoria máxima por proceso: {peaks} MB")
+    if cancelled:
+        raise AnalysisCancelled(f"Análisis cancelado: {next_file} de {len(files)} archivos completos")
+    return results
+
+
+def _assemble_file_result(file_path, task_indexes, task_matches, task_records, error, deferred_extract_ms=None):
+    """Reunir en orden de páginas las coincidencias de las tareas de un archivo
+
+    Las coincidencias se retiran de task_matches (y la clasificación de
+    task_records) para liberar memoria. Cada página se procesa completa en
+    una sola tarea, así que ordenar por página (de forma estable) reproduce el
+    orden del procesamiento secuencial.
+    """
+    file_results = new_file_result(file_path)
+    file_matches = []
+    page_records = []
+    for task_index in task_indexes:
+        file_matches.extend(task_matches.pop(task_index, []))
+        page_records.extend(task_records.pop(task_index, []))
+    if error:
+        file_results['error'] = error
+    else:
+        file_matches.sort(key=lambda match: match['page'])
+        page_records.sort(key=lambda record: record['page'])
+        # La extracción de las páginas de OCR se midió en su tarea de clasificación
+        for record in page_records:
+            extract_ms = (deferred_extract_ms or {}).get(record['page'])
+            if extract_ms:
+                record['extract_ms'] = round(record['extract_ms'] + extract_ms, 3)
+        finish_file_result(file_results, file_matches)
+        file_results['page_records'] = page_records
+    return file_results
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Generación de Reportes
+Para el Analizador OCR Universal
+
+Escribe el reporte de texto y el detalle de coincidencias (JSONL y CSV) a
+medida que termina cada archivo. Solo se conservan en memoria los totales
+(coincidencias por palabra clave, archivos con coincidencias, etc.), de modo
+que el consumo no crece con la cantidad de coincidencias del corpus.
+"""
+
+import csv
+import json
+import os
+import shutil
+from datetime import datetime
+
+from motor_busqueda import MODO_EXACTO, NOMBRES_MODOS
+from perfil import RunProfile
+
+# Columnas del detalle de coincidencias (JSONL/CSV)
+DETAIL_FIELDS = ['file', 'file_path', 'page', 'keyword', 'matched_text', 'context', 'position', 'distance']
+
+# Columnas de la clasificación de páginas (texto directo, OCR o ambos) y el costo de cada etapa
+PAGE_FIELDS = ['file', 'page', 'classifier', 'decision', 'reason', 'chars', 'image_coverage',
+               'alnum_ratio', 'garbage_ratio', 'dictionary_rate', 'extract_ms', 'classify_ms',
+               'render_ms', 'preprocess', 'preprocess_ms', 'ocr_ms', 'ocr_dpi', 'ocr_confidence',
+               'image_size', 'match_ms', 'index_ms', 'text_bytes']
+
+# Encabezados de las hojas del reporte Excel
+SUMMARY_HEADERS = ['Archivo', 'Total Coincidencias', 'Páginas Procesadas', 'Estado']
+DETAIL_HEADERS = ['Archivo', 'Página', 'Palabra Clave', 'Texto Encontrado', 'Contexto', 'Distancia']
+
+# Filas por hoja de Excel (incluye la fila de encabezados)
+EXCEL_MAX_ROWS = 1048576
+
+
+class StreamingReport:
+    """Reporte incremental: un archivo a la vez, con estadísticas acumuladas"""
+
+    def __init__(self, output_dir, project_name, keywords, case_sensitive=False, whole_words=True,
+                 match_mode=MODO_EXACTO, max_edits=0, ocr_enabled=True, log=None):
+        self.output_dir = output_dir
+        self.project_name = project_name
+        self.keywords = list(keywords)
+        self.case_sensitive = case_sensitive
+        self.whole_words = whole_words
+        self.match_mode = match_mode
+        self.max_edits = max_edits
+        self.ocr_enabled = ocr_enabled
+        self.log_message = log if log is not None else (lambda message: None)
+
+        self.timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        safe_name = project_name.replace(' ', '_')
+        self.report_path = os.path.join(output_dir, f"reporte_{safe_name}_{self.timestamp}.txt")
+        self.excel_path = os.path.join(output_dir, f"reporte_{safe_name}_{self.timestamp}.xlsx")
+        self.jsonl_path = os.path.join(output_dir, f"detalle_{safe_name}_{self.timestamp}.jsonl")
+        self.csv_path = os.path.join(output_dir, f"detalle_{safe_name}_{self.timestamp}.csv")
+        self.pages_path = os.path.join(output_dir, f"paginas_{safe_name}_{self.timestamp}.csv")
+        self.profile_path = os.path.join(output_dir, f"perfil_{safe_name}_{self.timestamp}.json")
+        self._sections_path = self.report_path + '.parcial'
+
+        # Estadísticas acumuladas
+        self.file_count = 0
+        self.total_matches = 0
+        self.files_with_matches = 0
+        self.files_with_errors = 0
+        self.keyword_count = {}
+        self.page_decisions = {}
+        # Tiempo de cada etapa, por página y por archivo
+        self.profile = RunProfile(self.profile_path, project_name)
+        # Fila de la hoja "Resumen" por archivo y anchos de columna del Excel
+        self.summary_rows = []
+        self.summary_widths = SheetColumnWidths(SUMMARY_HEADERS)
+        self.detail_widths = SheetColumnWidths(DETAIL_HEADERS)
+
+        os.makedirs(output_dir, exist_ok=True)
+        self._sections = open(self._sections_path, 'w', encoding='utf-8')
+        self._jsonl = open(self.jsonl_path, 'w', encoding='utf-8')
+        # utf-8-sig para que Excel reconozca las tildes al abrir el CSV
+        self._csv_file = open(self.csv_path, 'w', encoding='utf-8-sig', newline='')
+        self._csv = csv.writer(self._csv_file)
+        self._csv.writerow(DETAIL_FIELDS)
+        self._pages_file = open(self.pages_path, 'w', encoding='utf-8-sig', newline='')
+        self._pages = csv.writer(self._pages_file)
+        self._pages.writerow(PAGE_FIELDS)
+
+    def add_file_result(self, result):
+        """Escribir los resultados de un archivo y actualizar los totales"""
+        with self.profile.measure('report'):
+            self._add_file_result(result)
+        self.profile.add_file(result)
+
+    def _add_file_result(self, result):
+        """Escribir las coincidencias, la clasificación de páginas y la sección de un archivo"""
+        self.file_count += 1
+        self.total_matches += result['total_matches']
+        if result['total_matches'] > 0:
+            self.files_with_matches += 1
+        if result.get('error'):
+            self.files_with_errors += 1
+        summary_row = (result['file'], result['total_matches'], result['pages_processed'],
+                       'Error' if result.get('error') else 'Procesado')
+        self.summary_rows.append(summary_row)
+        self.summary_widths.update(summary_row)
+
+        for match in result.get('matches', []):
+            keyword = match['keyword']
+            self.keyword_count[keyword] = self.keyword_count.get(keyword, 0) + 1
+
+            row = {
+                'file': result['file'],
+                'file_path': result['file_path'],
+                'page': match['page'],
+                'keyword': keyword,
+                'matched_text': match['matched_text'],
+                'context': match['context'],
+                'position': match['position'],
+                # Distancia de edición a la palabra clave (0: coincidencia exacta)
+                'distance': match.get('distance', 0)
+            }
+            self._jsonl.write(json.dumps(row, ensure_ascii=False) + '\n')
+            self._csv.writerow([row[field] for field in DETAIL_FIELDS])
+            self.detail_widths.update(excel_detail_row(row))
+
+        for record in result.get('page_records', []):
+            decision = record['decision']
+            self.page_decisions[decision] = self.page_decisions.get(decision, 0) + 1
+            self._pages.writerow([result['file']] + [record.get(field, '') for field in PAGE_FIELDS[1:]])
+
+        self._write_file_section(self._sections, result)
+
+        # Dejar en disco lo escrito hasta ahora
+        for handle in self._handles():
+            handle.flush()
+
+    def _write_file_section(self, f, result):
+        """Escribir el detalle de un archivo en el reporte de texto"""
+        f.write(f"\n📄 ARCHIVO: {result['file']}\n")
+        f.write(f"   Ruta: {result['file_path']}\n")
+
+        if result.get('error'):
+            f.write(f"   ❌ ERROR: {result['error']}\n")
+            return
+
+        f.write(f"   ✅ Total de coincidencias: {result['total_matches']}\n")
+        f.write(f"   📄 Páginas procesadas: {result['pages_processed']}\n")
+
+        if result['matches']:
+            f.write("\n   COINCIDENCIAS DETALLADAS:\n")
+            f.write(f"   {'-' * 50}\n")
+
+            # Agrupar por página
+            matches_by_page = {}
+            for match in result['matches']:
+                page = match['page']
+                if page not in matches_by_page:
+                    matches_by_page[page] = []
+                matches_by_page[page].append(match)
+
+            # Mostrar por página
+            for page in sorted(matches_by_page.keys()):
+                f.write(f"\n   📄 PÁGINA {page}:\n")
+
+                for j, match in enumerate(matches_by_page[page], 1):
+                    f.write(f"      {j}. Palabra: \"{match['matched_text']}\"\n")
+                    if match.get('distance'):
+                        f.write(f"         Clave buscada: {match['keyword']} (aproximada, distancia {match['distance']})\n")
+                    else:
+                        f.write(f"         Clave buscada: {match['keyword']}\n")
+                    f.write(f"         Contexto: ...{match['context']}...\n")
+                    f.write(f"         {'-' * 40}\n")
+        else:
+            f.write("   ℹ️  No se encontraron coincidencias en este archivo.\n")
+
+        f.write(f"\n{'='*80}\n")
+
+    def _write_header(self, f):
+        """Escribir encabezado y resumen ejecutivo a partir de los totales"""
+        f.write(f"REPORTE DETALLADO DE ANÁLISIS OCR - {self.project_name.upper()}\n")
+        f.write("=" * 80 + "\n")
+        f.write(f"Fecha: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n")
+        f.write(f"Total de archivos procesados: {self.file_count}\n")
+        f.write(f"Palabras clave buscadas: {', '.join(self.keywords)}\n")
+        f.write("Configuración:\n")
+        f.write(f"  - Sensible a mayúsculas: {'Sí' if self.case_sensitive else 'No'}\n")
+        f.write(f"  - Solo palabras completas: {'Sí' if self.whole_words else 'No'}\n")
+        f.write(f"  - Coincidencia: {NOMBRES_MODOS[self.match_mode]}\n")
+        f.write(f"  - Errores de OCR tolerados por palabra: {self.max_edits or 'No'}\n")
+        f.write(f"  - OCR habilitado: {'Sí' if self.ocr_enabled else 'No'}\n")
+        f.write("\n")
+
+        f.write("RESUMEN EJECUTIVO:\n")
+        f.write("-" * 40 + "\n")
+        f.write(f"• Total de coincidencias encontradas: {self.total_matches}\n")
+        f.write(f"• Archivos con coincidencias: {self.files_with_matches} de {self.file_count}\n")
+        f.write(f"• Archivos con errores: {self.files_with_errors}\n")
+        f.write(f"• Promedio de coincidencias por archivo: {self.total_matches/max(self.file_count, 1):.1f}\n")
+        f.write("\n")
+
+        # Ranking de palabras clave más encontradas
+        if self.keyword_count:
+            f.write("PALABRAS CLAVE MÁS FRECUENTES:\n")
+            f.write("-" * 40 + "\n")
+            sorted_keywords = sorted(self.keyword_count.items(), key=lambda x: x[1], reverse=True)
+            for i, (keyword, count) in enumerate(sorted_keywords[:10], 1):
+                f.write(f"{i:2d}. {keyword}: {count} ocurrencias\n")
+            f.write("\n")
+
+        # Detalle por archivo
+        f.write("DETALLE POR ARCHIVO:\n")
+        f.write("=" * 80 + "\n")
+
+    def iter_detail_rows(self):
+        """Leer desde disco las coincidencias ya escritas, una por vez"""
+        with open(self.jsonl_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+
+    def _handles(self):
+        """Archivos abiertos por el reporte"""
+        return (self._sections, self._jsonl, self._csv_file, self._pages_file)
+
+    def _close_handles(self):
+        """Cerrar los archivos abiertos"""
+        for handle in self._handles():
+            if not handle.closed:
+                handle.close()
+
+    def abort(self):
+        """Cerrar sin generar el reporte final (el detalle JSONL/CSV ya escrito se conserva)"""
+        self._close_handles()
+        if os.path.exists(self._sections_path):
+            os.remove(self._sections_path)
+
+    def close(self):
+        """Completar el reporte de texto y el Excel; devuelve un resumen del análisis"""
+        self.log_message("📊 Generando reporte detallado...")
+        self._close_handles()
+
+        # Encabezado con los totales finales seguido del detalle ya escrito
+        with self.profile.measure('report'):
+            with open(self.report_path, 'w', encoding='utf-8') as f:
+                self._write_header(f)
+                with open(self._sections_path, 'r', encoding='utf-8') as sections:
+                    shutil.copyfileobj(sections, f)
+            os.remove(self._sections_path)
+
+        # Generar reporte Excel si openpyxl está disponible
+        excel_path = None
+        try:
+            with self.profile.measure('excel'):
+                excel_path = generate_excel_report(
+                    self.summary_rows,
+                    (excel_detail_row(row) for row in self.iter_detail_rows()),
+                    self.excel_path,
+                    self.summary_widths,
+                    self.detail_widths
+                )
+            self.log_message(f"📊 Reporte Excel generado: {os.path.basename(excel_path)}")
+        except ImportError:
+            self.log_message("ℹ️  Reporte Excel no generado (openpyxl no disponible)")
+        except Exception as e:
+            self.log_message(f"⚠️  Error generando Excel: {str(e)}")
+
+        self.log_message(f"📄 Reporte detallado guardado: {os.path.basename(self.report_path)}")
+        self.log_message(f"🧾 Detalle de coincidencias: {os.path.basename(self.jsonl_path)}, "
+                         f"{os.path.basename(self.csv_path)}")
+        classify_ms = self.profile.stages.get('classify', {}).get('total_ms', 0.0)
+        ocr_ms = self.profile.stages.get('ocr', {}).get('total_ms', 0.0)
+        if self.page_decisions:
+            self.log_message(f"🧭 Páginas: {self.page_decisions.get('direct', 0)} texto directo, "
+                             f"{self.page_decisions.get('ocr', 0)} OCR, {self.page_decisions.get('both', 0)} ambos "
+                             f"(clasificación {classify_ms:.0f} ms, OCR {ocr_ms / 1000:.1f} s) - "
+                             f"{os.path.basename(self.pages_path)}")
+
+        profile_path = None
+        try:
+            profile_path = self.profile.write(
+                report_path=self.report_path,
+                pages_path=self.pages_path,
+                page_decisions=dict(self.page_decisions)
+            )
+            self.log_message(f"⏱️ Tiempo por etapa: {self.profile.summary_line()} - "
+                             f"{os.path.basename(profile_path)}")
+        except OSError as e:
+            self.log_message(f"⚠️  Error guardando el perfil de la ejecución: {str(e)}")
+
+        return {
+            'files': self.file_count,
+            'total_matches': self.total_matches,
+            'files_with_matches': self.files_with_matches,
+            'files_with_errors': self.files_with_errors,
+            'keyword_count': dict(self.keyword_count),
+            'report_path': self.report_path,
+            'excel_path': excel_path,
+            'jsonl_path': self.jsonl_path,
+            'csv_path': self.csv_path,
+            'pages_path': self.pages_path,
+            'page_decisions': dict(self.page_decisions),
+            'classify_ms': classify_ms,
+            'ocr_ms': ocr_ms,
+            'profile_path': profile_path
+        }
+
+
+def excel_detail_row(row):
+    """Valores de la hoja "Detalle de Coincidencias" para una coincidencia"""
+    return (row['file'], row['page'], row['keyword'], row['matched_text'], row['context'], row.get('distance', 0))
+
+
+class SheetColumnWidths:
+    """Ancho de columnas por hoja, calculado a medida que se escriben las filas
+
+    En el modo de solo escritura de openpyxl el ancho de las columnas debe
+    fijarse antes de la primera fila, por lo que se lleva el máximo de cada
+    columna mientras se generan los datos. Se mantiene un juego de máximos por
+    cada hoja en que se repartirán las filas.
+    """
+
+    def __init__(self, headers, rows_per_sheet=None):
+        self.headers = list(headers)
+        # Por defecto, todas las filas de una hoja de Excel menos la de encabezados
+        self.rows_per_sheet = rows_per_sheet if rows_per_sheet is not None else EXCEL_MAX_ROWS - 1
+        self.row_count = 0
+        self.sheets = []
+
+    def update(self, values):
+        """Registrar una fila de datos"""
+        if self.row_count % self.rows_per_sheet == 0:
+            self.sheets.append([len(str(header)) for header in self.headers])
+        lengths = self.sheets[-1]
+        for col, value in enumerate(values):
+            length = len(str(value))
+            if length > lengths[col]:
+                lengths[col] = length
+        self.row_count += 1
+
+    def widths(self, sheet_index):
+        """Anchos de columna de una hoja (limitados a 50 caracteres)"""
+        if sheet_index < len(self.sheets):
+            lengths = self.sheets[sheet_index]
+        else:
+            lengths = [len(str(header)) for header in self.headers]
+        return [min(length + 2, 50) for length in lengths]
+
+
+def write_sheet_rows(wb, title, rows, column_widths):
+    """Escribir filas en hojas de solo escritura
+
+    Al alcanzar el límite de filas de Excel se continúa en una hoja nueva
+    ("<título> 2", "<título> 3", ...) con los mismos encabezados.
+    """
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    rows = iter(rows)
+    sheet_index = 0
+    next_row = next(rows, None)
+    while sheet_index == 0 or next_row is not None:
+        ws = wb.create_sheet(title if sheet_index == 0 else f"{title} {sheet_index + 1}")
+        for col, width in enumerate(column_widths.widths(sheet_index), 1):
+            ws.column_dimensions[get_column_letter(col)].width = width
+
+        header_cells = []
+        for header in column_widths.headers:
+            cell = WriteOnlyCell(ws, value=header)
+            cell.font = Font(bold=True)
+            cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
+            header_cells.append(cell)
+        ws.append(header_cells)
+
+        written = 0
+        while next_row is not None and written < column_widths.rows_per_sheet:
+            ws.append(next_row)
+            written += 1
+            next_row = next(rows, None)
+        sheet_index += 1
+
+
+def generate_excel_report(summary_rows, detail_rows, excel_path, summary_widths, detail_widths):
+    """Generar reporte en Excel
+
+    Usa el modo de solo escritura de openpyxl: las filas se vuelcan a disco a
+    medida que se agregan, sin mantener la hoja completa en memoria.
+    """
+    import openpyxl
+
+    wb = openpyxl.Workbook(write_only=True)
+
+    # Hoja 1: Resumen
+    write_sheet_rows(wb, "Resumen", summary_rows, summary_widths)
+
+    # Hoja 2: Detalle de coincidencias
+    write_sheet_rows(wb, "Detalle de Coincidencias", detail_rows, detail_widths)
+
+    wb.save(excel_path)
+    return excel_path
@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servidor HTTP Local del Analizador OCR Universal
+Permite usar el analizador desde otras herramientas internas: recibe trabajos
+(PDFs subidos o rutas locales, palabras clave y opciones de búsqueda), los
+procesa en una cola con una cantidad acotada de trabajos simultáneos y
+devuelve las coincidencias en JSON, con la misma forma que produce
+find_keywords_in_text. Solo usa la biblioteca estándar (asyncio).
+
+Uso:
+    python servidor_api.py --puerto 8765 --salida resultados_api --procesos 2 --trabajos 2
+
+Rutas:
+    GET    /estado                       Estado del servidor (trabajos en cola y en curso)
+    POST   /trabajos                     Crear un trabajo (JSON, ver abajo); 202, o 503 si la cola está llena
+    GET    /trabajos                     Lista de trabajos
+    GET    /trabajos/<id>                Estado y avance de un trabajo
+    GET    /trabajos/<id>/resultados     Resultados por archivo (parciales mientras está en curso)
+    GET    /trabajos/<id>/eventos        Avance en vivo: una línea JSON por evento hasta que termina
+    DELETE /trabajos/<id>                Cancelar un trabajo
+
+Cuerpo de POST /trabajos:
+    {"palabras": ["gestión", "municipal"],
+     "archivos": ["/ruta/local/documento.pdf"],
+     "subidas": [{"nombre": "escaneo.pdf", "contenido": "<PDF en base64>"}],
+     "case_sensitive": false, "whole_words": true, "ocr_enabled": true,
+     "match_mode": "exacto", "max_edits": 0}
+"""
+
+import argparse
+import asyncio
+import base64
+import binascii
+import json
+import os
+import shutil
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from motor_analisis import AnalysisEngine
+from motor_busqueda import MODO_EXACTO, MODOS_COINCIDENCIA
+from procesador_pdf import AnalysisCancelled, analyze_files
+
+PUERTO_POR_DEFECTO = 8765
+
+# Trabajos que se procesan a la vez (cada uno con sus propios procesos) y trabajos en espera
+MAX_TRABAJOS_SIMULTANEOS = 2
+MAX_TRABAJOS_EN_COLA = 16
+
+# Trabajos terminados que se conservan en memoria para consultar sus resultados
+MAX_TRABAJOS_GUARDADOS = 100
+
+# Tamaño máximo del cuerpo de una solicitud (PDFs subidos en base64 incluidos)
+MAX_CUERPO_MB = 200
+
+# Estados de un trabajo
+TRABAJO_EN_COLA = 'en_cola'
+TRABAJO_EN_CURSO = 'en_curso'
+TRABAJO_COMPLETO = 'completo'
+TRABAJO_CANCELADO = 'cancelado'
+TRABAJO_ERROR = 'error'
+ESTADOS_FINALES = (TRABAJO_COMPLETO, TRABAJO_CANCELADO, TRABAJO_ERROR)
+
+# Campos de cada resultado por archivo que devuelve la API
+CAMPOS_RESULTADO = ('file', 'file_path', 'matches', 'total_matches', 'pages_processed', 'elapsed_ms', 'error')
+
+MENSAJES_HTTP = {200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                 409: 'Conflict', 413: 'Payload Too Large', 500: 'Internal Server Error',
+                 503: 'Service Unavailable'}
+
+
+class ApiError(Exception):
+    """Error de una solicitud, con su código HTTP"""
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+class Job:
+    """Trabajo de análisis: archivos, motor con sus opciones, avance y resultados
+
+    Los datos del trabajo solo se modifican desde el bucle de asyncio; el
+    hilo que lo procesa los actualiza con loop.call_soon_threadsafe.
+    """
+
+    def __init__(self, job_id, files, engine, upload_dir=None):
+        self.id = job_id
+        self.files = files
+        self.engine = engine
+        self.upload_dir = upload_dir
+        self.status = TRABAJO_EN_COLA
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.pages_done = 0
+        self.pages_total = 0
+        self.results = []
+        self.events = []
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self):
+        return self.status in ESTADOS_FINALES
+
+    def publish(self, event):
+        """Agregar un evento y despertar a quienes siguen el avance"""
+        self.events.append(event)
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def set_status(self, status, error=None):
+        """Cambiar el estado del trabajo"""
+        self.status = status
+        self.error = error
+        if status == TRABAJO_EN_CURSO:
+            self.started_at = time.time()
+        elif status in ESTADOS_FINALES:
+            self.finished_at = time.time()
+        self.publish({'tipo': 'estado', 'estado': status, 'error': error})
+
+    def set_progress(self, pages_done, pages_total):
+        """Registrar el avance en páginas"""
+        self.pages_done = pages_done
+        self.pages_total = pages_total
+        self.publish({'tipo': 'progreso', 'paginas': pages_done, 'total': pages_total})
+
+    def add_result(self, file_results):
+        """Registrar el resultado de un archivo terminado"""
+        self.results.append(file_results)
+        self.publish({'tipo': 'archivo', 'file': file_results['file'],
+                      'total_matches': file_results['total_matches'], 'error': file_results['error'],
+                      'archivos': len(self.results), 'total_archivos': len(self.files)})
+
+    async def stream_events(self):
+        """Entregar los eventos ya publicados y los nuevos hasta que el trabajo termine"""
+        index = 0
+        while True:
+            while index < len(self.events):
+                yield self.events[index]
+                index += 1
+            if self.finished:
+                return
+            await self._changed.wait()
+
+    def describe(self):
+        """Estado del trabajo para la API"""
+        return {
+            'id': self.id,
+            'estado': self.status,
+            'error': self.error,
+            'archivos': len(self.files),
+            'archivos_terminados': len(self.results),
+            'paginas': self.pages_done,
+            'paginas_total': self.pages_total,
+            'coincidencias': sum(result['total_matches'] for result in self.results),
+            'creado': self.created_at,
+            'iniciado': self.started_at,
+            'terminado': self.finished_at,
+            'opciones': {key: value for key, value in self.engine.settings().items()
+                         if key in ('case_sensitive', 'whole_words', 'ocr_enabled', 'match_mode', 'max_edits')},
+            'palabras': self.engine.keywords
+        }
+
+
+class AnalysisServer:
+    """Servidor HTTP de trabajos de análisis sobre asyncio"""
+
+    def __init__(self, output_dir, workers=1, max_jobs=MAX_TRABAJOS_SIMULTANEOS,
+                 max_queued=MAX_TRABAJOS_EN_COLA, log=None):
+        self.output_dir = os.path.abspath(output_dir)
+        self.workers = max(1, workers)
+        self.max_jobs = max(1, max_jobs)
+        self.max_queued = max(1, max_queued)
+        self.log_message = log if log is not None else print
+        self.jobs = OrderedDict()
+        # Trabajos en espera (un trabajo cancelado se quita de inmediato) y cuántos hay para tomar
+        self.queue = deque()
+        self.queued = None
+        self.loop = None
+        self.server = None
+        self.runners = []
+        self.executor = ThreadPoolExecutor(max_workers=self.max_jobs, thread_name_prefix='trabajo')
+
+    async def start(self, host='127.0.0.1', port=PUERTO_POR_DEFECTO):
+        """Empezar a escuchar (port=0 elige un puerto libre); devuelve (host, puerto)"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.loop = asyncio.get_running_loop()
+        self.queued = asyncio.Semaphore(0)
+        self.runners = [asyncio.create_task(self.run_jobs()) for _ in range(self.max_jobs)]
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def stop(self):
+        """Dejar de recibir solicitudes y cancelar los trabajos en curso"""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for job in self.jobs.values():
+            if not job.finished:
+                job.engine.cancel_event.set()
+        for runner in self.runners:
+            runner.cancel()
+        await asyncio.gather(*self.runners, return_exceptions=True)
+        self.executor.shutdown(wait=True)
+
+    # --- Trabajos -----------------------------------------------------------
+
+    async def run_jobs(self):
+        """Tomar trabajos de la cola y procesarlos de a uno (hay max_jobs de estas tareas)"""
+        while True:
+            await self.queued.acquire()
+            if not self.queue:
+                # El trabajo se canceló mientras esperaba
+                continue
+            job = self.queue.popleft()
+            job.set_status(TRABAJO_EN_CURSO)
+            self.log_message(f"🚀 Trabajo {job.id}: {len(job.files)} archivo(s)")
+            status, error = await self.loop.run_in_executor(self.executor, self.process_job, job)
+            job.set_status(status, error)
+            self.log_message(f"✅ Trabajo {job.id}: {status}")
+
+    def process_job(self, job):
+        """Procesar un trabajo (en un hilo del pool); devuelve (estado, error)"""
+        engine = job.engine
+
+        def on_result(file_results):
+            result = {key: file_results.get(key) for key in CAMPOS_RESULTADO}
+            self.loop.call_soon_threadsafe(job.add_result, result)
+
+        def on_progress(pages_done, pages_total):
+            self.loop.call_soon_threadsafe(job.set_progress, pages_done, pages_total)
+
+        try:
+            analyze_files(job.files, engine.options(), workers=engine.workers, log=lambda message: None,
+                          on_result=on_result, cancel_event=engine.cancel_event, on_progress=on_progress)
+            return TRABAJO_COMPLETO, None
+        except AnalysisCancelled:
+            return TRABAJO_CANCELADO, None
+        except Exception as e:
+            return TRABAJO_ERROR, str(e)
+        finally:
+            if job.upload_dir:
+                shutil.rmtree(job.upload_dir, ignore_errors=True)
+
+    def create_job(self, request):
+        """Validar el cuerpo de POST /trabajos y poner el trabajo en la cola"""
+        if not isinstance(request, dict):
+            raise ApiError(400, "Se esperaba un objeto JSON")
+
+        keywords = request.get('palabras')
+        if (not isinstance(keywords, list) or not keywords
+                or not all(isinstance(keyword, str) and keyword.strip() for keyword in keywords)):
+            raise ApiError(400, "'palabras' debe ser una lista de palabras clave no vacía")
+
+        options = {}
+        for key, default in (('case_sensitive', False), ('whole_words', True), ('ocr_enabled', True)):
+            options[key] = request.get(key, default)
+            if not isinstance(options[key], bool):
+                raise ApiError(400, f"'{key}' debe ser true o false")
+        options['match_mode'] = request.get('match_mode', MODO_EXACTO)
+        if options['match_mode'] not in MODOS_COINCIDENCIA:
+            raise ApiError(400, f"'match_mode' debe ser uno de: {', '.join(MODOS_COINCIDENCIA)}")
+        options['max_edits'] = request.get('max_edits', 0)
+        if options['max_edits'] not in (0, 1, 2) or isinstance(options['max_edits'], bool):
+            raise ApiError(400, "'max_edits' debe ser 0, 1 o 2")
+
+        paths = request.get('archivos', [])
+        uploads = request.get('subidas', [])
+        if not isinstance(paths, list) or not isinstance(uploads, list) or not (paths or uploads):
+            raise ApiError(400, "Indique 'archivos' (rutas locales) o 'subidas' (PDFs en base64)")
+
+        files = []
+        for path in paths:
+            if not isinstance(path, str) or not os.path.isfile(path):
+                raise ApiError(400, f"No existe el archivo: {path}")
+            files.append(os.path.abspath(path))
+
+        if len(self.queue) >= self.max_queued:
+            raise ApiError(503, "La cola de trabajos está llena, intente más tarde", {'Retry-After': '5'})
+
+        job_id = uuid.uuid4().hex[:12]
+        upload_dir = None
+        if uploads:
+            upload_dir = os.path.join(self.output_dir, '.subidas', job_id)
+            os.makedirs(upload_dir, exist_ok=True)
+            try:
+                for number, upload in enumerate(uploads, 1):
+                    if not isinstance(upload, dict) or not isinstance(upload.get('contenido'), str):
+                        raise ApiError(400, "Cada subida debe tener 'nombre' y 'contenido' (base64)")
+                    try:
+                        content = base64.b64decode(upload['contenido'], validate=True)
+                    except (binascii.Error, ValueError):
+                        raise ApiError(400, f"Contenido base64 no válido en la subida {number}") from None
+                    name = os.path.basename(str(upload.get('nombre') or '')) or f"subida_{number}.pdf"
+                    path = os.path.join(upload_dir, f"{number:03d}_{name}")
+                    with open(path, 'wb') as file:
+                        file.write(content)
+                    files.append(path)
+            except BaseException:
+                shutil.rmtree(upload_dir, ignore_errors=True)
+                raise
+
+        engine = AnalysisEngine(f"api_{job_id}", [keyword.strip() for keyword in keywords], self.output_dir,
+                                workers=self.workers, **options)
+        job = Job(job_id, files, engine, upload_dir)
+        self.queue.append(job)
+        self.queued.release()
+        self.jobs[job_id] = job
+        self.forget_old_jobs()
+        return job
+
+    def forget_old_jobs(self):
+        """Descartar los trabajos terminados más antiguos por encima de MAX_TRABAJOS_GUARDADOS"""
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(self.jobs) - MAX_TRABAJOS_GUARDADOS)]:
+            del self.jobs[job_id]
+
+    def get_job(self, job_id):
+        """Trabajo por su identificador (404 si no existe)"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise ApiError(404, f"No existe el trabajo: {job_id}")
+        return job
+
+    def cancel_job(self, job):
+        """Cancelar un trabajo en cola (de inmediato) o en curso (entre tramos de páginas)"""
+        if job.finished:
+            raise ApiError(409, f"El trabajo ya terminó ({job.status})")
+        if job.status == TRABAJO_EN_COLA:
+            # Sale de la cola en el acto: deja lugar para otro trabajo
+            self.queue.remove(job)
+            job.set_status(TRABAJO_CANCELADO)
+            if job.upload_dir:
+                shutil.rmtree(job.upload_dir, ignore_errors=True)
+        else:
+            job.engine.cancel_event.set()
+
+    def server_status(self):
+        """Estado general del servidor"""
+        counts = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            'trabajos': counts,
+            'en_cola': len(self.queue),
+            'cola_maxima': self.max_queued,
+            'trabajos_simultaneos': self.max_jobs,
+            'procesos_por_trabajo': self.workers
+        }
+
+    # --- HTTP ---------------------------------------------------------------
+
+    async def handle_connection(self, reader, writer):
+        """Atender una solicitud HTTP/1.1 (una por conexión)"""
+        try:
+            try:
+                method, path, body = await self.read_request(reader)
+                await self.dispatch(method, path, body, writer)
+            except ApiError as e:
+                await self.send_json(writer, e.status, {'error': e.message}, e.headers)
+            except (ValueError, UnicodeDecodeError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                await self.send_json(writer, 400, {'error': "Solicitud HTTP no válida"})
+            except ConnectionError:
+                pass
+            except Exception as e:
+                self.log_message(f"❌ Error atendiendo una solicitud: {e}")
+                await self.send_json(writer, 500, {'error': str(e)})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def read_request(self, reader):
+        """Leer método, ruta y cuerpo de una solicitud"""
+        request_line = await reader.readline()
+        if not request_line:
+            raise ConnectionError("Conexión cerrada")
+        method, target, _ = request_line.decode('latin-1').split(' ', 2)
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get('content-length', 0))
+        if length > MAX_CUERPO_MB * 1024 * 1024:
+            raise ApiError(413, f"La solicitud supera {MAX_CUERPO_MB} MB")
+        body = await reader.readexactly(length) if length else b''
+        return method.upper(), urlsplit(target).path.rstrip('/') or '/', body
+
+    async def dispatch(self, method, path, body, writer):
+        """Resolver la ruta y responder"""
+        parts = path.strip('/').split('/')
+
+        if parts == ['estado']:
+            self.require_method(method, 'GET')
+            return await self.send_json(writer, 200, self.server_status())
+
+        if parts[0] != 'trabajos' or len(parts) > 3:
+            raise ApiError(404, f"Ruta desconocida: {path}")
+
+        if len(parts) == 1:
+            if method == 'POST':
+                try:
+                    request = json.loads(body.decode('utf-8') or 'null')
+                except ValueError:
+                    raise ApiError(400, "El cuerpo no es JSON válido") from None
+                job = self.create_job(request)
+                return await self.send_json(writer, 202, job.describe())
+            self.require_method(method, 'GET')
+            return await self.send_json(writer, 200, [job.describe() for job in self.jobs.values()])
+
+        job = self.get_job(parts[1])
+        if len(parts) == 2:
+            if method == 'DELETE':
+                self.cancel_job(job)
+                return await self.send_json(writer, 200, job.describe())
+            self.require_method(method, 'GET')
+            return await self.send_json(writer, 200, job.describe())
+
+        self.require_method(method, 'GET')
+        if parts[2] == 'resultados':
+            return await self.send_json(writer, 200, {'trabajo': job.describe(), 'resultados': job.results})
+        if parts[2] == 'eventos':
+            return await self.send_events(writer, job)
+        raise ApiError(404, f"Ruta desconocida: {path}")
+
+    @staticmethod
+    def require_method(method, allowed):
+        if method != allowed:
+            raise ApiError(405, f"Método no permitido: {method}", {'Allow': allowed})
+
+    @staticmethod
+    async def send_json(writer, status, data, headers=None):
+        """Responder con un documento JSON"""
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        head = [f"HTTP/1.1 {status} {MENSAJES_HTTP.get(status, '')}",
+                "Content-Type: application/json; charset=utf-8",
+                f"Content-Length: {len(body)}",
+                "Connection: close"]
+        head += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+
+    @staticmethod
+    async def send_events(writer, job):
+        """Transmitir el avance del trabajo: una línea JSON por evento (chunked) hasta que termine"""
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson; charset=utf-8\r\n"
+                     b"Transfer-Encoding: chunked\r\nCache-Control: no-cache\r\nConnection: close\r\n\r\n")
+        async for event in job.stream_events():
+            line = (json.dumps(event, ensure_ascii=False) + '\n').encode('utf-8')
+            writer.write(f"{len(line):x}\r\n".encode('ascii') + line + b"\r\n")
+            # Si el cliente lee despacio, se espera en lugar de acumular eventos en memoria
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+
+def build_parser():
+    """Definir los argumentos de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Analizador OCR Universal - servidor HTTP local de trabajos")
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="Dirección en la que escuchar (por defecto solo el propio equipo: 127.0.0.1)")
+    parser.add_argument('--puerto', type=int, default=PUERTO_POR_DEFECTO, help="Puerto (por defecto: 8765)")
+    parser.add_argument('--salida', default=os.path.join(os.getcwd(), 'resultados_api'),
+                        help="Carpeta para la caché de texto, el índice y los PDFs subidos")
+    parser.add_argument('--procesos', type=int, default=1, help="Procesos en paralelo por trabajo")
+    parser.add_argument('--trabajos', type=int, default=MAX_TRABAJOS_SIMULTANEOS,
+                        help="Trabajos que se procesan a la vez")
+    parser.add_argument('--cola', type=int, default=MAX_TRABAJOS_EN_COLA,
+                        help="Trabajos en espera como máximo (con la cola llena se responde 503)")
+    return parser
+
+
+async def serve(args):
+    """Ejecutar el servidor hasta Ctrl+C"""
+    server = AnalysisServer(args.salida, workers=args.procesos, max_jobs=args.trabajos, max_queued=args.cola)
+    host, port = await server.start(args.host, args.puerto)
+    print(f"🌐 Servidor escuchando en http://{host}:{port} ({args.trabajos} trabajos a la vez, "
+          f"{args.procesos} procesos por trabajo)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main(argv=None):
+    """Función principal"""
+    args = build_parser().parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        print("⏹️ Servidor detenido")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""Configuración común de las pruebas del Analizador OCR Universal"""
+
+import os
+import sys
+
+# Los módulos del analizador están en la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from PIL import Image, ImageDraw
+
+import procesador_pdf
+
+
+class FakeOCR:
+    """Motor OCR de prueba: devuelve un texto fijo por página y cuenta las llamadas"""
+
+    name = 'prueba'
+
+    def __init__(self, text, calls, on_call=None, cache_suffix='_prueba'):
+        self.text = text
+        self.calls = calls
+        self.on_call = on_call
+        self.cache_suffix = cache_suffix
+
+    def image_to_string(self, image, lang):
+        self.calls.append(image.size)
+        if self.on_call is not None:
+            self.on_call(len(self.calls))
+        return self.text
+
+    def image_to_data(self, image, lang):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_ocr(monkeypatch):
+    """Reemplazar el motor OCR; devuelve la configuración (texto, llamadas, on_call y sufijo de caché)"""
+    state = {'text': 'Informe de alumbrado público', 'calls': [], 'on_call': None, 'cache_suffix': '_prueba'}
+    monkeypatch.setattr(procesador_pdf, 'get_ocr_backend',
+                        lambda name, lang: FakeOCR(state['text'], state['calls'], state['on_call'],
+                                                   state['cache_suffix']))
+    return state
+
+
+@pytest.fixture
+def scanned_pdf(tmp_path):
+    """Crear un PDF escaneado (solo imágenes, sin texto) de page_count páginas"""
+    def create(name='escaneado.pdf', page_count=3):
+        pages = []
+        for page_num in range(1, page_count + 1):
+            image = Image.new('L', (425, 550), 255)
+            ImageDraw.Draw(image).text((40, 40), f"Pagina {page_num}", fill=0)
+            pages.append(image)
+        path = tmp_path / name
+        pages[0].save(path, 'PDF', resolution=50, save_all=True, append_images=pages[1:])
+        return str(path)
+    return create
+
+
+@pytest.fixture
+def text_pdf(tmp_path):
+    """Crear un PDF con texto (una lista de líneas por página)"""
+    from benchmark_analizador import text_pdf_bytes
+
+    def create(name, pages):
+        path = tmp_path / name
+        path.write_bytes(text_pdf_bytes(pages))
+        return str(path)
+    return create
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""Pruebas de la búsqueda aproximada de palabras clave"""
+
+import itertools
+import random
+
+import pytest
+
+from busqueda_aproximada import FuzzyMatcher, edit_budget, levenshtein
+from motor_busqueda import MODO_EXACTO, MODO_SIN_TILDES
+
+
+@pytest.mark.parametrize('word, max_edits, expected', [
+    ('luz', 2, 0), ('obra', 2, 0),
+    ('plaza', 2, 1), ('barrio', 2, 1), ('decreto', 2, 1),
+    ('alumbrado', 2, 2), ('presupuesto', 2, 2),
+    ('alumbrado', 1, 1), ('plaza', 0, 0),
+])
+def test_edit_budget_by_length(word, max_edits, expected):
+    assert edit_budget(word, max_edits) == expected
+
+
+def matched(matcher, text):
+    return [(text[start:end], distance) for _, start, end, distance in matcher.find_matches(text)]
+
+
+def test_short_keywords_need_exact_match():
+    matcher = FuzzyMatcher(['luz', 'plaza', 'alumbrado'], max_edits=2)
+    text = "la lux de la plaxa y el alunbrdo"
+    assert matched(matcher, text) == [('plaxa', 1), ('alunbrdo', 2)]
+    # Una edición más que el presupuesto ya no coincide
+    assert matched(matcher, "plxxa alxxbrxdo") == []
+
+
+def test_exact_matches_are_left_to_keyword_matcher():
+    matcher = FuzzyMatcher(['alumbrado'], max_edits=2)
+    assert matched(matcher, "alumbrado") == []
+
+
+def test_case_and_accent_folding():
+    text = "GESTlÓN de la Gestion municipal"
+    insensitive = FuzzyMatcher(['gestión'], case_sensitive=False, max_edits=1)
+    assert matched(insensitive, text) == [('GESTlÓN', 1), ('Gestion', 1)]
+
+    sensitive = FuzzyMatcher(['gestión'], case_sensitive=True, max_edits=1)
+    assert matched(sensitive, text) == []
+
+    # Sin tildes: "Gestion" es igual a la palabra clave y "GESTlÓN" está a una edición
+    accents = FuzzyMatcher(['gestión'], match_mode=MODO_SIN_TILDES, max_edits=1)
+    assert matched(accents, text) == [('GESTlÓN', 1)]
+
+
+def test_phrases_sum_the_distance_of_their_words():
+    matcher = FuzzyMatcher(['alumbrado público'], match_mode=MODO_EXACTO, max_edits=2)
+    assert matched(matcher, "el alunbrado publico del barrio") == [('alunbrado publico', 2)]
+
+
+def plain_levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def test_levenshtein_with_limit_matches_plain_distance():
+    rng = random.Random(7)
+    for _ in range(500):
+        a = ''.join(rng.choice('abcr') for _ in range(rng.randint(0, 8)))
+        b = ''.join(rng.choice('abcr') for _ in range(rng.randint(0, 8)))
+        distance = plain_levenshtein(a, b)
+        for limit in (0, 1, 2):
+            assert levenshtein(a, b, limit) == (distance if distance <= limit else limit + 1)
+
+
+def test_deletion_index_finds_the_same_words_as_plain_levenshtein():
+    keywords = ['alumbrado', 'barrio', 'plaza', 'concejo', 'ordenanza', 'luz']
+    rng = random.Random(11)
+    words = set()
+    # Variantes de las palabras clave con una y dos ediciones al azar, y palabras sin relación
+    for keyword, _ in itertools.product(keywords, range(40)):
+        word = list(keyword)
+        for _ in range(rng.randint(1, 3)):
+            position = rng.randrange(len(word) + 1)
+            action = rng.choice('isd')
+            if action == 'i':
+                word.insert(position, rng.choice('aeorn1l'))
+            elif word and position < len(word):
+                if action == 's':
+                    word[position] = rng.choice('aeorn1l')
+                else:
+                    del word[position]
+        words.add(''.join(word))
+    words |= {'gobierno', 'servicio', 'avenida', 'escuela'}
+
+    matcher = FuzzyMatcher(keywords, max_edits=2)
+    for word in sorted(words):
+        found = {keywords[index]: distance for index, _, _, distance in matcher.find_matches(word)}
+        expected = {}
+        for keyword in keywords:
+            distance = plain_levenshtein(word, keyword)
+            if 0 < distance <= edit_budget(keyword, 2):
+                expected[keyword] = distance
+        assert found == expected, word
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""Pruebas de la caché persistente de texto"""
+
+from cache_texto import TextCache
+from motor_analisis import AnalysisEngine
+
+
+def test_evict_removes_least_recently_used_pages(tmp_path):
+    # Límite de 250 bytes: entran dos páginas de 100 bytes, no tres
+    cache = TextCache(str(tmp_path), max_mb=250 / (1024 * 1024))
+    for page in (1, 2, 3):
+        cache.put('hash', page, 'direct', 'x' * 100)
+        cache.commit()
+    assert cache.evict() == 1
+    assert cache.get('hash', 1, 'direct') is None
+    assert cache.get('hash', 2, 'direct') is not None
+
+    # La página 2 se acaba de leer: al agregar la 4 se descarta la 3
+    cache.commit()
+    cache.put('hash', 4, 'direct', 'x' * 100)
+    assert cache.evict() == 1
+    assert cache.get('hash', 3, 'direct') is None
+    assert [cache.get('hash', page, 'direct') is not None for page in (2, 4)] == [True, True]
+    cache.close()
+
+
+def test_evict_keeps_everything_under_the_limit(tmp_path):
+    cache = TextCache(str(tmp_path), max_mb=250 / (1024 * 1024))
+    cache.put('hash', 1, 'direct', 'x' * 100)
+    cache.put('hash', 1, 'ocr', 'x' * 100, dpi=300, lang='spa')
+    assert cache.evict() == 0
+    assert cache.get('hash', 1, 'ocr', dpi=300, lang='spa') == 'x' * 100
+    cache.close()
+
+
+def test_cached_ocr_text_is_not_shared_between_ocr_backends(tmp_path, fake_ocr, scanned_pdf):
+    pdf = scanned_pdf(page_count=2)
+    output_dir = str(tmp_path / 'resultados')
+
+    def run():
+        fake_ocr['calls'].clear()
+        engine = AnalysisEngine('prueba', ['alumbrado'], output_dir, pdf_backend='pdfium', use_index=False,
+                                log=lambda message: None)
+        engine.run([pdf])
+        return len(fake_ocr['calls'])
+
+    assert run() == 2
+    # Mismo motor: el texto sale de la caché
+    assert run() == 0
+    # Otro motor: las páginas vuelven a pasar por el OCR
+    fake_ocr['cache_suffix'] = '_otro'
+    assert run() == 2
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""Pruebas de la carpeta vigilada"""
+
+import os
+
+import carpeta_vigilada
+from backends_pdf import PyPDF2Session
+from carpeta_vigilada import HotFolderService
+from manifiesto import AnalysisManifest, keywords_hash, options_hash
+from motor_analisis import AnalysisEngine
+
+
+def test_batches_reuse_worker_pool(tmp_path, text_pdf, monkeypatch):
+    pools = []
+    original = carpeta_vigilada.create_worker_pool
+
+    def create_worker_pool(*args, **kwargs):
+        pools.append(original(*args, **kwargs))
+        return pools[-1]
+    monkeypatch.setattr(carpeta_vigilada, 'create_worker_pool', create_worker_pool)
+
+    engine = AnalysisEngine('vigilada', ['alumbrado'], str(tmp_path / 'resultados'), ocr_enabled=False, workers=2,
+                            use_index=False, log=lambda message: None)
+    service = HotFolderService(engine, [str(tmp_path)])
+    options = engine.options()
+    manifest = AnalysisManifest(engine.output_dir, engine.project_name)
+    try:
+        for name in ('primero.pdf', 'segundo.pdf'):
+            path = text_pdf(name, [['Informe de alumbrado público']])
+            service.analyze_batch([(path, AnalysisManifest.file_state(path))], options, manifest,
+                                  keywords_hash(engine.keywords))
+            assert service.executor is pools[0]
+        assert len(pools) == 1
+        assert service.files_analyzed == 2
+    finally:
+        manifest.close()
+        service.close_report()
+        service.close_pool()
+    assert service.executor is None
+
+
+def test_worker_crash_retries_unfinished_files(tmp_path, text_pdf, monkeypatch):
+    folder = tmp_path / 'entrada'
+    folder.mkdir()
+    crashed = tmp_path / 'caido'
+    extract_text = PyPDF2Session.extract_text
+
+    # La primera página leída en un proceso del pool hace caer ese proceso (una sola vez)
+    def crashing_extract_text(session, page_num):
+        if os.getpid() != parent_pid and not crashed.exists():
+            crashed.touch()
+            os._exit(1)
+        return extract_text(session, page_num)
+    parent_pid = os.getpid()
+    monkeypatch.setattr(PyPDF2Session, 'extract_text', crashing_extract_text)
+
+    paths = [text_pdf(f"entrada/{name}", [['Informe de alumbrado público']]) for name in ('uno.pdf', 'dos.pdf')]
+    engine = AnalysisEngine('vigilada', ['alumbrado'], str(tmp_path / 'resultados'), ocr_enabled=False, workers=2,
+                            use_cache=False, use_index=False, log=lambda message: None)
+    service = HotFolderService(engine, [str(folder)], settle_seconds=0)
+    options = engine.options()
+    manifest = AnalysisManifest(engine.output_dir, engine.project_name)
+    try:
+        batch = service.ready_files()
+        assert sorted(path for path, _ in batch) == sorted(paths)
+        service.analyze_batch(batch, options, manifest, keywords_hash(engine.keywords))
+        assert crashed.exists()
+        assert service.executor is None
+        # Los archivos sin terminar vuelven a estar listos y se analizan con un pool nuevo
+        retry = service.ready_files()
+        assert retry
+        service.analyze_batch(retry, options, manifest, keywords_hash(engine.keywords))
+        assert sorted(service.handled) == sorted(paths)
+        assert service.files_analyzed == 2
+        for path in paths:
+            assert manifest.lookup(path, keywords_hash(engine.keywords), options_hash(options)) is not None
+    finally:
+        manifest.close()
+        service.close_report()
+        service.close_pool()
+
+
+def test_file_that_always_crashes_is_given_up(tmp_path, text_pdf, monkeypatch):
+    folder = tmp_path / 'entrada'
+    folder.mkdir()
+    parent_pid = os.getpid()
+    extract_text = PyPDF2Session.extract_text
+
+    def crashing_extract_text(session, page_num):
+        if os.getpid() != parent_pid:
+            os._exit(1)
+        return extract_text(session, page_num)
+    monkeypatch.setattr(PyPDF2Session, 'extract_text', crashing_extract_text)
+
+    path = text_pdf('entrada/roto.pdf', [['Informe de alumbrado público']])
+    engine = AnalysisEngine('vigilada', ['alumbrado'], str(tmp_path / 'resultados'), ocr_enabled=False, workers=2,
+                            use_cache=False, use_index=False, log=lambda message: None)
+    service = HotFolderService(engine, [str(folder)], settle_seconds=0)
+    options = engine.options()
+    manifest = AnalysisManifest(engine.output_dir, engine.project_name)
+    try:
+        for _ in range(carpeta_vigilada.MAX_CAIDAS_POR_ARCHIVO):
+            batch = service.ready_files()
+            assert [file_path for file_path, _ in batch] == [path]
+            service.analyze_batch(batch, options, manifest, keywords_hash(engine.keywords))
+        # Se registra con error y no se vuelve a intentar hasta que cambie
+        assert service.ready_files() == []
+        assert service.files_analyzed == 1
+        assert manifest.lookup(path, keywords_hash(engine.keywords), options_hash(options)) is None
+    finally:
+        manifest.close()
+        service.close_report()
+        service.close_pool()
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""Pruebas de la clasificación de páginas y de la cobertura de imágenes"""
+
+import pytest
+
+from backends_pdf import PyPDF2Session
+from clasificador_paginas import DIRECTO, OCR, SignalClassifier
+
+# Imagen de 1x1 pixel en escala de grises
+IMAGEN = b"<< /Type /XObject /Subtype /Image /Width 1 /Height 1 /ColorSpace /DeviceGray " \
+         b"/BitsPerComponent 8 /Length 1 >>\nstream\n\x00\nendstream"
+
+
+def stream(content, extra=b''):
+    return b"<< %s/Length %d >>\nstream\n" % (extra, len(content)) + content + b"\nendstream"
+
+
+def pdf_bytes(content, xobjects=b'', extra_objects=()):
+    """PDF de una página con el contenido y los XObjects indicados (los objetos extra empiezan en el 4)"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>",
+               b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+               b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /XObject << %s >> >> "
+               b"/Contents %d 0 R >>" % (xobjects, 4 + len(extra_objects))]
+    objects += list(extra_objects) + [stream(content)]
+
+    output = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return output
+
+
+LAYOUTS = {
+    # El escaneo dibujado directamente en la página
+    'imagen': pdf_bytes(b"q 612 0 0 792 0 0 cm /Im0 Do Q", b"/Im0 4 0 R", [IMAGEN]),
+    # El escaneo dentro de un formulario (Form XObject)
+    'formulario': pdf_bytes(b"q /Fm0 Do Q", b"/Fm0 5 0 R", [
+        IMAGEN,
+        stream(b"q 612 0 0 792 0 0 cm /Im0 Do Q",
+               b"/Type /XObject /Subtype /Form /BBox [0 0 612 792] /Resources << /XObject << /Im0 4 0 R >> >> ")]),
+    # El escaneo como imagen en línea
+    'en_linea': pdf_bytes(b"q 612 0 0 792 0 0 cm BI /W 1 /H 1 /CS /G /BPC 8 ID \x00 EI Q"),
+    # Página vacía
+    'vacia': pdf_bytes(b""),
+}
+
+
+def coverage(tmp_path, layout):
+    path = tmp_path / f"{layout}.pdf"
+    path.write_bytes(LAYOUTS[layout])
+    with PyPDF2Session(str(path)) as session:
+        return session.image_coverage(1)
+
+
+@pytest.mark.parametrize('layout, expected', [('imagen', 1.0), ('vacia', 0.0),
+                                              ('formulario', None), ('en_linea', None)])
+def test_pypdf2_image_coverage(tmp_path, layout, expected):
+    assert coverage(tmp_path, layout) == expected
+
+
+@pytest.mark.parametrize('layout, decision', [('imagen', OCR), ('formulario', OCR), ('en_linea', OCR),
+                                              ('vacia', DIRECTO)])
+def test_signal_classifier_sends_scans_to_ocr(tmp_path, layout, decision):
+    record = SignalClassifier().classify('', lambda: coverage(tmp_path, layout))
+    assert record['decision'] == decision
+
+
+@pytest.mark.parametrize('layout', ['imagen', 'formulario', 'en_linea'])
+def test_pdfium_image_coverage_includes_forms_and_inline_images(tmp_path, layout):
+    pytest.importorskip('pypdfium2')
+    from backends_pdf import PdfiumSession
+
+    path = tmp_path / f"{layout}.pdf"
+    path.write_bytes(LAYOUTS[layout])
+    with PdfiumSession(str(path)) as session:
+        assert session.image_coverage(1) == pytest.approx(1.0)
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""Pruebas del índice invertido"""
+
+from indice_invertido import TextIndex
+
+
+def matched_keywords(index, keywords):
+    results = index.search(keywords)
+    return sorted(match['keyword'] for result in results for match in result['matches'])
+
+
+def test_reindexed_page_replaces_text(tmp_path):
+    index = TextIndex(str(tmp_path))
+    try:
+        index.add_page('hash', str(tmp_path / 'documento.pdf'), 1, 'Texto extraído sin OCR: luminaria')
+        index.commit()
+        assert matched_keywords(index, ['luminaria', 'transformador']) == ['luminaria']
+
+        # La misma página procesada otra vez con OCR da otro texto
+        index.add_page('hash', str(tmp_path / 'documento.pdf'), 1, 'Texto con OCR: transformador')
+        index.commit()
+        assert matched_keywords(index, ['luminaria', 'transformador']) == ['transformador']
+        assert index.conn.execute('SELECT COUNT(*) FROM pages').fetchone()[0] == 1
+    finally:
+        index.close()
+
+
+def test_reindexed_page_with_same_text_keeps_postings(tmp_path):
+    index = TextIndex(str(tmp_path))
+    try:
+        for _ in range(2):
+            index.add_page('hash', str(tmp_path / 'documento.pdf'), 1, 'luminaria luminaria')
+        index.commit()
+        assert matched_keywords(index, ['luminaria']) == ['luminaria', 'luminaria']
+        assert index.conn.execute('SELECT COUNT(*) FROM postings').fetchone()[0] == 1
+    finally:
+        index.close()
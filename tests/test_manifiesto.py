@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""Pruebas del manifiesto de análisis incremental"""
+
+import json
+
+from manifiesto import AnalysisManifest, keywords_hash, options_hash
+
+
+def record_file(manifest, tmp_path, options):
+    path = tmp_path / 'documento.pdf'
+    path.write_bytes(b'%PDF-1.4\n%%EOF\n')
+    state = AnalysisManifest.file_state(str(path))
+    file_results = {'file_path': str(path), 'matches': []}
+    manifest.record(file_results, keywords_hash(['luz']), options, state)
+    return str(path)
+
+
+def test_min_confidence_invalidates_entry(tmp_path):
+    options = {'ocr_enabled': True, 'dpi_policy': 'adaptativa', 'low_dpi': 150, 'min_confidence': 70}
+    manifest = AnalysisManifest(str(tmp_path / 'resultados'), 'prueba')
+    try:
+        path = record_file(manifest, tmp_path, options)
+        digest = keywords_hash(['luz'])
+
+        stored = manifest.lookup(path, digest, options_hash(options))
+        assert json.loads(stored)['file_path'] == path
+
+        changed = dict(options, min_confidence=85)
+        assert manifest.lookup(path, digest, options_hash(changed)) is None
+    finally:
+        manifest.close()
+
+
+def test_ocr_options_change_hash():
+    options = {'ocr_backend': 'auto', 'low_dpi': 150, 'min_confidence': 70}
+    for key, value in (('ocr_backend', 'tesserocr'), ('low_dpi', 200), ('min_confidence', 85)):
+        assert options_hash(dict(options, **{key: value})) != options_hash(options)
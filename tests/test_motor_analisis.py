@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""Pruebas del motor de análisis"""
+
+import os
+
+from motor_analisis import AnalysisEngine
+
+
+def test_resume_without_cache_skips_extracted_pages(tmp_path, fake_ocr, scanned_pdf):
+    pdf = scanned_pdf(page_count=8)
+    output_dir = str(tmp_path / 'resultados')
+    engine = AnalysisEngine('prueba', ['alumbrado'], output_dir, pdf_backend='pdfium', use_cache=False,
+                            use_index=False, log=lambda message: None)
+
+    # Cancelar al terminar el primer tramo de páginas renderizadas
+    def cancel_after_first_batch(calls):
+        if calls == 4:
+            engine.cancel_event.set()
+    fake_ocr['on_call'] = cancel_after_first_batch
+    summary = engine.run([pdf])
+    assert summary['cancelled']
+    assert len(fake_ocr['calls']) == 4
+
+    fake_ocr['on_call'] = None
+    fake_ocr['calls'].clear()
+    resumed, files = AnalysisEngine.from_checkpoint(output_dir, 'prueba', log=lambda message: None)
+    assert files == [pdf]
+    assert not resumed.use_cache
+    summary = resumed.run(files)
+    assert not summary['cancelled']
+    # Solo las páginas que faltaban pasan por el OCR
+    assert len(fake_ocr['calls']) == 4
+    assert summary['total_matches'] == 8
+
+    # Al terminar se borran las páginas guardadas para reanudar
+    assert not [name for name in os.listdir(output_dir) if name.startswith('.reanudar_')]
+    assert AnalysisEngine.from_checkpoint(output_dir, 'prueba') == (None, [])
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Pruebas del reporte incremental y del Excel"""
+
+import openpyxl
+
+import reportes
+from reportes import DETAIL_HEADERS, SUMMARY_HEADERS, StreamingReport
+
+
+def file_result(name, match_count):
+    matches = [{'page': page, 'keyword': 'alumbrado', 'matched_text': 'Alumbrado',
+                'context': f"informe de alumbrado {page}", 'position': 10, 'distance': 0}
+               for page in range(1, match_count + 1)]
+    return {'file': name, 'file_path': f"/documentos/{name}", 'matches': matches, 'total_matches': match_count,
+            'pages_processed': match_count, 'page_records': [], 'elapsed_ms': 1.0, 'error': None}
+
+
+def sheet_rows(workbook, title):
+    return [list(row) for row in workbook[title].iter_rows(values_only=True)]
+
+
+def test_excel_continues_on_new_sheets_with_headers(tmp_path, monkeypatch):
+    # Tres filas de datos por hoja más la de encabezados
+    monkeypatch.setattr(reportes, 'EXCEL_MAX_ROWS', 4)
+    report = StreamingReport(str(tmp_path), 'prueba', ['alumbrado'])
+    report.add_file_result(file_result('a.pdf', 7))
+    for name in ('b.pdf', 'c.pdf', 'd.pdf'):
+        report.add_file_result(file_result(name, 0))
+    summary = report.close()
+
+    workbook = openpyxl.load_workbook(summary['excel_path'])
+    assert workbook.sheetnames == ['Resumen', 'Resumen 2', 'Detalle de Coincidencias',
+                                   'Detalle de Coincidencias 2', 'Detalle de Coincidencias 3']
+
+    resumen = sheet_rows(workbook, 'Resumen') + sheet_rows(workbook, 'Resumen 2')
+    assert resumen[0] == SUMMARY_HEADERS
+    assert resumen[4] == SUMMARY_HEADERS
+    assert [row[0] for row in resumen if row != SUMMARY_HEADERS] == ['a.pdf', 'b.pdf', 'c.pdf', 'd.pdf']
+
+    pages = []
+    for title, data_rows in (('Detalle de Coincidencias', 3), ('Detalle de Coincidencias 2', 3),
+                             ('Detalle de Coincidencias 3', 1)):
+        rows = sheet_rows(workbook, title)
+        assert rows[0] == DETAIL_HEADERS
+        assert len(rows) == 1 + data_rows
+        pages += [row[1] for row in rows[1:]]
+    # Las coincidencias siguen en orden de una hoja a la siguiente
+    assert pages == list(range(1, 8))
+
+
+def test_excel_without_matches_keeps_detail_sheet(tmp_path, monkeypatch):
+    monkeypatch.setattr(reportes, 'EXCEL_MAX_ROWS', 4)
+    report = StreamingReport(str(tmp_path), 'prueba', ['alumbrado'])
+    report.add_file_result(file_result('a.pdf', 0))
+    workbook = openpyxl.load_workbook(report.close()['excel_path'])
+    assert workbook.sheetnames == ['Resumen', 'Detalle de Coincidencias']
+    assert sheet_rows(workbook, 'Detalle de Coincidencias') == [DETAIL_HEADERS]
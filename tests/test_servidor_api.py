@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""Pruebas del servidor HTTP local contra PDFs generados en la carpeta temporal"""
+
+import asyncio
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from backends_pdf import PyPDF2Session
+from servidor_api import AnalysisServer
+
+
+@pytest.fixture
+def server(tmp_path):
+    """Servidor con un trabajo simultáneo y uno en cola, en un puerto libre; devuelve su URL"""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    analysis_server = AnalysisServer(str(tmp_path / 'resultados'), max_jobs=1, max_queued=1, log=lambda message: None)
+    host, port = asyncio.run_coroutine_threadsafe(analysis_server.start('127.0.0.1', 0), loop).result(10)
+    try:
+        yield f"http://{host}:{port}"
+    finally:
+        asyncio.run_coroutine_threadsafe(analysis_server.stop(), loop).result(60)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(10)
+        loop.close()
+
+
+def request(method, url, data=None):
+    """(código, encabezados, cuerpo JSON) de una solicitud"""
+    body = json.dumps(data).encode('utf-8') if data is not None else None
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=body, method=method), timeout=30) as response:
+            return response.status, response.headers, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, json.loads(e.read())
+
+
+def events(url):
+    """Eventos NDJSON de un trabajo hasta que termina"""
+    with urllib.request.urlopen(url, timeout=60) as response:
+        assert response.headers['Content-Type'].startswith('application/x-ndjson')
+        return [json.loads(line) for line in response if line.strip()]
+
+
+def wait_for_status(url, status):
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        job = request('GET', url)[2]
+        if job['estado'] == status:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"El trabajo no llegó al estado {status}: {job['estado']}")
+
+
+def test_jobs_events_backpressure_and_cancellation(server, text_pdf, monkeypatch):
+    pages = [['Informe de alumbrado público'], ['Alumbrado público del barrio']]
+    first_pdf = text_pdf('primero.pdf', pages)
+    second_pdf = text_pdf('segundo.pdf', pages)
+    short_pdf = text_pdf('corto.pdf', pages)
+
+    # La primera extracción de texto espera hasta que la prueba la libere
+    release = threading.Event()
+    extracted = []
+    extract_text = PyPDF2Session.extract_text
+
+    def blocking_extract_text(session, page_num):
+        extracted.append(page_num)
+        if len(extracted) == 1:
+            release.wait(30)
+        return extract_text(session, page_num)
+    monkeypatch.setattr(PyPDF2Session, 'extract_text', blocking_extract_text)
+
+    def job_request(keywords, files):
+        return {'palabras': keywords, 'archivos': files, 'ocr_enabled': False}
+
+    try:
+        status, _, running = request('POST', f"{server}/trabajos",
+                                     job_request(['alumbrado'], [first_pdf, second_pdf]))
+        assert status == 202
+        wait_for_status(f"{server}/trabajos/{running['id']}", 'en_curso')
+
+        status, _, queued = request('POST', f"{server}/trabajos", job_request(['alumbrado'], [short_pdf]))
+        assert (status, queued['estado']) == (202, 'en_cola')
+
+        # Cola llena: 503 con Retry-After
+        status, headers, error = request('POST', f"{server}/trabajos", job_request(['barrio'], [short_pdf]))
+        assert status == 503
+        assert headers['Retry-After'] == '5'
+        assert 'llena' in error['error']
+
+        # Un trabajo cancelado en la cola deja su lugar libre
+        status, _, cancelled = request('DELETE', f"{server}/trabajos/{queued['id']}")
+        assert (status, cancelled['estado']) == (200, 'cancelado')
+        assert request('GET', f"{server}/estado")[2]['en_cola'] == 0
+        status, _, accepted = request('POST', f"{server}/trabajos", job_request(['alumbrado', 'barrio'], [short_pdf]))
+        assert status == 202
+        assert request('POST', f"{server}/trabajos", job_request(['barrio'], [short_pdf]))[0] == 503
+
+        # Cancelar el trabajo en curso
+        assert request('DELETE', f"{server}/trabajos/{running['id']}")[0] == 200
+    finally:
+        release.set()
+
+    running_events = events(f"{server}/trabajos/{running['id']}/eventos")
+    assert running_events[-1] == {'tipo': 'estado', 'estado': 'cancelado', 'error': None}
+    # El segundo archivo ya no se procesa
+    assert 'segundo.pdf' not in [event['file'] for event in running_events if event['tipo'] == 'archivo']
+
+    accepted_events = events(f"{server}/trabajos/{accepted['id']}/eventos")
+    assert [event['estado'] for event in accepted_events if event['tipo'] == 'estado'] == ['en_curso', 'completo']
+    assert {'tipo': 'progreso', 'paginas': 2, 'total': 2} in accepted_events
+    file_events = [event for event in accepted_events if event['tipo'] == 'archivo']
+    assert [(event['file'], event['total_matches']) for event in file_events] == [('corto.pdf', 3)]
+
+    status, _, results = request('GET', f"{server}/trabajos/{accepted['id']}/resultados")
+    assert status == 200
+    assert results['trabajo']['estado'] == 'completo'
+    matches = results['resultados'][0]['matches']
+    assert [(match['page'], match['keyword']) for match in matches] == [
+        (1, 'alumbrado'), (2, 'alumbrado'), (2, 'barrio')]
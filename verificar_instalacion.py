@@ -5,6 +5,7 @@ VERIFICADOR DE INSTALACIÓN - GUI ANALIZADOR OCR
 Verifica que todas las dependencias estén correctamente instaladas
 """
 
+import importlib.util
 import sys
 import subprocess
 
@@ -57,6 +58,20 @@ def main():
         if not verificar_dependencia(modulo, display):
             errores += 1
     
+    # Opcional: OCR con libtesseract sin un proceso por página
+    if importlib.util.find_spec('tesserocr') is not None:
+        print("✅ tesserocr (opcional): INSTALADO - OCR con el modelo cargado entre páginas")
+    else:
+        print("ℹ️  tesserocr (opcional): no instalado - se usará pytesseract")
+    if importlib.util.find_spec('pypdfium2') is not None:
+        print("✅ pypdfium2 (opcional): INSTALADO - cada PDF se abre una sola vez")
+    else:
+        print("ℹ️  pypdfium2 (opcional): no instalado - se usará PyPDF2 + poppler")
+    if importlib.util.find_spec('watchdog') is not None:
+        print("✅ watchdog (opcional): INSTALADO - --vigilar detecta los archivos nuevos al instante")
+    else:
+        print("ℹ️  watchdog (opcional): no instalado - --vigilar revisará las carpetas cada 2 segundos")
+    
     print()
     print("🔧 VERIFICANDO HERRAMIENTAS EXTERNAS:")
     print("-" * 40)